@@ -1,10 +1,15 @@
 import os
+import time
 import urllib.parse
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app.pool_metrics import PoolAsyncInstrumentado, PoolInstrumentado
 
 
 load_dotenv()
@@ -32,25 +37,258 @@ def _require_db_env() -> Dict[str, str]:
     return values
 
 
-db_env = _require_db_env()
+def _env_bool(key: str, default: bool) -> bool:
+    value = os.getenv(key)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() == "true"
+
+
+# ============================================================
+# POOL DE CONEXIONES
+# ============================================================
+# - DB_POOL_SIZE / DB_MAX_OVERFLOW: conexiones fijas y extra por proceso.
+# - DB_POOL_TIMEOUT: segundos esperando conexión libre antes de fallar.
+# - DB_POOL_RECYCLE: las conexiones más antiguas se cierran al pedirlas.
+#   Debe ser menor que el wait_timeout de MySQL, que en el hosting compartido
+#   es corto: así no se entrega una conexión que el servidor ya ha cerrado.
+# - DB_POOL_PING_IDLE: solo las conexiones que llevan más de estos segundos
+#   sin usarse se comprueban con un ping antes de entregarse (cubre reinicios
+#   de MySQL). Sustituye a pool_pre_ping, que hacía un ping en cada checkout.
+# - DB_POOL_PRE_PING=true vuelve al ping en cada checkout.
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "280"))
+DB_POOL_PING_IDLE = float(os.getenv("DB_POOL_PING_IDLE", "60"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", False)
+
+
+def _ping_si_inactiva(engine, segundos: float) -> None:
+    """
+    Comprueba con un ping las conexiones inactivas más de `segundos`. Si el
+    ping falla, DisconnectionError hace que el pool la descarte y entregue
+    otra conexión.
+    """
+
+    @event.listens_for(engine, "checkin")
+    def _al_devolver(dbapi_connection, connection_record):
+        connection_record.info["devuelta_en"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _al_entregar(dbapi_connection, connection_record, connection_proxy):
+        devuelta_en = connection_record.info.get("devuelta_en")
+        if devuelta_en is None or time.monotonic() - devuelta_en < segundos:
+            return
+        try:
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except Exception as exc:
+            raise DisconnectionError(f"Conexión inactiva descartada: {exc}") from exc
+
+
+def crear_engine(
+    url: str,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_timeout: float = DB_POOL_TIMEOUT,
+    pool_recycle: int = DB_POOL_RECYCLE,
+    pool_pre_ping: bool = DB_POOL_PRE_PING,
+    ping_inactiva: Optional[float] = DB_POOL_PING_IDLE,
+    **kwargs,
+):
+    """
+    Engine con el pool instrumentado (app/pool_metrics.py) y la configuración
+    indicada. Los benchmarks lo usan para comparar configuraciones.
+    """
+    if url.startswith("mysql"):
+        kwargs.setdefault("connect_args", {"connect_timeout": 5})
+
+    nuevo = create_engine(
+        url,
+        poolclass=PoolInstrumentado,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+        **kwargs,
+    )
+    if ping_inactiva and not pool_pre_ping:
+        _ping_si_inactiva(nuevo, ping_inactiva)
+    return nuevo
+
 
-user = urllib.parse.quote_plus(db_env["DB_USER"])
-password = urllib.parse.quote_plus(db_env["DB_PASSWORD"])
-host = db_env["DB_HOST"]
-port = db_env["DB_PORT"]
-database = db_env["DB_NAME"]
+# DATABASE_URL (opcional) sustituye a las variables DB_*
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "").strip()
+if not SQLALCHEMY_DATABASE_URL:
+    db_env = _require_db_env()
 
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{user}:{password}@{host}:{port}/{database}"
+    user = urllib.parse.quote_plus(db_env["DB_USER"])
+    password = urllib.parse.quote_plus(db_env["DB_PASSWORD"])
+    host = db_env["DB_HOST"]
+    port = db_env["DB_PORT"]
+    database = db_env["DB_NAME"]
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    connect_args={"connect_timeout": 5},
-)
+    SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{user}:{password}@{host}:{port}/{database}"
+
+engine = crear_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+# ============================================================
+# SESIONES ASÍNCRONAS
+# ============================================================
+# get_async_db entrega una AsyncSession (SQLAlchemy asyncio + aiomysql o
+# asyncmy) para los endpoints `async def` de lectura: mientras esperan a
+# MySQL no ocupan un hilo del threadpool, que limitaba la concurrencia.
+#
+# - DB_ASYNC=auto (por defecto): se usa si el driver y greenlet están
+#   instalados; si no, la sesión síncrona se ejecuta en el threadpool con
+#   la misma interfaz (SesionEnHilo), de modo que los endpoints funcionan igual.
+# - DB_ASYNC=true: exige el driver asíncrono. DB_ASYNC=false: nunca lo usa.
+# - DB_ASYNC_DRIVER: aiomysql (por defecto) o asyncmy.
+# - DATABASE_URL_ASYNC (opcional) sustituye a la URL derivada.
+# El pool asíncrono usa la misma configuración DB_POOL_* que el síncrono.
+
+DB_ASYNC = os.getenv("DB_ASYNC", "auto").strip().lower() or "auto"
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "aiomysql").strip() or "aiomysql"
+
+_DRIVERS_ASYNC = {"mysql+pymysql": f"mysql+{DB_ASYNC_DRIVER}", "sqlite": "sqlite+aiosqlite"}
+
+
+def url_async(url: str) -> str:
+    """
+    URL equivalente con el driver asíncrono (mysql+pymysql -> mysql+aiomysql).
+    """
+    esquema, separador, resto = url.partition("://")
+    return _DRIVERS_ASYNC.get(esquema, esquema) + separador + resto
+
+
+def crear_engine_async(
+    url: str,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_timeout: float = DB_POOL_TIMEOUT,
+    pool_recycle: int = DB_POOL_RECYCLE,
+    pool_pre_ping: bool = DB_POOL_PRE_PING,
+    ping_inactiva: Optional[float] = DB_POOL_PING_IDLE,
+    **kwargs,
+):
+    """
+    AsyncEngine con el pool instrumentado. Lanza ImportError si falta el
+    driver asíncrono o greenlet.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    if url.startswith("mysql"):
+        kwargs.setdefault("connect_args", {"connect_timeout": 5})
+
+    nuevo = create_async_engine(
+        url,
+        poolclass=PoolAsyncInstrumentado,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+        **kwargs,
+    )
+    if ping_inactiva and not pool_pre_ping:
+        _ping_si_inactiva(nuevo.sync_engine, ping_inactiva)
+    return nuevo
+
+
+class SesionEnHilo:
+    """
+    Sesión síncrona con la interfaz de lectura de AsyncSession: cada llamada
+    se ejecuta en el threadpool y devuelve el resultado ya leído.
+    """
+
+    def __init__(self, db: Session):
+        self._db = db
+
+    def _ejecutar(self, *args, **kwargs):
+        # freeze() lee todas las filas en el hilo; el Result devuelto no toca el cursor
+        return self._db.execute(*args, **kwargs).freeze()()
+
+    async def execute(self, *args, **kwargs):
+        return await run_in_threadpool(self._ejecutar, *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return (await self.execute(*args, **kwargs)).scalar()
+
+    async def close(self):
+        await run_in_threadpool(self._db.close)
+
+    def get_bind(self):
+        return self._db.get_bind()
+
+
+async_engine = None
+AsyncSessionLocal = None
+_async_inicializado = False
+
+
+def obtener_engine_async():
+    """
+    Crea el AsyncEngine la primera vez que se pide (None si no hay driver
+    asíncrono y DB_ASYNC no es "true").
+    """
+    global async_engine, AsyncSessionLocal, _async_inicializado
+
+    if not _async_inicializado:
+        if DB_ASYNC != "false":
+            try:
+                from sqlalchemy.ext.asyncio import async_sessionmaker
+
+                async_engine = crear_engine_async(
+                    os.getenv("DATABASE_URL_ASYNC", "").strip() or url_async(SQLALCHEMY_DATABASE_URL)
+                )
+                AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+            except ImportError:
+                # Con DB_ASYNC=true falla en cada petición, nunca se degrada
+                if DB_ASYNC == "true":
+                    raise
+        _async_inicializado = True
+    return async_engine
+
+
+async def _sesion_en_hilo(fabrica):
+    db = fabrica()
+    try:
+        yield SesionEnHilo(db)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+def dependencia_en_hilo(fabrica):
+    """
+    Dependencia con la interfaz de get_async_db sobre una sessionmaker
+    síncrona, para sustituir get_async_db en benchmarks y pruebas.
+    """
+    async def _dependencia():
+        async for db in _sesion_en_hilo(fabrica):
+            yield db
+
+    return _dependencia
+
+
+async def get_async_db():
+    if obtener_engine_async() is None:
+        async for db in _sesion_en_hilo(SessionLocal):
+            yield db
+        return
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def check_db_connection() -> bool:
     with engine.connect() as connection:
         connection.execute(text("SELECT 1"))
@@ -8,6 +8,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.database import Base, check_db_connection, engine
 from app.errors import DB_CONNECTION_ERROR_MESSAGE
+from app.request_metrics import MetricasPeticionesMiddleware
 from app.routes.auth import router as auth_router
 from app.routes.bancos import router as bancos_router
 from app.routes.clientes import router as clientes_router
@@ -15,6 +16,8 @@ from app.routes.empleados import router as empleados_router
 from app.routes.factura import router as factura_router
 from app.routes.horas_trab import router as horas_trab_router
 from app.routes.import_horas import router as import_horas_router
+from app.routes.import_jobs import router as import_jobs_router
+from app.routes.internal import router as internal_router, router_metricas
 from app.routes.proyectos import router as proyectos_router
 from app.routes.tarifas import router as tarifas_router
 
@@ -42,6 +45,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# El último añadido es el más externo: mide también CORS
+app.add_middleware(MetricasPeticionesMiddleware)
+
 
 @app.exception_handler(SQLAlchemyError)
 async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
@@ -58,8 +64,11 @@ app.include_router(bancos_router)
 app.include_router(proyectos_router)
 app.include_router(horas_trab_router)
 app.include_router(import_horas_router)
+app.include_router(import_jobs_router)
 app.include_router(factura_router)
 app.include_router(tarifas_router)
+app.include_router(internal_router)
+app.include_router(router_metricas)
 
 
 @app.get("/health", tags=["Estado del Servidor"])
@@ -7,7 +7,7 @@ Gestiona la información relativa a la facturación emitida a clientes,
 incluyendo datos fiscales, importes y referencias al cliente asociado.
 """
 
-from sqlalchemy import Column, String, Date, Text, ForeignKey, Numeric
+from sqlalchemy import Column, String, Date, Text, ForeignKey, Index, Numeric
 from app.database import Base
 
 
@@ -19,6 +19,10 @@ class Factura(Base):
     """
 
     __tablename__ = "FACTURAS"
+    __table_args__ = (
+        # Control de duplicados cliente + mes (rango sobre FEC_FACTURA)
+        Index("ix_FACTURAS_CLIENTE_FECHA", "ID_CLIENTE", "FEC_FACTURA"),
+    )
 
     # Identificador de la sociedad emisora
     id_sociedad = Column(
@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Date, Float, String
+from sqlalchemy import Column, Date, Float, Index, String
 
 from app.database import Base
 
 
 class HorasTrab(Base):
     __tablename__ = "HORAS_TRAB"
+    __table_args__ = (
+        # Filtros por periodo (FECHA >= inicio AND FECHA < fin) de facturación y horas
+        Index("ix_HORAS_TRAB_CLIENTE_FECHA", "ID_CLIENTE", "FECHA"),
+        Index("ix_HORAS_TRAB_PROYECTO_FECHA", "ID_PROYECTO", "FECHA"),
+        Index("ix_HORAS_TRAB_ESTADO", "ESTADO"),
+        # Paginación por clave de GET /api/horas (app/services/consulta_horas.py)
+        Index("ix_HORAS_TRAB_FECHA_EMP_PROY", "FECHA", "ID_EMPLEADO", "ID_PROYECTO"),
+    )
 
     id_empleado = Column("ID_EMPLEADO", String(20), primary_key=True)
     fecha = Column("FECHA", Date, primary_key=True)
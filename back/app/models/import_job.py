@@ -0,0 +1,109 @@
+"""
+Modelo ORM: ImportJob
+
+Representa la tabla IMPORT_JOBS en la base de datos.
+
+Cada registro es un trabajo de importación en segundo plano (previsualizar o
+confirmar un fichero de horas). El estado y el progreso se guardan en base de
+datos para que cualquier worker pueda responder a la consulta de progreso,
+aunque el trabajo se ejecute en otro proceso.
+"""
+
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
+
+from app.database import Base
+
+
+class ImportJob(Base):
+    """
+    Entidad ImportJob.
+
+    Almacena el estado, el progreso y el resultado de un trabajo de importación.
+    """
+
+    __tablename__ = "IMPORT_JOBS"
+
+    # Identificador del trabajo (UUID)
+    id_job = Column(
+        "ID_JOB",
+        String(36),
+        primary_key=True
+    )
+
+    # Tipo de trabajo: PREVIEW o CONFIRM
+    tipo = Column(
+        "TIPO",
+        String(20),
+        nullable=False
+    )
+
+    # Estado: PENDIENTE, EN_CURSO, COMPLETADO o ERROR
+    estado = Column(
+        "ESTADO",
+        String(20),
+        nullable=False,
+        index=True
+    )
+
+    # Filas procesadas hasta el momento
+    filas_procesadas = Column(
+        "FILAS_PROCESADAS",
+        Integer,
+        nullable=False,
+        default=0
+    )
+
+    # Filas totales estimadas (None si no se conocen)
+    filas_totales = Column(
+        "FILAS_TOTALES",
+        Integer,
+        nullable=True
+    )
+
+    # Errores de validación encontrados hasta el momento
+    errores = Column(
+        "ERRORES",
+        Integer,
+        nullable=False,
+        default=0
+    )
+
+    # Resultado final en JSON (mismo formato que el endpoint síncrono)
+    resultado = Column(
+        "RESULTADO",
+        Text().with_variant(MEDIUMTEXT(), "mysql"),
+        nullable=True
+    )
+
+    # Mensaje de error si el trabajo falla
+    mensaje_error = Column(
+        "MENSAJE_ERROR",
+        Text,
+        nullable=True
+    )
+
+    # Fechas de creación, inicio, última actualización y fin
+    fec_creacion = Column(
+        "FEC_CREACION",
+        DateTime,
+        nullable=False
+    )
+
+    fec_inicio = Column(
+        "FEC_INICIO",
+        DateTime,
+        nullable=True
+    )
+
+    fec_actualizacion = Column(
+        "FEC_ACTUALIZACION",
+        DateTime,
+        nullable=True
+    )
+
+    fec_fin = Column(
+        "FEC_FIN",
+        DateTime,
+        nullable=True
+    )
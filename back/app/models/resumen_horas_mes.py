@@ -0,0 +1,105 @@
+"""
+Modelo ORM: ResumenHorasMes
+
+Representa la tabla RESUMEN_HORAS_MES en la base de datos.
+
+Totales mensuales de HORAS_TRAB por sociedad, cliente, proyecto y empleado,
+con el reparto entre horas pendientes y facturadas. Se mantiene desde las
+rutas que escriben en HORAS_TRAB (app/services/resumen_horas.py), de modo que
+la facturación no tiene que agregar las filas diarias en cada consulta.
+"""
+
+from sqlalchemy import Column, Date, DateTime, Integer, Numeric, SmallInteger, String
+
+from app.database import Base
+
+
+class ResumenHorasMes(Base):
+    """
+    Entidad ResumenHorasMes.
+
+    Una fila por (año, mes, sociedad, cliente, proyecto, empleado).
+    """
+
+    __tablename__ = "RESUMEN_HORAS_MES"
+
+    # Periodo (primero en la clave: las consultas filtran siempre por mes)
+    anio = Column(
+        "ANIO",
+        SmallInteger,
+        primary_key=True
+    )
+
+    mes = Column(
+        "MES",
+        SmallInteger,
+        primary_key=True
+    )
+
+    # Sociedad y cliente tal como figuran en HORAS_TRAB ('' si vienen vacíos)
+    id_sociedad = Column(
+        "ID_SOCIEDAD",
+        String(10),
+        primary_key=True
+    )
+
+    id_cliente = Column(
+        "ID_CLIENTE",
+        String(50),
+        primary_key=True
+    )
+
+    id_proyecto = Column(
+        "ID_PROYECTO",
+        String(50),
+        primary_key=True
+    )
+
+    id_empleado = Column(
+        "ID_EMPLEADO",
+        String(20),
+        primary_key=True
+    )
+
+    # Suma de HORAS_DIA: total y reparto por estado
+    horas_total = Column(
+        "HORAS_TOTAL",
+        Numeric(12, 4),
+        nullable=False,
+        default=0
+    )
+
+    horas_pendientes = Column(
+        "HORAS_PENDIENTES",
+        Numeric(12, 4),
+        nullable=False,
+        default=0
+    )
+
+    horas_facturadas = Column(
+        "HORAS_FACTURADAS",
+        Numeric(12, 4),
+        nullable=False,
+        default=0
+    )
+
+    # Nº de fichajes diarios y primer día con horas del mes
+    num_registros = Column(
+        "NUM_REGISTROS",
+        Integer,
+        nullable=False,
+        default=0
+    )
+
+    primera_fecha = Column(
+        "PRIMERA_FECHA",
+        Date,
+        nullable=True
+    )
+
+    # Última actualización de la fila
+    fec_actualizacion = Column(
+        "FEC_ACTUALIZACION",
+        DateTime,
+        nullable=True
+    )
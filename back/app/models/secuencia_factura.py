@@ -0,0 +1,47 @@
+"""
+Modelo ORM: SecuenciaFactura
+
+Representa la tabla SECUENCIAS_FACTURA en la base de datos.
+
+Guarda el último número de factura usado por prefijo (p. ej. "QS2503").
+La serie es común a todas las sociedades, igual que NUM_FACTURA, que es la
+clave de FACTURAS. La reserva de números se hace incrementando esta fila
+dentro de la misma transacción que crea la factura, de modo que dos
+generaciones concurrentes nunca obtienen el mismo número.
+"""
+
+from sqlalchemy import Column, DateTime, Integer, String
+
+from app.database import Base
+
+
+class SecuenciaFactura(Base):
+    """
+    Entidad SecuenciaFactura.
+
+    Contador de numeración de facturas por prefijo.
+    """
+
+    __tablename__ = "SECUENCIAS_FACTURA"
+
+    # Prefijo del número de factura (serie + año + mes)
+    prefijo = Column(
+        "PREFIJO",
+        String(10),
+        primary_key=True
+    )
+
+    # Último número de secuencia asignado dentro del prefijo
+    ultimo_numero = Column(
+        "ULTIMO_NUMERO",
+        Integer,
+        nullable=False,
+        default=0
+    )
+
+    # Fecha de la última reserva
+    fec_actualizacion = Column(
+        "FEC_ACTUALIZACION",
+        DateTime,
+        nullable=True
+    )
@@ -0,0 +1,144 @@
+"""
+Métricas del pool de conexiones a MySQL.
+
+PoolInstrumentado es un QueuePool que mide cuánto espera cada petición para
+obtener una conexión (incluye abrir una conexión nueva si hace falta) y
+cuenta los checkouts y los timeouts por pool agotado. Junto con el estado
+actual del pool (conexiones en uso, libres y de overflow) se publica en
+GET /internal/metrics/pool (app/routes/internal.py).
+
+PoolAsyncInstrumentado hace lo mismo para el engine asíncrono
+(app/database.py, get_async_db), con sus propios contadores.
+
+Las métricas son del proceso: con varios workers, cada uno tiene su pool.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+# Límites superiores (ms) de los tramos del histograma de espera
+TRAMOS_ESPERA_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class MetricasPool:
+    """
+    Contadores acumulados desde el arranque del proceso (o el último reinicio).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.espera_total_ms = 0.0
+            self.espera_maxima_ms = 0.0
+            # Un tramo por límite + el de "más de 10 s"
+            self.tramos = [0] * (len(TRAMOS_ESPERA_MS) + 1)
+
+    def registrar_espera(self, milisegundos: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.espera_total_ms += milisegundos
+            self.espera_maxima_ms = max(self.espera_maxima_ms, milisegundos)
+            self.tramos[bisect_left(TRAMOS_ESPERA_MS, milisegundos)] += 1
+
+    def registrar_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def percentil(self, p: float) -> Optional[float]:
+        """
+        Percentil aproximado de la espera: límite superior del tramo que lo
+        contiene (None si cae en el último tramo, sin límite).
+        """
+        with self._lock:
+            total = sum(self.tramos)
+            if not total:
+                return 0.0
+            objetivo = p / 100 * total
+            acumulado = 0
+            for indice, cuenta in enumerate(self.tramos):
+                acumulado += cuenta
+                if acumulado >= objetivo:
+                    return float(TRAMOS_ESPERA_MS[indice]) if indice < len(TRAMOS_ESPERA_MS) else None
+        return None
+
+    def como_dict(self) -> Dict:
+        with self._lock:
+            tramos = {f"<={limite}ms": cuenta for limite, cuenta in zip(TRAMOS_ESPERA_MS, self.tramos)}
+            tramos[f">{TRAMOS_ESPERA_MS[-1]}ms"] = self.tramos[-1]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_media_ms": round(self.espera_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "espera_maxima_ms": round(self.espera_maxima_ms, 3),
+                "histograma_espera": tramos,
+            }
+
+
+# Una instancia por clase de pool, a nivel de módulo: dispose() y recreate()
+# crean un pool nuevo y los contadores deben sobrevivir.
+metricas = MetricasPool()
+metricas_async = MetricasPool()
+
+
+class _MedirEspera:
+    """
+    Registra la espera de cada checkout en el atributo de clase `metricas`.
+    """
+
+    metricas: MetricasPool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            self.metricas.registrar_timeout()
+            raise
+        self.metricas.registrar_espera((time.perf_counter() - inicio) * 1000)
+        return conexion
+
+
+class PoolInstrumentado(_MedirEspera, QueuePool):
+    metricas = metricas
+
+
+class PoolAsyncInstrumentado(_MedirEspera, AsyncAdaptedQueuePool):
+    metricas = metricas_async
+
+
+def estado_pool(engine) -> Dict:
+    """
+    Configuración, ocupación actual y métricas acumuladas del pool del engine
+    (síncrono, o el sync_engine de un AsyncEngine).
+    """
+    pool = getattr(engine, "sync_engine", engine).pool
+    contadores = getattr(pool, "metricas", metricas)
+    estado = {"clase": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        estado.update(
+            tamano=pool.size(),
+            max_overflow=pool._max_overflow,
+            timeout_s=pool.timeout(),
+            recycle_s=pool._recycle,
+            pre_ping=pool._pre_ping,
+            en_uso=pool.checkedout(),
+            libres=pool.checkedin(),
+            # overflow() es negativo mientras no se han abierto todas las conexiones base
+            overflow=max(pool.overflow(), 0),
+            conexiones_abiertas=pool.checkedin() + pool.checkedout(),
+        )
+    estado.update(contadores.como_dict())
+    estado["espera_p50_ms"] = contadores.percentil(50)
+    estado["espera_p99_ms"] = contadores.percentil(99)
+    return estado
@@ -0,0 +1,78 @@
+"""
+Plugin de pytest para los presupuestos de consultas (app/query_counter.py).
+
+Se registra en el conftest.py:
+
+    pytest_plugins = ["app.pytest_plugin"]
+
+- Fixture `consultas_bind`: engine (o sesión) sobre el que se cuenta. Por
+  defecto el de app/database.py; un conftest con base de pruebas la redefine.
+
+- Fixture `contador_consultas`: sin marca es contar_consultas ligado a
+  consultas_bind.
+
+      def test_listado(client, contador_consultas):
+          with contador_consultas(maximo=2):
+              client.get("/api/clientes")
+
+- Marca presupuesto_consultas: el test que pide contador_consultas cuenta las
+  sentencias de su cuerpo (no las de las fixtures) y falla en la fase de
+  ejecución, como un assert, si supera el máximo o hay un posible N+1.
+
+      @pytest.mark.presupuesto_consultas(5, umbral_n1=3)
+      def test_preview(client, contador_consultas):
+          client.post("/api/factura/preview", json=...)
+"""
+
+import pytest
+
+from app.query_counter import UMBRAL_N1, RegistroConsultas, contar_consultas, registrar_consultas
+
+
+# (bind, registro, maximo, umbral_n1) del test con presupuesto_consultas
+_PRESUPUESTO = pytest.StashKey[tuple]()
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "presupuesto_consultas(maximo, umbral_n1=None): máximo de sentencias SQL del test "
+        "y repeticiones de una misma forma que cuentan como N+1",
+    )
+
+
+@pytest.fixture
+def consultas_bind():
+    """
+    Engine (o sesión) sobre el que cuenta contador_consultas.
+    """
+    return None
+
+
+@pytest.fixture
+def contador_consultas(request, consultas_bind):
+    marca = request.node.get_closest_marker("presupuesto_consultas")
+    if marca is None:
+        def _contar(maximo=None, umbral_n1=None, bind=None):
+            return contar_consultas(bind if bind is not None else consultas_bind, maximo, umbral_n1)
+        return _contar
+
+    maximo = marca.args[0] if marca.args else marca.kwargs.get("maximo")
+    umbral_n1 = marca.kwargs.get("umbral_n1", UMBRAL_N1)
+    registro = RegistroConsultas()
+    # pytest_runtest_call cuenta y comprueba alrededor del cuerpo del test
+    request.node.stash[_PRESUPUESTO] = (consultas_bind, registro, maximo, umbral_n1)
+    return registro
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    presupuesto = item.stash.get(_PRESUPUESTO, None)
+    if presupuesto is None:
+        return (yield)
+
+    bind, registro, maximo, umbral_n1 = presupuesto
+    with registrar_consultas(bind, registro):
+        resultado = yield
+    registro.comprobar(maximo, umbral_n1, contexto=item.nodeid)
+    return resultado
@@ -0,0 +1,186 @@
+"""
+Recuento de sentencias SQL: detector de N+1 y presupuestos de consultas.
+
+Una sentencia que se repite con la misma forma (el mismo SQL con distintos
+parámetros) dentro de una petición suele ser un N+1: una consulta por fila
+en vez de una para todas. forma_sentencia() normaliza el SQL (parámetros,
+literales y listas IN (...) de cualquier longitud) para agruparlas.
+
+Se usa de tres maneras:
+
+- contar_consultas(): context manager sobre el engine de app/database.py
+  (o el engine / sesión que se le pase). Al salir del bloque falla con
+  ConsultasExcedidas si se supera `maximo` o si alguna forma se repite
+  `umbral_n1` veces o más.
+
+      with contar_consultas(db, maximo=5) as consultas:
+          _preview_calculo(2025, 3, "CLI001", db)
+      print(consultas.informe())
+
+- Fixture de pytest `contador_consultas` y marca presupuesto_consultas,
+  del plugin app/pytest_plugin.py (pytest_plugins = ["app.pytest_plugin"]
+  en el conftest.py).
+
+- En cada petición HTTP (app/request_metrics.py): si una forma se repite
+  QUERY_N1_THRESHOLD veces o la ruta supera su presupuesto en PRESUPUESTOS,
+  se escribe un aviso en el log y se cuenta en /metrics.
+
+Configuración (.env):
+    QUERY_N1_THRESHOLD  repeticiones de una misma forma que cuentan como N+1 (por defecto 10)
+"""
+
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+
+
+UMBRAL_N1 = int(os.getenv("QUERY_N1_THRESHOLD", "10"))
+
+# Máximo de sentencias por petición, por "MÉTODO /plantilla/de/ruta". Debe
+# cumplirse sea cual sea el volumen de datos (nº de empleados, facturas...).
+# generar-lote no tiene: hace un SAVEPOINT por cliente.
+PRESUPUESTOS: Dict[str, int] = {
+    "POST /api/factura/preview": 5,
+    "POST /api/factura/generar": 15,
+    "GET /api/factura/pdf/{num_factura}": 5,
+    "GET /api/facturas/pdf-bundle": 5,
+}
+
+
+class ConsultasExcedidas(AssertionError):
+    pass
+
+
+# ============================================================
+# FORMA DE UNA SENTENCIA
+# ============================================================
+
+_PARAMETRO = re.compile(r"%\(\w+\)s|%s|\?|(?<![:\w]):\w+")
+_CADENA = re.compile(r"'(?:[^']|'')*'")
+_NUMERO = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def forma_sentencia(sql: str) -> str:
+    """
+    SQL sin valores: parámetros y literales pasan a ?, y las listas
+    (?, ?, ...) a (?).
+    """
+    forma = _CADENA.sub("?", sql)
+    forma = _PARAMETRO.sub("?", forma)
+    forma = _NUMERO.sub("?", forma)
+    forma = _LISTA.sub("(?)", forma)
+    return _ESPACIOS.sub(" ", forma).strip()
+
+
+# ============================================================
+# REGISTRO
+# ============================================================
+
+class RegistroConsultas:
+    """
+    Sentencias ejecutadas (texto tal como llega al cursor) y cuántas veces.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self._sentencias: Counter = Counter()
+
+    def anotar(self, sql: str) -> None:
+        self.total += 1
+        self._sentencias[sql] += 1
+
+    def formas(self) -> Counter:
+        # Se normaliza al consultar, una vez por texto distinto
+        formas: Counter = Counter()
+        for sql, veces in self._sentencias.items():
+            formas[forma_sentencia(sql)] += veces
+        return formas
+
+    def repetidas(self, umbral: int = UMBRAL_N1) -> List[Tuple[str, int]]:
+        """
+        Formas ejecutadas `umbral` veces o más, de más a menos repetida.
+        """
+        if self.total < umbral:
+            return []
+        return [(forma, veces) for forma, veces in self.formas().most_common() if veces >= umbral]
+
+    def informe(self, limite: int = 10) -> str:
+        lineas = [f"{self.total} sentencia(s)"]
+        for forma, veces in self.formas().most_common(limite):
+            lineas.append(f"  {veces:>4} x {forma[:200]}")
+        return "\n".join(lineas)
+
+    def comprobar(self, maximo: Optional[int] = None, umbral_n1: Optional[int] = None, contexto: str = "") -> None:
+        prefijo = f"{contexto}: " if contexto else ""
+        if maximo is not None and self.total > maximo:
+            raise ConsultasExcedidas(f"{prefijo}{self.total} sentencias, presupuesto {maximo}\n{self.informe()}")
+        if umbral_n1 is not None:
+            repetidas = self.repetidas(umbral_n1)
+            if repetidas:
+                forma, veces = repetidas[0]
+                raise ConsultasExcedidas(f"{prefijo}posible N+1, {veces} x {forma[:200]}\n{self.informe()}")
+
+
+def avisos_peticion(metodo: str, ruta: str, registro: RegistroConsultas) -> List[Tuple[str, str]]:
+    """
+    [(tipo, detalle)] de una petición: "n_mas_1" por cada forma repetida
+    UMBRAL_N1 veces o más y "presupuesto" si supera el de la ruta.
+    """
+    avisos = [("n_mas_1", f"{veces} x {forma[:200]}") for forma, veces in registro.repetidas(UMBRAL_N1)]
+    maximo = PRESUPUESTOS.get(f"{metodo} {ruta}")
+    if maximo is not None and registro.total > maximo:
+        avisos.append(("presupuesto", f"{registro.total} sentencias, presupuesto {maximo}"))
+    return avisos
+
+
+# ============================================================
+# CONTEXT MANAGER
+# ============================================================
+
+def _engine(bind):
+    if bind is None:
+        from app.database import engine
+        return engine
+    if hasattr(bind, "get_bind"):
+        bind = bind.get_bind()
+    # AsyncEngine → su engine síncrono; Connection → su engine
+    bind = getattr(bind, "sync_engine", bind)
+    return getattr(bind, "engine", bind)
+
+
+@contextmanager
+def registrar_consultas(bind, registro: RegistroConsultas) -> Iterator[RegistroConsultas]:
+    """
+    Anota en `registro` las sentencias ejecutadas en el bloque sobre `bind`,
+    sin comprobar límites.
+    """
+    engine = _engine(bind)
+
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        registro.anotar(statement)
+
+    event.listen(engine, "before_cursor_execute", _antes)
+    try:
+        yield registro
+    finally:
+        event.remove(engine, "before_cursor_execute", _antes)
+
+
+@contextmanager
+def contar_consultas(bind=None, maximo: Optional[int] = None,
+                     umbral_n1: Optional[int] = None) -> Iterator[RegistroConsultas]:
+    """
+    Registra las sentencias ejecutadas en el bloque sobre `bind` (Engine,
+    AsyncEngine, Connection o Session; por defecto el engine de
+    app/database.py). Al salir sin excepción comprueba `maximo` y
+    `umbral_n1`.
+    """
+    with registrar_consultas(bind, RegistroConsultas()) as registro:
+        yield registro
+    registro.comprobar(maximo, umbral_n1)
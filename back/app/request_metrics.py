@@ -0,0 +1,280 @@
+"""
+Métricas de rendimiento por petición.
+
+MetricasPeticionesMiddleware (middleware ASGI, registrado en app/main.py)
+mide cada petición HTTP y la acumula por método y ruta (la plantilla de la
+ruta, p. ej. /api/factura/pdf/{num_factura}, no la URL):
+
+- latencia, desde que llega la petición hasta el último byte de la respuesta
+- nº de sentencias SQL y tiempo total en la base de datos, con los eventos
+  before_cursor_execute / after_cursor_execute de SQLAlchemy sobre todos
+  los engines (también el de get_async_db)
+- tamaño de la respuesta
+- nº de respuestas por código de estado
+
+Se publican en formato Prometheus en GET /metrics (app/routes/internal.py),
+como histogramas, y cada respuesta lleva una cabecera Server-Timing con
+las sentencias y el tiempo de BBDD hasta ese momento:
+
+    Server-Timing: db;dur=12.4;desc="3 consultas", app;dur=48.0
+
+Un N+1 se ve directamente en las herramientas de desarrollo del navegador.
+Además, si una misma forma de sentencia se repite o la ruta supera su
+presupuesto de consultas (app/query_counter.py), se escribe un aviso en el
+log y se cuenta en http_request_query_warnings_total.
+
+Las sentencias de tareas en segundo plano (BackgroundTasks), que se
+ejecutan después de enviar la respuesta, no se cuentan.
+
+Las métricas son del proceso: con varios workers, cada uno tiene las suyas
+y Prometheus debe consultar cada worker.
+
+Configuración (.env):
+    REQUEST_METRICS  true (por defecto) activa las métricas y Server-Timing
+"""
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.query_counter import RegistroConsultas, avisos_peticion
+
+
+ACTIVO = os.getenv("REQUEST_METRICS", "true").strip().lower() == "true"
+
+# Límites superiores de los tramos de cada histograma
+TRAMOS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TRAMOS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+TRAMOS_BYTES = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Peticiones que no coinciden con ninguna ruta (404): una sola serie
+SIN_RUTA = "sin_ruta"
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# CONTADORES DE LA PETICIÓN EN CURSO
+# ============================================================
+
+class _Peticion:
+    """
+    Sentencias y tiempo de BBDD de una petición. Los endpoints síncronos
+    corren en otro hilo con una copia del contexto, que apunta al mismo
+    objeto, así que lo que cuentan se ve desde el middleware.
+    """
+
+    __slots__ = ("inicio", "registro", "db_segundos", "cerrada")
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.registro = RegistroConsultas()
+        self.db_segundos = 0.0
+        self.cerrada = False
+
+
+_peticion_actual: ContextVar[Optional[_Peticion]] = ContextVar("peticion_actual", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    peticion = _peticion_actual.get()
+    if peticion is not None and not peticion.cerrada:
+        # Una conexión ejecuta una sentencia cada vez
+        conn.info["metricas_inicio"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info.pop("metricas_inicio", None)
+    peticion = _peticion_actual.get()
+    if inicio is not None and peticion is not None and not peticion.cerrada:
+        peticion.registro.anotar(statement)
+        peticion.db_segundos += time.perf_counter() - inicio
+
+
+# ============================================================
+# HISTOGRAMAS
+# ============================================================
+
+class _Histograma:
+    def __init__(self, tramos: Tuple[float, ...]):
+        self.tramos = tramos
+        # Un tramo por límite + el de "+Inf"
+        self.cuentas = [0] * (len(tramos) + 1)
+        self.suma = 0.0
+
+    def observar(self, valor: float) -> None:
+        self.cuentas[bisect_left(self.tramos, valor)] += 1
+        self.suma += valor
+
+
+class _MetricasRuta:
+    def __init__(self):
+        self.latencia = _Histograma(TRAMOS_SEGUNDOS)
+        self.consultas = _Histograma(TRAMOS_CONSULTAS)
+        self.db = _Histograma(TRAMOS_SEGUNDOS)
+        self.bytes = _Histograma(TRAMOS_BYTES)
+        self.estados: Dict[int, int] = {}
+
+
+class MetricasPeticiones:
+    """
+    Histogramas por (método, ruta), acumulados desde el arranque del proceso
+    (o el último reinicio).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._rutas: Dict[Tuple[str, str], _MetricasRuta] = {}
+            self._avisos: Dict[Tuple[str, str, str], int] = {}
+
+    def registrar(self, metodo: str, ruta: str, estado: int, segundos: float, consultas: int,
+                  db_segundos: float, bytes_respuesta: int) -> None:
+        with self._lock:
+            metricas_ruta = self._rutas.get((metodo, ruta))
+            if metricas_ruta is None:
+                metricas_ruta = self._rutas[(metodo, ruta)] = _MetricasRuta()
+            metricas_ruta.latencia.observar(segundos)
+            metricas_ruta.consultas.observar(consultas)
+            metricas_ruta.db.observar(db_segundos)
+            metricas_ruta.bytes.observar(bytes_respuesta)
+            metricas_ruta.estados[estado] = metricas_ruta.estados.get(estado, 0) + 1
+
+    def registrar_aviso(self, metodo: str, ruta: str, tipo: str) -> None:
+        with self._lock:
+            self._avisos[(metodo, ruta, tipo)] = self._avisos.get((metodo, ruta, tipo), 0) + 1
+
+    def prometheus(self) -> str:
+        """
+        Texto en el formato de exposición de Prometheus (text/plain 0.0.4).
+        """
+        with self._lock:
+            rutas = sorted(self._rutas.items())
+            lineas: List[str] = [
+                "# HELP http_requests_total Peticiones HTTP atendidas.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (metodo, ruta), metricas_ruta in rutas:
+                for estado, cuenta in sorted(metricas_ruta.estados.items()):
+                    lineas.append(f"http_requests_total{{{_etiquetas(metodo, ruta)},status=\"{estado}\"}} {cuenta}")
+
+            lineas.append("# HELP http_request_query_warnings_total Peticiones con posible N+1 o fuera de presupuesto.")
+            lineas.append("# TYPE http_request_query_warnings_total counter")
+            for (metodo, ruta, tipo), cuenta in sorted(self._avisos.items()):
+                lineas.append(f"http_request_query_warnings_total{{{_etiquetas(metodo, ruta)},type=\"{tipo}\"}} {cuenta}")
+
+            for nombre, ayuda, atributo in (
+                ("http_request_duration_seconds", "Latencia de la petición, hasta el último byte.", "latencia"),
+                ("http_request_db_statements", "Sentencias SQL por petición.", "consultas"),
+                ("http_request_db_seconds", "Tiempo en la base de datos por petición.", "db"),
+                ("http_response_size_bytes", "Tamaño del cuerpo de la respuesta.", "bytes"),
+            ):
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} histogram")
+                for (metodo, ruta), metricas_ruta in rutas:
+                    lineas.extend(_histograma(nombre, _etiquetas(metodo, ruta), getattr(metricas_ruta, atributo)))
+        return "\n".join(lineas) + "\n"
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(metodo: str, ruta: str) -> str:
+    return f'method="{_escapar(metodo)}",route="{_escapar(ruta)}"'
+
+
+def _histograma(nombre: str, etiquetas: str, histograma: _Histograma) -> List[str]:
+    lineas = []
+    acumulado = 0
+    for limite, cuenta in zip(histograma.tramos, histograma.cuentas):
+        acumulado += cuenta
+        lineas.append(f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+    acumulado += histograma.cuentas[-1]
+    lineas.append(f'{nombre}_bucket{{{etiquetas},le="+Inf"}} {acumulado}')
+    lineas.append(f"{nombre}_sum{{{etiquetas}}} {histograma.suma:.6f}")
+    lineas.append(f"{nombre}_count{{{etiquetas}}} {acumulado}")
+    return lineas
+
+
+metricas_peticiones = MetricasPeticiones()
+
+
+# ============================================================
+# MIDDLEWARE
+# ============================================================
+
+class MetricasPeticionesMiddleware:
+    """
+    Middleware ASGI puro (no BaseHTTPMiddleware): no bufferiza el cuerpo,
+    así que no afecta a las respuestas en streaming.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ACTIVO:
+            await self.app(scope, receive, send)
+            return
+
+        peticion = _Peticion()
+        token = _peticion_actual.set(peticion)
+        estado = 500
+        enviados = 0
+
+        def _terminar():
+            if peticion.cerrada:
+                return
+            peticion.cerrada = True
+            metodo = scope["method"]
+            ruta = getattr(scope.get("route"), "path", None) or SIN_RUTA
+            metricas_peticiones.registrar(
+                metodo,
+                ruta,
+                estado,
+                time.perf_counter() - peticion.inicio,
+                peticion.registro.total,
+                peticion.db_segundos,
+                enviados,
+            )
+            for tipo, detalle in avisos_peticion(metodo, ruta, peticion.registro):
+                metricas_peticiones.registrar_aviso(metodo, ruta, tipo)
+                logger.warning("%s %s: %s (%s)", metodo, ruta, detalle, tipo)
+
+        async def _enviar(mensaje):
+            nonlocal estado, enviados
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+                app_ms = (time.perf_counter() - peticion.inicio) * 1000
+                cabecera = (
+                    f'db;dur={peticion.db_segundos * 1000:.1f};desc="{peticion.registro.total} consultas", '
+                    f"app;dur={app_ms:.1f}"
+                )
+                mensaje["headers"] = [*mensaje.get("headers", []), (b"server-timing", cabecera.encode("latin-1"))]
+            elif mensaje["type"] == "http.response.body":
+                enviados += len(mensaje.get("body", b""))
+                await send(mensaje)
+                if not mensaje.get("more_body", False):
+                    _terminar()
+                return
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, _enviar)
+        finally:
+            # Sin respuesta completa (excepción o cliente desconectado)
+            _terminar()
+            _peticion_actual.reset(token)
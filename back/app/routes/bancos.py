@@ -15,23 +15,27 @@ Notas de diseño:
 
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models.banco import Banco
 from app.schemas.banco import BancoCreate, BancoUpdate, BancoOut
+from app.services.cache_listados import BANCOS, invalidar as invalidar_listados, listado_cacheado
 
 router = APIRouter(prefix="/api/bancos", tags=["Bancos"])
 
 
 @router.get("/", response_model=List[BancoOut])
-def listar_bancos(db: Session = Depends(get_db)):
+async def listar_bancos(request: Request, db=Depends(get_async_db)):
     """
-    Devuelve todas las cuentas bancarias registradas.
+    Devuelve todas las cuentas bancarias registradas (desde la caché de listados).
     """
-    return db.execute(select(Banco)).scalars().all()
+    async def cargar():
+        return (await db.execute(select(Banco))).scalars().all()
+
+    return await listado_cacheado(request, BANCOS, cargar, List[BancoOut])
 
 
 @router.post("/", response_model=BancoOut, status_code=status.HTTP_201_CREATED)
@@ -75,6 +79,7 @@ def crear_banco(payload: BancoCreate, db: Session = Depends(get_db)):
     db.add(nuevo)
     db.commit()
     db.refresh(nuevo)
+    invalidar_listados(BANCOS)
 
     return nuevo
 
@@ -108,6 +113,7 @@ def editar_banco(id_banco_cobro: str, payload: BancoUpdate, db: Session = Depend
 
     db.commit()
     db.refresh(banco)
+    invalidar_listados(BANCOS)
     return banco
 
 @router.patch("/{id_banco_cobro}/archivar")
@@ -126,4 +132,5 @@ def archivar_banco(id_banco_cobro: str, db: Session = Depends(get_db)):
 
     db.delete(banco)
     db.commit()
+    invalidar_listados(BANCOS)
     return {"mensaje": "Cuenta bancaria archivada (eliminada) correctamente"}
\ No newline at end of file
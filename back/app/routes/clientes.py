@@ -4,21 +4,26 @@
 
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models.cliente import Cliente
 from app.schemas.cliente import ClienteCreate, ClienteUpdate, ClienteOut
+from app.services.cache_listados import CLIENTES, invalidar as invalidar_listados, listado_cacheado
 
 router = APIRouter(prefix="/api/clientes", tags=["Clientes"])
 
 # Obtiene y devuelve la lista completa de clientes desde la base de datos
 # usando SQLAlchemy (SELECT * FROM CLIENTES) y la mapea al schema ClienteOut.
+# Se sirve desde la caché de listados (ETag / 304); solo consulta la BBDD en un fallo.
 @router.get("/", response_model=List[ClienteOut])
-def listar_clientes(db: Session = Depends(get_db)):
-    return db.execute(select(Cliente)).scalars().all()
+async def listar_clientes(request: Request, db=Depends(get_async_db)):
+    async def cargar():
+        return (await db.execute(select(Cliente))).scalars().all()
+
+    return await listado_cacheado(request, CLIENTES, cargar, List[ClienteOut])
 
 # -------------------------- CREA un nuevo CLIENTE --------------------------
 # 1) Comprueba que no exista ya otro registro con el mismo ID_CLIENTE (PK).
@@ -59,6 +64,7 @@ def crear_cliente(payload: ClienteCreate, db: Session = Depends(get_db)):
     db.add(nuevo)
     db.commit()
     db.refresh(nuevo)
+    invalidar_listados(CLIENTES)
     return nuevo
 
 # -------------------------- EDITA los datos de un CLIENTE existente --------------------------
@@ -103,6 +109,7 @@ def editar_cliente(id_cliente: str, payload: ClienteUpdate, db: Session = Depend
 
     db.commit()
     db.refresh(cliente)
+    invalidar_listados(CLIENTES)
     return cliente
 
 
@@ -127,4 +134,5 @@ def archivar_cliente(id_cliente: str, db: Session = Depends(get_db)):
 
     db.delete(cliente)
     db.commit()
+    invalidar_listados(CLIENTES)
     return {"mensaje": "Cliente archivado (eliminado) correctamente"}
\ No newline at end of file
@@ -14,23 +14,27 @@ Notas:
 
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models.empleado import Empleado
 from app.schemas.empleados import EmpleadoCreate, EmpleadoUpdate, EmpleadoOut
+from app.services.cache_listados import EMPLEADOS, invalidar as invalidar_listados, listado_cacheado
 
 router = APIRouter(prefix="/api/empleados", tags=["Empleados"])
 
 
 @router.get("/", response_model=List[EmpleadoOut])
-def listar_empleados(db: Session = Depends(get_db)):
+async def listar_empleados(request: Request, db=Depends(get_async_db)):
     """
-    Devuelve todos los empleados registrados.
+    Devuelve todos los empleados registrados (desde la caché de listados).
     """
-    return db.execute(select(Empleado)).scalars().all()
+    async def cargar():
+        return (await db.execute(select(Empleado))).scalars().all()
+
+    return await listado_cacheado(request, EMPLEADOS, cargar, List[EmpleadoOut])
 
 @router.post("/", response_model=EmpleadoOut, status_code=status.HTTP_201_CREATED)
 def crear_empleado(payload: EmpleadoCreate, db: Session = Depends(get_db)):
@@ -56,6 +60,7 @@ def crear_empleado(payload: EmpleadoCreate, db: Session = Depends(get_db)):
     db.add(nuevo)
     db.commit()
     db.refresh(nuevo)
+    invalidar_listados(EMPLEADOS)
     return nuevo
 
 @router.put("/{id_empleado}", response_model=EmpleadoOut)
@@ -81,6 +86,7 @@ def editar_empleado(id_empleado: str, payload: EmpleadoUpdate, db: Session = Dep
 
     db.commit()
     db.refresh(emp)
+    invalidar_listados(EMPLEADOS)
     return emp
 
 @router.patch("/{id_empleado}/archivar")
@@ -93,4 +99,5 @@ def archivar_empleado(id_empleado: str, db: Session = Depends(get_db)):
 
     db.delete(emp)
     db.commit()
+    invalidar_listados(EMPLEADOS)
     return {"mensaje": "Empleado archivado (eliminado) correctamente"}
\ No newline at end of file
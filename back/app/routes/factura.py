@@ -14,34 +14,41 @@ Se ha realizado la conexión con la Base de Datos
 
 Este módulo representa lógica de negocio pura.
 """
+import logging
 import os
-from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Body, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import extract
+from sqlalchemy import func, select
 from datetime import date
 
-# 🔧 CAMBIO PDF: IMPORTS AÑADIDOS (NO EXISTÍAN)
-from fastapi.responses import FileResponse
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+from fastapi.responses import FileResponse, StreamingResponse
 
 #Importa la clase factura de 'models'
 from app.models.factura import Factura
-from app.database import get_db
+from app.database import get_async_db, get_db
 
 #Importa modelos necesarios
 from app.models.empleado import Empleado
 from app.models.cliente import Cliente
-from app.models.hist_proyecto import HistProyecto
 from app.models.proyecto import Proyecto
 from app.models.horas_trab import HorasTrab
+from app.models.resumen_horas_mes import ResumenHorasMes
+from app.services.numeracion_facturas import prefijo_mes, reservar_numeros
+from app.services.almacen_pdf import PRERENDER, artefacto_factura, prerenderizar
+from app.services.cache_listados import CLIENTES, coincide_etag, listado_cacheado
+from app.services.paquete_pdf import BUNDLE_MAX, preparar_paquete
+from app.services.exportacion import TIPOS_CONTENIDO, exportar, nombre_fichero, validar_formato
+from app.services.periodos import filtro_mes, filtro_rango, rango_fechas
+from app.services.resumen_horas import aplicar_facturacion
+from app.services.tarifas_timeline import tarifa_vigente, tarifas_vigentes
 
 from calendar import monthrange
+from typing import List, Optional
+
 from pydantic import BaseModel
 
-from app.models.banco import Banco
+logger = logging.getLogger(__name__)
 
 #ROUTER:
 router = APIRouter(
@@ -49,22 +56,92 @@ router = APIRouter(
     tags=["Facturas"]
 )
 
+def _serializar_factura(f) -> dict:
+    return {
+        "id_sociedad": f.id_sociedad,
+        "id_cliente": f.id_cliente,
+        "num_factura": f.num_factura,
+        "fec_factura": f.fec_factura.isoformat(),
+        "concepto": f.concepto,
+        "base_imponible": float(f.base_imponible),
+        "total": float(f.total)
+    }
+
+
+CAMPOS_FACTURA = ["id_sociedad", "id_cliente", "num_factura", "fec_factura", "concepto", "base_imponible", "total"]
+
+
 #(GET/facturas) LISTAR FACTURAS
 @router.get("/facturas")
-def listar_facturas(db: Session = Depends(get_db)):
-    facturas = db.query(Factura).all()
-    return [
-        {
-            "id_sociedad": f.id_sociedad,
-            "id_cliente": f.id_cliente,
-            "num_factura": f.num_factura,
-            "fec_factura": f.fec_factura.isoformat(),
-            "concepto": f.concepto,
-            "base_imponible": float(f.base_imponible),
-            "total": float(f.total)
-        }
-        for f in facturas
-    ]
+async def listar_facturas(db=Depends(get_async_db)):
+    facturas = (await db.execute(select(Factura))).scalars().all()
+    return [_serializar_factura(f) for f in facturas]
+
+
+#(GET/facturas/export) EXPORTAR FACTURAS EN STREAMING (NDJSON, CSV o XLSX)
+@router.get("/facturas/export")
+def exportar_facturas(
+    formato: str = "ndjson",
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    id_cliente: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    try:
+        formato = validar_formato(formato)
+        rango = rango_fechas(desde, hasta)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    consulta = select(*(getattr(Factura, campo).label(campo) for campo in CAMPOS_FACTURA))\
+        .where(filtro_rango(Factura.fec_factura, rango))\
+        .order_by(Factura.fec_factura, Factura.num_factura)
+    if id_cliente:
+        consulta = consulta.where(Factura.id_cliente == id_cliente)
+
+    return StreamingResponse(
+        exportar(db.get_bind(), consulta, CAMPOS_FACTURA, _serializar_factura, formato),
+        media_type=TIPOS_CONTENIDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre_fichero("facturas", formato)}"'},
+    )
+
+
+#(GET/facturas/pdf-bundle) PDF DE VARIAS FACTURAS EN UN ZIP (STREAMING)
+# Los PDF que faltan en el almacén se generan en un pool de procesos y se
+# añaden al ZIP según terminan; resumen.json (al final) incluye PDF/segundo.
+@router.get("/facturas/pdf-bundle")
+def paquete_pdf_facturas(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    cliente: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    try:
+        rango = rango_fechas(desde, hasta)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    consulta = db.query(Factura).filter(filtro_rango(Factura.fec_factura, rango))
+    if cliente:
+        consulta = consulta.filter(Factura.id_cliente == cliente)
+    facturas = consulta.order_by(Factura.fec_factura, Factura.num_factura).limit(BUNDLE_MAX + 1).all()
+
+    if not facturas:
+        raise HTTPException(status_code=404, detail="No hay facturas en ese periodo")
+    if len(facturas) > BUNDLE_MAX:
+        raise HTTPException(status_code=400, detail=f"Máximo {BUNDLE_MAX} facturas por paquete: acota las fechas")
+
+    # Toda la lectura de la BBDD se hace aquí, antes de empezar el streaming
+    paquete = preparar_paquete(db, facturas)
+
+    return StreamingResponse(
+        paquete.generar(),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{nombre_fichero("facturas_pdf", "zip")}"',
+            "X-Facturas": str(paquete.total),
+        },
+    )
 
 
 #Consigue el empleado por su ID (Utiliza Empleado)
@@ -79,80 +156,91 @@ def get_empleado_nombre(dni: str, db: Session) -> str:
     return f"{emp.nombre} {emp.apellidos}"
 
 
-#Consigue la tarifa para devolver precio/hora (Utiliza HistProyecto)
+#Consigue la tarifa para devolver precio/hora (índice en memoria de HistProyecto)
 def get_tarifa(id_empleado: str, id_proyecto: str, fecha: date, db: Session):
-    tarifa = db.query(HistProyecto).filter(
-        HistProyecto.id_empleado == id_empleado,
-        HistProyecto.id_proyecto == id_proyecto,
-        HistProyecto.fec_inicio <= fecha
-    ).order_by(HistProyecto.fec_inicio.desc()).first()
-
-    return float(tarifa.tarifa) if tarifa else None
-
-
-# MÉTODO QUE CALCULA LA FACTURA MENSUAL DE UN CLIENTE 
-def _preview_calculo(anio: int, mes: int, id_cliente: str, db: Session):
-    alertas = []
+    return tarifa_vigente(db, id_empleado, id_proyecto, fecha)
+
+
+# CONSULTA AGREGADA DE LA FACTURA MENSUAL
+# Una sola sentencia devuelve, por cliente + empleado + proyecto:
+# horas del mes y nombre del empleado. Las horas salen del resumen mensual
+# RESUMEN_HORAS_MES (app/services/resumen_horas.py), no de las filas diarias.
+# Las tarifas se resuelven aparte con el índice en memoria
+# (app/services/tarifas_timeline.py).
+# ids_cliente=None agrega todos los clientes (generación por lotes).
+def _consulta_agregada(anio: int, mes: int, ids_cliente: Optional[List[str]] = None):
+    horas_mes = (
+        select(
+            Proyecto.id_cliente.label("id_cliente"),
+            ResumenHorasMes.id_empleado.label("id_empleado"),
+            ResumenHorasMes.id_proyecto.label("id_proyecto"),
+            func.sum(ResumenHorasMes.horas_total).label("horas"),
+            func.min(ResumenHorasMes.primera_fecha).label("primera_fecha"),
+        )
+        .join(Proyecto, Proyecto.id_proyecto == ResumenHorasMes.id_proyecto)
+        .where(ResumenHorasMes.anio == anio, ResumenHorasMes.mes == mes)
+        .group_by(Proyecto.id_cliente, ResumenHorasMes.id_empleado, ResumenHorasMes.id_proyecto)
+    )
+    if ids_cliente is not None:
+        horas_mes = horas_mes.where(Proyecto.id_cliente.in_(ids_cliente))
+    horas_mes = horas_mes.subquery("horas_mes")
+
+    return (
+        select(
+            horas_mes.c.id_cliente,
+            horas_mes.c.id_empleado,
+            horas_mes.c.id_proyecto,
+            horas_mes.c.horas,
+            Empleado.nombre,
+            Empleado.apellidos,
+        )
+        .outerjoin(Empleado, Empleado.id_empleado == horas_mes.c.id_empleado)
+        .order_by(
+            horas_mes.c.id_cliente,
+            horas_mes.c.id_empleado,
+            horas_mes.c.primera_fecha,
+            horas_mes.c.id_proyecto,
+        )
+    )
 
-    # (1) Proyectos del cliente
-    proyectos = db.query(Proyecto.id_proyecto).filter(Proyecto.id_cliente == id_cliente).all()
-    proyectos_ids = [p.id_proyecto for p in proyectos]
-    if not proyectos_ids:
-        return {
-            "anio": anio,
-            "mes": mes,
-            "id_cliente": id_cliente,
-            "total_horas": 0,
-            "total_importe": 0,
-            "lineas": [],
-            "alertas": ["El cliente no tiene proyectos"]
-        }
 
-    # (2) Horas trabajadas del mes
-    horas = db.query(HorasTrab).filter(
-        HorasTrab.id_proyecto.in_(proyectos_ids),
-        extract("year", HorasTrab.fecha) == anio,
-        extract("month", HorasTrab.fecha) == mes
-    ).all()
-    if not horas:
-        return {
-            "anio": anio,
-            "mes": mes,
-            "id_cliente": id_cliente,
-            "total_horas": 0,
-            "total_importe": 0,
-            "lineas": [],
-            "alertas": ["No hay horas trabajadas en los proyectos del cliente"]
-        }
+def _preview_sin_horas(anio: int, mes: int, id_cliente: str, tiene_proyectos: bool):
+    alerta = (
+        "No hay horas trabajadas en los proyectos del cliente"
+        if tiene_proyectos
+        else "El cliente no tiene proyectos"
+    )
+    return {
+        "anio": anio,
+        "mes": mes,
+        "id_cliente": id_cliente,
+        "total_horas": 0,
+        "total_importe": 0,
+        "lineas": [],
+        "alertas": [alerta]
+    }
 
-    # (3) Agrupar por empleado + proyecto
-    agrupado = {}
-    for h in horas:
-        key = (h.id_empleado, h.id_proyecto)
-        if key not in agrupado:
-            agrupado[key] = 0
-        agrupado[key] += float(h.horas_dia)
 
+# Construye la previsualización de un cliente a partir de sus filas agregadas
+def _preview_desde_filas(anio: int, mes: int, id_cliente: str, agrupado, tarifas):
+    alertas = []
     lineas = []
     total_importe = 0
     total_horas = 0
 
-    # (4) Calcular subtotales y buscar tarifa
-    for (empleado, proyecto), horas_totales in agrupado.items():
-        ultimo_dia = monthrange(anio, mes)[1]
-        fecha = date(anio, mes, ultimo_dia)
-        tarifa = get_tarifa(empleado, proyecto, fecha, db)
+    for fila in agrupado:
+        empleado = fila.id_empleado
+        proyecto = fila.id_proyecto
+        horas_totales = float(fila.horas)
+        tarifa = tarifas[(empleado, proyecto)]
         if not tarifa:
-            # -------------------------
-            # CAMBIO 1: alerta con f-string
             alertas.append(f"Falta tarifa para {empleado} en proyecto {proyecto}.")
             continue
 
         subtotal = round(horas_totales * tarifa, 2)
 
-        # -------------------------
-        # CAMBIO 2: mostrar nombre completo del empleado
-        nombre_emp = get_empleado_nombre(empleado, db)
+        # Nombre completo del empleado (o el DNI si no existe en EMPLEADOS)
+        nombre_emp = f"{fila.nombre} {fila.apellidos}" if fila.nombre is not None else empleado
 
         lineas.append({
             "empleado_dni": empleado,
@@ -177,11 +265,66 @@ def _preview_calculo(anio: int, mes: int, id_cliente: str, db: Session):
     }
 
 
+# MÉTODO QUE CALCULA LA FACTURA MENSUAL DE UN CLIENTE
+# Resuelve horas y nombres con una única consulta agregada y las tarifas con
+# el índice en memoria (antes: todas las horas del mes + get_tarifa/get_empleado_nombre por línea).
+def _preview_calculo(anio: int, mes: int, id_cliente: str, db: Session):
+    # (1) Horas del mes agrupadas por empleado + proyecto, con nombre
+    ultimo_dia = monthrange(anio, mes)[1]
+    fecha = date(anio, mes, ultimo_dia)
+    agrupado = db.execute(_consulta_agregada(anio, mes, [id_cliente])).all()
+
+    if not agrupado:
+        # (2) Sin horas: distinguir si el cliente no tiene proyectos
+        tiene_proyectos = db.query(Proyecto.id_proyecto).filter(
+            Proyecto.id_cliente == id_cliente
+        ).first()
+        return _preview_sin_horas(anio, mes, id_cliente, bool(tiene_proyectos))
+
+    # (3) Tarifas vigentes el último día del mes
+    tarifas = tarifas_vigentes(db, [(fila.id_empleado, fila.id_proyecto) for fila in agrupado], fecha)
+
+    # (4) Calcular subtotales
+    return _preview_desde_filas(anio, mes, id_cliente, agrupado, tarifas)
+
+
+# PREVISUALIZACIÓN DE VARIOS CLIENTES (generación por lotes)
+# Misma lógica que _preview_calculo con una sola consulta agregada para todos.
+# Devuelve {id_cliente: preview}; con ids_cliente=None, solo los clientes con horas.
+def _previews_clientes(anio: int, mes: int, ids_cliente: Optional[List[str]], db: Session):
+    fecha = date(anio, mes, monthrange(anio, mes)[1])
+    agrupado = db.execute(_consulta_agregada(anio, mes, ids_cliente)).all()
+    tarifas = tarifas_vigentes(db, [(fila.id_empleado, fila.id_proyecto) for fila in agrupado], fecha)
+
+    por_cliente = {}
+    for fila in agrupado:
+        por_cliente.setdefault(fila.id_cliente, []).append(fila)
+
+    previews = {
+        id_cliente: _preview_desde_filas(anio, mes, id_cliente, filas, tarifas)
+        for id_cliente, filas in por_cliente.items()
+    }
+
+    sin_horas = [id_cliente for id_cliente in (ids_cliente or []) if id_cliente not in previews]
+    if sin_horas:
+        con_proyectos = {
+            fila.id_cliente
+            for fila in db.query(Proyecto.id_cliente).filter(Proyecto.id_cliente.in_(sin_horas)).distinct()
+        }
+        for id_cliente in sin_horas:
+            previews[id_cliente] = _preview_sin_horas(anio, mes, id_cliente, id_cliente in con_proyectos)
+
+    return previews
+
+
 #(GET/clientes) LISTAR CLIENTES
+# Comparte recurso en la caché de listados con /api/clientes/ (clientes.py invalida ambos).
 @router.get("/clientes")
-def obtener_clientes(db: Session = Depends(get_db)):
-    clientes = db.query(Cliente).all()
-    return clientes
+async def obtener_clientes(request: Request, db=Depends(get_async_db)):
+    async def cargar():
+        return (await db.execute(select(Cliente))).scalars().all()
+
+    return await listado_cacheado(request, CLIENTES, cargar)
 
 
 # PASO 2: PREVISUALIZACIÓN
@@ -210,7 +353,11 @@ class GenerarFacturaRequest(BaseModel):
     concepto: str
 
 @router.post("/factura/generar")
-def generar_factura(request: GenerarFacturaRequest, db: Session = Depends(get_db)):
+def generar_factura(
+    request: GenerarFacturaRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
     if request.mes < 1 or request.mes > 12:
         raise HTTPException(status_code=400, detail="Mes inválido (1-12)")
     if request.anio < 2000 or request.anio > 2100:
@@ -219,8 +366,7 @@ def generar_factura(request: GenerarFacturaRequest, db: Session = Depends(get_db
     # Evitar duplicados
     existe = db.query(Factura).filter(
         Factura.id_cliente == request.id_cliente,
-        extract("year", Factura.fec_factura) == request.anio,
-        extract("month", Factura.fec_factura) == request.mes
+        filtro_mes(Factura.fec_factura, request.anio, request.mes)
     ).first()
     if existe:
         raise HTTPException(status_code=400, detail="Ya existe una factura para ese cliente/mes/año")
@@ -233,45 +379,27 @@ def generar_factura(request: GenerarFacturaRequest, db: Session = Depends(get_db
         raise HTTPException(status_code=400, detail="Faltan tarifas", headers={"preview": str(preview)})
 
     # -------------------------
-    # Generar número de factura
+    # Reservar número de factura (bloquea el contador hasta el commit)
     hoy = date.today()
-    prefijo = hoy.strftime("%y%m")
-    ultima = db.query(Factura).filter(Factura.num_factura.like(f"QS{prefijo}%"))\
-        .order_by(Factura.num_factura.desc()).first()
-    secuencia = 1
-    if ultima:
-        secuencia = int(ultima.num_factura[-4:]) + 1
-    num_factura = f"QS{prefijo}{secuencia:04d}"
+    reserva = reservar_numeros(db, prefijo_mes(hoy))
 
     # -------------------------
     # Crear factura
-    nueva = Factura(
-        id_sociedad=request.id_sociedad,
-        id_cliente=request.id_cliente,
-        num_factura=num_factura,
-        fec_factura=hoy,
-        concepto=request.concepto,
-        base_imponible=preview["total_importe"],
-        total=preview["total_importe"]
-    )
+    nueva = _nueva_factura(request.id_sociedad, request.id_cliente, reserva.tomar(), hoy, request.concepto, preview)
     db.add(nueva)
-    db.commit()
-    db.refresh(nueva)
+    db.flush()
 
     # -------------------------
     # CAMBIO 3: BLOQUEAR HORAS PENDIENTES
-    horas = db.query(HorasTrab).filter(
-        HorasTrab.id_cliente == request.id_cliente,
-        HorasTrab.estado == "PENDIENTE",
-        extract("year", HorasTrab.fecha) == request.anio,
-        extract("month", HorasTrab.fecha) == request.mes
-    ).all()
+    _bloquear_horas(db, request.id_cliente, request.anio, request.mes, nueva.num_factura)
 
-    for h in horas:
-        h.estado = "FACTURADA"            # marcamos como facturada
-        h.id_factura = nueva.num_factura   # asociamos factura
+    # Número, factura y horas se confirman juntos: si algo falla no queda hueco
+    db.commit()
+    db.refresh(nueva)
 
-    db.commit()  # guardamos cambios en la BBDD
+    # El PDF se genera tras la respuesta: la primera descarga ya no espera a ReportLab
+    if PRERENDER:
+        background_tasks.add_task(prerenderizar, db.get_bind(), [nueva.num_factura])
 
     return {
         "mensaje": "Factura generada correctamente",
@@ -284,274 +412,169 @@ def generar_factura(request: GenerarFacturaRequest, db: Session = Depends(get_db
     }
 
 
-# 🔧 PDF IGUAL A LA PLANTILLA ORIGINAL
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.graphics.shapes import Drawing, Rect, String
-import os
-from reportlab.platypus import Image
-import io
+def _nueva_factura(id_sociedad: str, id_cliente: str, num_factura: str, fecha: date, concepto: str, preview):
+    return Factura(
+        id_sociedad=id_sociedad,
+        id_cliente=id_cliente,
+        num_factura=num_factura,
+        fec_factura=fecha,
+        concepto=concepto,
+        base_imponible=preview["total_importe"],
+        total=preview["total_importe"]
+    )
 
-@router.get("/factura/pdf/{num_factura}")
-def generar_pdf(num_factura: str, db: Session = Depends(get_db)):
 
-    factura = db.query(Factura).filter(Factura.num_factura == num_factura).first()
-    if not factura:
-        raise HTTPException(status_code=404, detail="Factura no encontrada")
+# Marca como FACTURADA todas las horas PENDIENTES del cliente en el mes
+# con un único UPDATE (y lo mismo en el resumen mensual).
+# Devuelve el nº de horas bloqueadas.
+def _bloquear_horas(db: Session, id_cliente: str, anio: int, mes: int, num_factura: str) -> int:
+    bloqueadas = db.query(HorasTrab).filter(
+        HorasTrab.id_cliente == id_cliente,
+        HorasTrab.estado == "PENDIENTE",
+        filtro_mes(HorasTrab.fecha, anio, mes)
+    ).update(
+        {HorasTrab.estado: "FACTURADA", HorasTrab.id_factura: num_factura},
+        synchronize_session=False
+    )
+    if bloqueadas:
+        aplicar_facturacion(db, id_cliente, anio, mes)
+    return bloqueadas
 
-    cliente = db.query(Cliente).filter(Cliente.id_cliente == factura.id_cliente).first()
 
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        leftMargin=40,
-        rightMargin=40,
-        topMargin=40,
-        bottomMargin=40,
-    )
+# PASO 3 (LOTE): GENERAR FACTURAS DE TODOS LOS CLIENTES DEL PERIODO
+class GenerarLoteRequest(BaseModel):
+    id_sociedad: str
+    anio: int
+    mes: int
+    concepto: str
+    ids_cliente: Optional[List[str]] = None  # None = todos los clientes con horas en el mes
+
+@router.post("/factura/generar-lote")
+def generar_facturas_lote(
+    request: GenerarLoteRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """
+    Genera las facturas del mes para varios clientes en una sola petición.
+
+    - Una consulta agregada para las previsualizaciones de todos los clientes.
+    - Una consulta para detectar las facturas ya existentes del mes.
+    - Los números se reservan de una vez (app/services/numeracion_facturas.py)
+      y se asignan de forma consecutiva solo a las facturas que se crean.
+    - Cada cliente se procesa en su propio SAVEPOINT: si uno falla, se
+      deshace solo ese cliente y el resto continúa.
+
+    Devuelve un informe por cliente con estado GENERADA, OMITIDA o ERROR.
+    """
+    if request.mes < 1 or request.mes > 12:
+        raise HTTPException(status_code=400, detail="Mes inválido (1-12)")
+    if request.anio < 2000 or request.anio > 2100:
+        raise HTTPException(status_code=400, detail="Año inválido")
 
-    styles = getSampleStyleSheet()
-    normal = styles["Normal"]
-    normal.fontSize = 10
-    bold = styles["Heading4"]
-    bold.fontSize = 12
-
-    elements = []
-
-    # ============================================================
-    # PLACEHOLDER IMAGEN
-    # ============================================================
-    current_file = Path(__file__).resolve()
-    repo_root = current_file.parents[3]
-    icon_path = repo_root / "front" / "public" / "icon.png"
-    legacy_logo_path = current_file.parents[1] / "static" / "logo.png"
-
-    def placeholder_imagen(width=140, height=55):
-        d = Drawing(width, height)
-        d.add(Rect(0, 0, width, height, strokeColor=colors.grey, fillColor=None))
-        d.add(String(width / 2 - 20, height / 2 - 5, "Imagen", fontSize=10))
-        return d
-
-    # Si el logo existe → usarlo
-    # Si no existe → usar placeholder
-    logo_source = icon_path if icon_path.exists() else legacy_logo_path
-    if logo_source.exists():
-        logo = Image(str(logo_source), width=140, height=55, kind="proportional")
-    else:
-        logo = placeholder_imagen()
-
-    # ============================================================
-    # LOGO + DATOS FACTURA
-    # ============================================================
-
-    
-    datos_factura = [
-        [Paragraph("<b>Factura</b>", normal)],
-        [Paragraph(f"<b>N° Factura:</b> {factura.num_factura}", normal)],
-        [Paragraph(f"<b>Fecha de impresión:</b> {factura.fec_factura.strftime('%d-%m-%Y')}", normal)],
-    ]
-
-    tabla_datos_factura = Table(datos_factura, colWidths=[200], hAlign='RIGHT')
-    tabla_datos_factura.setStyle(TableStyle([
-        ("ALIGN", (0, 0), (-1, -1), "RIGHT"),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-    ]))
-
-    tabla_superior = Table([[logo, tabla_datos_factura]], colWidths=[200, 300])
-    tabla_superior.setStyle(TableStyle([
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-    ]))
-
-    elements.append(tabla_superior)
-    elements.append(Spacer(1, 20))
-
-    # ============================================================
-    # DATOS EMPRESA + DATOS CLIENTE (EN DOS COLUMNAS)
-    # ============================================================
-
-    # PONER FONDO GRIS Y PONER ESTE BLOQUE A LA DERECHA
-    # Datos fijos de la empresa
-    empresa = [
-        [Paragraph("QUALITY SOLUTION CONSULTING SL", normal)],
-        [Paragraph("CIF/NIF: B86884707", normal)],
-        [Paragraph("Calle Henri Dunant Nº 15-17 Oficina 16", normal)],
-        [Paragraph("28036 Madrid", normal)],
-        [Paragraph("España", normal)],
-        [Paragraph("Teléfono: 91 565 42 48", normal)],
-        [Paragraph("Email: facturacion@qualitysolution.es", normal)],
-        [Paragraph("Web: http://www.qualitysolution.consulting/", normal)],
-    ]
-
-    tabla_empresa = Table(
-        empresa,
-        colWidths=[250],
-        hAlign='RIGHT'
-    )
+    ids_cliente = list(dict.fromkeys(request.ids_cliente)) if request.ids_cliente is not None else None
 
-    tabla_empresa.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,-1), colors.lightgrey),
-        ('BOX', (0,0), (-1,-1), 1, colors.black),
-        ('INNERGRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('LEFTPADDING', (0,0), (-1,-1), 6),
-        ('RIGHTPADDING', (0,0), (-1,-1), 6),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-    ]))
-
-
-    # RECUADRAR Y PONER EL BLOQUE A LA DERECHA
-    # Datos dinámicos del cliente
-    cliente_info = [
-        [Paragraph("<b>Cliente</b>", bold)],
-        [Paragraph(f"<b>{cliente.n_cliente}</b>", normal)],
-    ]
-
-    if cliente.direccion:
-        cliente_info.append([Paragraph(cliente.direccion, normal)])
-    if cliente.cif:
-        cliente_info.append([Paragraph(f"CIF/NIF: {cliente.cif}", normal)])
-    if cliente.telefono:
-        cliente_info.append([Paragraph(f"ATT: {cliente.telefono}", normal)])
-
-    tabla_cliente = Table(
-        cliente_info,
-        colWidths=[250],
-        hAlign='LEFT'
-    )
+    # -------------------------
+    # Previsualizaciones y facturas existentes del periodo
+    previews = _previews_clientes(request.anio, request.mes, ids_cliente, db)
+    clientes = ids_cliente if ids_cliente is not None else sorted(previews)
+
+    facturados = {
+        fila.id_cliente
+        for fila in db.query(Factura.id_cliente).filter(
+            Factura.id_cliente.in_(clientes),
+            filtro_mes(Factura.fec_factura, request.anio, request.mes)
+        )
+    } if clientes else set()
 
-    tabla_cliente.setStyle(TableStyle([
-        ('BOX', (0,0), (-1,-1), 1, colors.black),
-        ('LEFTPADDING', (0,0), (-1,-1), 6),
-        ('RIGHTPADDING', (0,0), (-1,-1), 6),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-    ]))
-
-
-    # Crear tabla de dos columnas
-    tabla_empresa_cliente = Table(
-        [
-            [tabla_cliente, tabla_empresa]
-        ],
-        colWidths=[260, 260]
-    )
+    hoy = date.today()
+    resultados = []
+    candidatos = []
+    for id_cliente in clientes:
+        preview = previews[id_cliente]
+        resultado = {
+            "id_cliente": id_cliente,
+            "estado": "ERROR",
+            "num_factura": None,
+            "total": preview["total_importe"],
+            "detalle": None,
+            "horas_bloqueadas": 0,
+            "alertas": preview["alertas"],
+        }
+        resultados.append(resultado)
 
-    tabla_empresa_cliente.setStyle(TableStyle([
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-    ]))
-
-    elements.append(tabla_empresa_cliente)
-    elements.append(Spacer(1, 20))
-    
-    # ============================================================
-    # TABLA PRINCIPAL (DESCRIPCIÓN)
-    # ============================================================
-
-    base = float(factura.base_imponible)
-    iva = round(base * 0.21, 2)
-    total = base + iva
-
-    tabla_lineas = Table([
-        ["DESCRIPCIÓN", "IVA", "BASE IMPONIBLE", "TOTAL"],
-        [factura.concepto, f"{iva:.2f}", f"{base:.2f}", f"{total:.2f}"],
-    ], colWidths=[220, 60, 100, 100])
-
-    tabla_lineas.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-        ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
-    ]))
-
-    elements.append(tabla_lineas)
-    elements.append(Spacer(1, 20))
-
-    # ============================================================
-    # DATOS BANCARIOS (DINÁMICOS)
-    # ============================================================
-
-    banco = None
-
-    if cliente and cliente.id_banco_cobro:
-        banco = db.query(Banco).filter(
-            Banco.id_banco_cobro == cliente.id_banco_cobro
-        ).first()
+        if id_cliente in facturados:
+            resultado.update(estado="OMITIDA", detalle="Ya existe una factura para ese cliente/mes/año")
+        elif not preview["lineas"]:
+            resultado["detalle"] = "No hay líneas facturables"
+        elif any("Falta tarifa" in a for a in preview["alertas"]):
+            resultado["detalle"] = "Faltan tarifas"
+        else:
+            candidatos.append((resultado, preview))
 
-    elements.append(Paragraph("<b>Pago mediante transferencia a la cuenta bancaria siguiente:</b>", normal))
-    elements.append(Spacer(1, 5))
-
-    if banco:
-        datos_banco = [
-            f"Banco: {banco.n_banco_cobro}",
-            f"Número cuenta: {banco.num_cuenta or '—'}",
-            f"Código IBAN: {banco.codigo_iban or '—'}",
-        ]
-    else:
-        datos_banco = [
-            "Banco: —",
-            "Número cuenta: —",
-            "Código IBAN: —",
-        ]
-
-    for linea in datos_banco:
-        elements.append(Paragraph(linea, normal))
-
-    elements.append(Spacer(1, 20))
-
-    # ============================================================
-    # TOTALES
-    # ============================================================
-
-    tabla_totales = Table([
-        ["TOTAL IVA 21%", f"{iva:.2f}"],
-        ["TOTAL BASE IMPONIBLE", f"{base:.2f}"],
-        ["TOTAL FACTURA", f"{total:.2f}"],
-    ], colWidths=[250, 150])
-
-    tabla_totales.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-        ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
-        # Fondo gris y negrita para TOTAL
-        ("BACKGROUND", (0, 2), (-1, 2), colors.lightgrey),
-        ("FONTNAME", (0, 2), (-1, 2), "Helvetica-Bold"),
-    ]))
-
-    elements.append(tabla_totales)
-    #espacio entre la firma y la tabla
-    elements.append(Spacer(1, 40))
-
-    # ============================================================
-    # FIRMA (ALINEADA A LA DERECHA)
-    # ============================================================
-
-    firma = [
-        [Paragraph("<b>QUALITY SOLUTION CONSULTING SL</b>", normal)],
-        [Paragraph("C.I.F. B-86884707", normal)],
-    ]
-
-    tabla_firma = Table(
-        [[firma]],
-        colWidths=[450]  # empuja la firma hacia la derecha
-    )
+    # -------------------------
+    # Numeración: una sola reserva para todo el lote
+    if candidatos:
+        reserva = reservar_numeros(db, prefijo_mes(hoy), len(candidatos))
+
+        for resultado, preview in candidatos:
+            id_cliente = resultado["id_cliente"]
+            num_factura = reserva.tomar()
+            try:
+                with db.begin_nested():
+                    db.add(_nueva_factura(request.id_sociedad, id_cliente, num_factura, hoy, request.concepto, preview))
+                    db.flush()
+                    horas = _bloquear_horas(db, id_cliente, request.anio, request.mes, num_factura)
+            except Exception:
+                # El número pasa al siguiente cliente: la numeración queda sin huecos
+                reserva.devolver(num_factura)
+                # El detalle de la excepción (SQL, parámetros) solo va al log
+                logger.exception("Error al generar la factura del cliente %s", id_cliente)
+                resultado["detalle"] = "No se pudo generar la factura de este cliente"
+                continue
+
+            resultado.update(estado="GENERADA", num_factura=num_factura, horas_bloqueadas=horas, alertas=[])
+
+        reserva.cerrar()
 
-    tabla_firma.setStyle(TableStyle([
-        ("ALIGN", (0, 0), (-1, -1), "RIGHT"),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-    ]))
+    db.commit()
 
-    elements.append(tabla_firma)
+    if PRERENDER:
+        background_tasks.add_task(
+            prerenderizar, db.get_bind(), [r["num_factura"] for r in resultados if r["estado"] == "GENERADA"]
+        )
 
-    doc.build(elements)
-    buffer.seek(0)
+    generadas = sum(1 for r in resultados if r["estado"] == "GENERADA")
+    return {
+        "mensaje": f"{generadas} factura(s) generada(s)",
+        "anio": request.anio,
+        "mes": request.mes,
+        "fec_factura": hoy.isoformat(),
+        "generadas": generadas,
+        "omitidas": sum(1 for r in resultados if r["estado"] == "OMITIDA"),
+        "errores": sum(1 for r in resultados if r["estado"] == "ERROR"),
+        "resultados": resultados,
+    }
 
-    return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=factura_{num_factura}.pdf"},
-    )
+
+# PDF DE LA FACTURA
+# Se sirve desde el almacén de PDF (app/services/almacen_pdf.py): solo se
+# genera con ReportLab si falta o si el registro de la factura ha cambiado.
+# El ETag es el hash del PDF; admite If-None-Match (304) y Range.
+@router.get("/factura/pdf/{num_factura}")
+def generar_pdf(num_factura: str, request: Request, db: Session = Depends(get_db)):
+
+    factura = db.query(Factura).filter(Factura.num_factura == num_factura).first()
+    if not factura:
+        raise HTTPException(status_code=404, detail="Factura no encontrada")
+
+    artefacto = artefacto_factura(db, factura)
+    cabeceras = {
+        "ETag": artefacto.etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f"attachment; filename=factura_{num_factura}.pdf",
+    }
+    if coincide_etag(request.headers.get("if-none-match"), artefacto.etag):
+        return Response(status_code=304, headers=cabeceras)
+
+    return FileResponse(artefacto.ruta, media_type="application/pdf", headers=cabeceras)
@@ -1,10 +1,27 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models.horas_trab import HorasTrab
+from app.services.consulta_horas import (
+    LIMITE_MAXIMO,
+    LIMITE_POR_DEFECTO,
+    consulta_exportacion,
+    contar_horas,
+    filtros_horas,
+    pagina_horas,
+    parsear_campos,
+    serializar_fila,
+)
+from app.services.escritura_horas import crear_fichajes, editar_fichajes, eliminar_fichajes
+from app.services.exportacion import TIPOS_CONTENIDO, exportar, nombre_fichero, validar_formato
+from app.services.periodos import filtro_rango, rango_periodo
+from app.services.resumen_horas import clave_resumen, recalcular_claves
 
 
 router = APIRouter(prefix="/api", tags=["Horas"])
@@ -25,14 +42,109 @@ def _serialize_hora(registro: HorasTrab) -> dict:
     }
 
 
+def _filtro_periodo(
+    anio: Optional[int] = None,
+    mes: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+):
+    """
+    Parámetros de periodo opcionales (?anio=&mes= o ?desde=&hasta=) como
+    rango de FECHA, para que MySQL pueda usar los índices sobre la fecha.
+    """
+    try:
+        return filtro_rango(HorasTrab.fecha, rango_periodo(anio, mes, desde, hasta))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _filtros_horas(
+    anio: Optional[int] = None,
+    mes: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    id_cliente: Optional[str] = None,
+    id_proyecto: Optional[str] = None,
+    id_empleado: Optional[str] = None,
+    estado: Optional[str] = None,
+):
+    """
+    Filtros opcionales de /horas y /horas/count: periodo, cliente, proyecto,
+    empleado y estado.
+    """
+    try:
+        rango = rango_periodo(anio, mes, desde, hasta)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return filtros_horas(rango, id_cliente, id_proyecto, id_empleado, estado)
+
+
 @router.get("/horas")
-def listar_fichajes(db: Session = Depends(get_db)):
-    return [_serialize_hora(registro) for registro in db.query(HorasTrab).all()]
+async def listar_fichajes(
+    limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = None,
+    orden: str = "desc",
+    campos: Optional[str] = None,
+    filtros=Depends(_filtros_horas),
+    db=Depends(get_async_db),
+):
+    """
+    Fichajes paginados por (fecha, empleado, proyecto), del más reciente al
+    más antiguo salvo orden=asc.
+
+    Para la página siguiente se repite la petición con cursor=next_cursor;
+    next_cursor es null en la última página. campos=fecha,horas_dia,...
+    limita los campos devueltos.
+    """
+    try:
+        return await pagina_horas(db, filtros, parsear_campos(campos), limit, cursor, orden)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/horas/export")
+def exportar_fichajes(
+    formato: str = "ndjson",
+    campos: Optional[str] = None,
+    filtros=Depends(_filtros_horas),
+    db: Session = Depends(get_db),
+):
+    """
+    Descarga los fichajes filtrados en NDJSON, CSV o XLSX, en streaming.
+
+    Admite los mismos filtros y campos que /horas, sin límite de filas.
+    """
+    try:
+        formato = validar_formato(formato)
+        lista_campos = parsear_campos(campos)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    contenido = exportar(
+        db.get_bind(),
+        consulta_exportacion(filtros, lista_campos),
+        lista_campos,
+        lambda fila: serializar_fila(fila, lista_campos),
+        formato,
+    )
+    return StreamingResponse(
+        contenido,
+        media_type=TIPOS_CONTENIDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre_fichero("horas", formato)}"'},
+    )
+
+
+@router.get("/horas/count")
+async def contar_fichajes(filtros=Depends(_filtros_horas), db=Depends(get_async_db)):
+    """
+    Total de fichajes y de horas con los mismos filtros que /horas.
+    """
+    return await contar_horas(db, filtros)
 
 
 @router.get("/horas/empleado/{id_empleado}")
-def listar_fichajes_emp(id_empleado: str, db: Session = Depends(get_db)):
-    resultados = db.query(HorasTrab).filter(HorasTrab.id_empleado == id_empleado).all()
+def listar_fichajes_emp(id_empleado: str, periodo=Depends(_filtro_periodo), db: Session = Depends(get_db)):
+    resultados = db.query(HorasTrab).filter(HorasTrab.id_empleado == id_empleado, periodo).all()
 
     if not resultados:
         raise HTTPException(status_code=404, detail="No existen fichajes de este empleado")
@@ -41,8 +153,8 @@ def listar_fichajes_emp(id_empleado: str, db: Session = Depends(get_db)):
 
 
 @router.get("/horas/proyecto/{id_proyecto}")
-def listar_fichajes_pro(id_proyecto: str, db: Session = Depends(get_db)):
-    resultados = db.query(HorasTrab).filter(HorasTrab.id_proyecto == id_proyecto).all()
+def listar_fichajes_pro(id_proyecto: str, periodo=Depends(_filtro_periodo), db: Session = Depends(get_db)):
+    resultados = db.query(HorasTrab).filter(HorasTrab.id_proyecto == id_proyecto, periodo).all()
 
     if not resultados:
         raise HTTPException(status_code=404, detail="No existen fichajes con este proyecto")
@@ -87,11 +199,69 @@ def fichar_manual(data: dict = Body(...), db: Session = Depends(get_db)):
     )
 
     db.add(nuevo)
+    db.flush()
+    recalcular_claves(db, [clave_resumen(nuevo.fecha, nuevo.id_proyecto, nuevo.id_empleado)])
     db.commit()
 
     return {"mensaje": "Fichaje creado correctamente"}
 
 
+# ============================================================
+# ESCRITURA MASIVA
+# ============================================================
+
+def _escritura_masiva(operacion, elementos: List[Any], todo_o_nada: bool, db: Session):
+    try:
+        return operacion(db, elementos, todo_o_nada)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except IntegrityError:
+        # Otra petición escribió las mismas claves entre la consulta y el commit
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Conflicto con fichajes guardados a la vez; reintenta la petición")
+
+
+@router.post("/horas/bulk")
+def fichar_masivo(
+    elementos: List[Any] = Body(...),
+    todo_o_nada: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Crea varios fichajes (formato de HoraCreate) en una sola transacción.
+
+    Devuelve el resultado de cada elemento (CREADO o ERROR con el detalle).
+    Con todo_o_nada=true no se guarda nada si algún elemento falla.
+    """
+    return _escritura_masiva(crear_fichajes, elementos, todo_o_nada, db)
+
+
+@router.put("/horas/bulk")
+def editar_masivo(
+    elementos: List[Any] = Body(...),
+    todo_o_nada: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Modifica varios fichajes: cada elemento lleva la clave (id_empleado,
+    fecha, id_proyecto) y los campos a cambiar (horas_dia, desc_tarea,
+    estado, origen).
+    """
+    return _escritura_masiva(editar_fichajes, elementos, todo_o_nada, db)
+
+
+@router.delete("/horas/bulk")
+def eliminar_masivo(
+    elementos: List[Any] = Body(...),
+    todo_o_nada: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Elimina varios fichajes identificados por (id_empleado, fecha, id_proyecto).
+    """
+    return _escritura_masiva(eliminar_fichajes, elementos, todo_o_nada, db)
+
+
 @router.put("/horas/{id_empleado}/{fecha}/{id_proyecto}")
 def editar_fichaje(
     id_empleado: str,
@@ -127,6 +297,8 @@ def editar_fichaje(
     if "origen" in data:
         fichaje.origen = data["origen"]
 
+    db.flush()
+    recalcular_claves(db, [clave_resumen(fichaje.fecha, fichaje.id_proyecto, fichaje.id_empleado)])
     db.commit()
 
     return {"mensaje": "Fichaje actualizado correctamente"}
@@ -158,6 +330,8 @@ def eliminar_fichaje(
         raise HTTPException(status_code=404, detail="Fichaje no encontrado")
 
     db.delete(fichaje)
+    db.flush()
+    recalcular_claves(db, [clave_resumen(fecha_convertida, id_proyecto, id_empleado)])
     db.commit()
 
     return {"mensaje": "Fichaje eliminado correctamente"}
@@ -0,0 +1,64 @@
+"""
+Router de trabajos de importación en segundo plano.
+
+Versión asíncrona de /preview-horas y /confirm-horas para ficheros grandes:
+la petición devuelve un job_id al instante y el progreso se consulta con
+GET /import-jobs/{job_id} desde cualquier worker.
+
+Tag OpenAPI: Importacion de horas
+"""
+
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.import_jobs import consultar_job, lanzar_confirmacion, lanzar_previsualizacion
+
+
+router = APIRouter(prefix="/import-jobs", tags=["Importacion de horas"])
+
+
+@router.post("/preview", status_code=status.HTTP_202_ACCEPTED)
+def crear_job_preview(archivo: UploadFile = File(...), db: Session = Depends(get_db)):
+    """
+    Encola la previsualización del fichero. El resultado final del trabajo
+    tiene el mismo formato que /preview-horas (incluido import_token).
+    """
+    id_job = lanzar_previsualizacion(db, archivo.file, archivo.filename)
+    return {"job_id": id_job, "estado": "PENDIENTE"}
+
+
+@router.post("/confirm", status_code=status.HTTP_202_ACCEPTED)
+def crear_job_confirm(data: Optional[Dict] = None, db: Session = Depends(get_db)):
+    """
+    Encola la inserción de una previsualización ya validada.
+    """
+    import_token = (data or {}).get("import_token")
+
+    tamano_lote = (data or {}).get("tamano_lote")
+    if tamano_lote is not None:
+        try:
+            tamano_lote = int(tamano_lote)
+        except (TypeError, ValueError):
+            tamano_lote = 0
+        if tamano_lote < 1:
+            raise HTTPException(status_code=400, detail="tamano_lote debe ser un entero positivo")
+
+    id_job = lanzar_confirmacion(db, import_token or "", tamano_lote)
+    if id_job is None:
+        raise HTTPException(status_code=400, detail="No hay datos para confirmar")
+
+    return {"job_id": id_job, "estado": "PENDIENTE"}
+
+
+@router.get("/{job_id}")
+def obtener_job(job_id: str, db: Session = Depends(get_db)):
+    """
+    Devuelve estado, filas procesadas, errores hasta el momento y ETA.
+    """
+    job = consultar_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo de importación no encontrado")
+    return job
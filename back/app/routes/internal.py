@@ -0,0 +1,98 @@
+"""
+Router de métricas internas.
+
+Endpoints de diagnóstico para operación, fuera del prefijo /api y del
+esquema OpenAPI:
+
+- GET /internal/metrics/pool: estado y métricas del pool de conexiones
+  (app/pool_metrics.py); en "async", las del pool de get_async_db si se ha
+  creado. POST /internal/metrics/pool/reiniciar devuelve el estado y pone a
+  cero los contadores.
+- GET /internal/metrics/cache: entradas, aciertos, fallos, 304 e
+  invalidaciones de la caché de listados (app/services/cache_listados.py).
+  POST /internal/metrics/cache/reiniciar, igual que el del pool.
+- GET /metrics (router_metricas, en la raíz): latencia, sentencias SQL,
+  tiempo de BBDD y tamaño de respuesta por ruta en formato Prometheus
+  (app/request_metrics.py).
+
+Todos exigen la cabecera X-Internal-Token con el valor de
+INTERNAL_METRICS_TOKEN (403 si no coincide). Sin INTERNAL_METRICS_TOKEN
+definido responden 404: por defecto no se publican.
+"""
+
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from app import database
+from app.database import get_db
+from app.pool_metrics import estado_pool, metricas, metricas_async
+from app.request_metrics import metricas_peticiones
+from app.services.cache_listados import estado_cache
+
+
+INTERNAL_METRICS_TOKEN = os.getenv("INTERNAL_METRICS_TOKEN", "")
+
+
+def _verificar_token(x_internal_token: Optional[str] = Header(default=None)):
+    if not INTERNAL_METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(x_internal_token or "", INTERNAL_METRICS_TOKEN):
+        raise HTTPException(status_code=403, detail="Token interno incorrecto")
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Interno"],
+    include_in_schema=False,
+    dependencies=[Depends(_verificar_token)],
+)
+
+# Prometheus espera las métricas en /metrics
+router_metricas = APIRouter(
+    tags=["Interno"],
+    include_in_schema=False,
+    dependencies=[Depends(_verificar_token)],
+)
+
+
+def _estado_pool(db: Session) -> dict:
+    # El engine de la sesión (no abre conexión): respeta los overrides de get_db
+    estado = estado_pool(db.get_bind())
+    estado["async"] = estado_pool(database.async_engine) if database.async_engine is not None else None
+    return estado
+
+
+@router.get("/metrics/pool")
+def metricas_pool(db: Session = Depends(get_db)):
+    return _estado_pool(db)
+
+
+@router.post("/metrics/pool/reiniciar")
+def reiniciar_metricas_pool(db: Session = Depends(get_db)):
+    estado = _estado_pool(db)
+    metricas.reiniciar()
+    metricas_async.reiniciar()
+    return estado
+
+
+@router.get("/metrics/cache")
+def metricas_cache():
+    return estado_cache()
+
+
+@router.post("/metrics/cache/reiniciar")
+def reiniciar_metricas_cache():
+    return estado_cache(reiniciar=True)
+
+
+@router_metricas.get("/metrics")
+def metricas_prometheus():
+    return PlainTextResponse(
+        metricas_peticiones.prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
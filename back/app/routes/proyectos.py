@@ -10,14 +10,15 @@ Tag OpenAPI: Proyectos
 
 from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select, or_, func
 
 from app.models.proyecto import Proyecto
 from app.models.cliente import Cliente
 from app.schemas.proyecto import ProyectoCreate, ProyectoUpdate, ProyectoOut
-from app.database import get_db
+from app.database import get_async_db, get_db
+from app.services.cache_listados import PROYECTOS, invalidar as invalidar_listados, listado_cacheado
 
 router = APIRouter(
     prefix="/api/proyectos",
@@ -29,13 +30,34 @@ router = APIRouter(
 # FUNCIÓN PRIVADA: ENRIQUECER PROYECTOS
 # ============================================================
 
+def _consulta_clientes(proyectos: List[Proyecto]):
+    """
+    SELECT de los clientes de los proyectos (None si ninguno tiene cliente).
+    """
+    ids = {p.id_cliente for p in proyectos if p.id_cliente}
+    return select(Cliente).where(Cliente.id_cliente.in_(ids)) if ids else None
+
+
 def _enriquecer(proyectos: List[Proyecto], db: Session) -> List[Dict]:
+    consulta = _consulta_clientes(proyectos)
+    clientes = db.execute(consulta).scalars().all() if consulta is not None else []
+    return _componer(proyectos, clientes)
+
+
+async def _enriquecer_async(proyectos: List[Proyecto], db) -> List[Dict]:
+    consulta = _consulta_clientes(proyectos)
+    clientes = (await db.execute(consulta)).scalars().all() if consulta is not None else []
+    return _componer(proyectos, clientes)
+
+
+def _componer(proyectos: List[Proyecto], clientes: List[Cliente]) -> List[Dict]:
     """
     Enriquece la lista de proyectos con información básica del cliente.
 
     Estrategia:
         - Se extraen todos los id_cliente únicos.
-        - Se realiza una única consulta para obtener los clientes.
+        - Se realiza una única consulta para obtener los clientes
+          (_enriquecer / _enriquecer_async).
         - Se construye un diccionario id_cliente → Cliente.
         - Se añade al resultado un objeto cliente reducido.
 
@@ -45,15 +67,7 @@ def _enriquecer(proyectos: List[Proyecto], db: Session) -> List[Dict]:
         List[Dict]
     """
 
-    ids = {p.id_cliente for p in proyectos if p.id_cliente}
-    clientes_map: Dict[str, Cliente] = {}
-
-    if ids:
-        rows = db.execute(
-            select(Cliente).where(Cliente.id_cliente.in_(ids))
-        ).scalars().all()
-
-        clientes_map = {c.id_cliente: c for c in rows}
+    clientes_map: Dict[str, Cliente] = {c.id_cliente: c for c in clientes}
 
     result = []
 
@@ -87,8 +101,9 @@ def _enriquecer(proyectos: List[Proyecto], db: Session) -> List[Dict]:
 # ============================================================
 
 @router.get("/", response_model=List[ProyectoOut])
-def listar_proyectos(
-    db: Session = Depends(get_db),
+async def listar_proyectos(
+    request: Request,
+    db=Depends(get_async_db),
     q: Optional[str] = Query(default=None),
     id_sociedad: Optional[str] = Query(default=None),
     id_cliente: Optional[str] = Query(default=None),
@@ -103,6 +118,8 @@ def listar_proyectos(
 
     Búsqueda case-insensitive mediante UPPER + LIKE.
     Ordenación alfabética por nombre_proyecto.
+
+    Cada combinación de filtros es una entrada de la caché de listados.
     """
 
     stmt = select(Proyecto)
@@ -127,9 +144,11 @@ def listar_proyectos(
 
     stmt = stmt.order_by(Proyecto.nombre_proyecto.asc())
 
-    proyectos = db.execute(stmt).scalars().all()
+    async def cargar():
+        proyectos = (await db.execute(stmt)).scalars().all()
+        return await _enriquecer_async(proyectos, db)
 
-    return _enriquecer(proyectos, db)
+    return await listado_cacheado(request, PROYECTOS, cargar, List[ProyectoOut])
 
 
 # ============================================================
@@ -189,6 +208,7 @@ def crear_proyecto(payload: ProyectoCreate, db: Session = Depends(get_db)):
     db.add(nuevo)
     db.commit()
     db.refresh(nuevo)
+    invalidar_listados(PROYECTOS)
 
     return _enriquecer([nuevo], db)[0]
 
@@ -255,6 +275,7 @@ def editar_proyecto(
 
     db.commit()
     db.refresh(proyecto)
+    invalidar_listados(PROYECTOS)
 
     return _enriquecer([proyecto], db)[0]
 
@@ -288,5 +309,6 @@ def eliminar_proyecto(
 
     db.delete(proyecto)
     db.commit()
+    invalidar_listados(PROYECTOS)
 
     return {"mensaje": "Proyecto eliminado correctamente"}
\ No newline at end of file
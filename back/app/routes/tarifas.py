@@ -16,12 +16,14 @@ Tag OpenAPI: Tarifas
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from datetime import date
 from pydantic import BaseModel
 
 from app.models.hist_proyecto import HistProyecto
-from app.database import get_db
+from app.database import get_async_db, get_db
+from app.services.tarifas_timeline import invalidar as invalidar_tarifas
 
 
 # ============================================================
@@ -79,7 +81,7 @@ router = APIRouter(
 # ============================================================
 
 @router.get("/tarifas")
-def listar_tarifas(db: Session = Depends(get_db)):
+async def listar_tarifas(db=Depends(get_async_db)):
     """
     Recupera todas las tarifas registradas en la tabla HistProyecto.
 
@@ -87,7 +89,7 @@ def listar_tarifas(db: Session = Depends(get_db)):
         List[Dict]: Lista de tarifas en formato JSON.
     """
 
-    registros = db.query(HistProyecto).all()
+    registros = (await db.execute(select(HistProyecto))).scalars().all()
 
     return [
         {
@@ -142,6 +144,7 @@ def asignar_tarifa(
 
     db.add(nueva)
     db.commit()
+    invalidar_tarifas()
     db.refresh(nueva)
 
     return {
@@ -202,6 +205,7 @@ def actualizar_tarifa(
     registro.tarifa = data.tarifa
 
     db.commit()
+    invalidar_tarifas()
     db.refresh(registro)
 
     return {
@@ -249,6 +253,7 @@ def eliminar_tarifa(
 
     db.delete(registro)
     db.commit()
+    invalidar_tarifas()
 
     return {
         "mensaje": "Tarifa eliminada correctamente"
@@ -11,11 +11,27 @@ class HoraCreate(BaseModel):
     id_proyecto: str
     horas_dia: float
     desc_tarea: Optional[str] = "Fichaje manual"
+    estado: Optional[str] = "PENDIENTE"
+    origen: Optional[str] = "MANUAL"
 
 
 class HoraUpdate(BaseModel):
     horas_dia: Optional[float] = None
     desc_tarea: Optional[str] = None
+    estado: Optional[str] = None
+    origen: Optional[str] = None
+
+
+# Clave de un fichaje (DELETE /horas/bulk)
+class HoraClave(BaseModel):
+    id_empleado: str
+    fecha: date
+    id_proyecto: str
+
+
+# Clave + campos a modificar (PUT /horas/bulk)
+class HoraBulkUpdate(HoraUpdate, HoraClave):
+    pass
 
 
 class HoraOut(BaseModel):
@@ -25,4 +41,4 @@ class HoraOut(BaseModel):
     id_cliente: str
     id_proyecto: str
     horas_dia: float
-    desc_tarea: Optional[str] = None
\ No newline at end of file
+    desc_tarea: Optional[str] = None
@@ -0,0 +1,178 @@
+"""
+Almacén de los PDF de facturas ya generados.
+
+Una factura emitida no cambia, así que su PDF se genera una sola vez (al
+emitirla o en la primera descarga) y las descargas siguientes se sirven
+desde disco: sin ReportLab ni consultas a CLIENTES/BANCOS.
+
+Estructura en FACTURAS_PDF_DIR:
+
+    objetos/ab/abcd...ef.pdf   PDF, nombrado por el SHA-256 de su contenido
+    indice/<num_factura>.json  {"huella", "sha256", "bytes"} de la factura
+
+- La huella es un hash de los campos del registro FACTURAS y de
+  VERSION_PLANTILLA (app/services/pdf_factura.py). Si el registro cambia
+  (o el diseño), la huella deja de coincidir y el PDF se regenera: es la
+  única invalidación.
+- El SHA-256 del contenido es el ETag de la descarga.
+- Las escrituras son atómicas (fichero temporal + os.replace), así que
+  varios workers pueden compartir la carpeta; si dos generan a la vez el
+  mismo PDF, el índice apunta al último sin dejar ficheros a medias ni
+  borrar el que el otro está sirviendo.
+
+Configuración (.env):
+    FACTURAS_PDF_DIR        carpeta del almacén (por defecto, en la carpeta temporal)
+    FACTURAS_PDF_PRERENDER  true (por defecto) genera el PDF al emitir la factura
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from urllib.parse import quote
+
+from sqlalchemy.orm import Session
+
+from app.models.factura import Factura
+from app.services.pdf_factura import VERSION_PLANTILLA, datos_factura, renderizar
+
+
+PDF_DIR = os.getenv("FACTURAS_PDF_DIR") or os.path.join(tempfile.gettempdir(), "facturacion_pdf")
+PRERENDER = os.getenv("FACTURAS_PDF_PRERENDER", "true").strip().lower() == "true"
+
+
+@dataclass
+class Artefacto:
+    ruta: str
+    sha256: str
+    bytes: int
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.sha256}"'
+
+
+def huella_factura(factura: Factura) -> str:
+    """
+    Hash de los campos de la factura que aparecen en su PDF y de la versión
+    de la plantilla.
+    """
+    campos = [
+        VERSION_PLANTILLA,
+        factura.id_sociedad,
+        factura.id_cliente,
+        factura.num_factura,
+        factura.fec_factura.isoformat(),
+        factura.concepto,
+        str(factura.base_imponible),
+        str(factura.total),
+    ]
+    return hashlib.sha256(json.dumps(campos, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# FICHEROS
+# ============================================================
+
+def _ruta_objeto(sha256: str) -> str:
+    return os.path.join(PDF_DIR, "objetos", sha256[:2], f"{sha256}.pdf")
+
+
+def _ruta_indice(num_factura: str) -> str:
+    return os.path.join(PDF_DIR, "indice", f"{quote(num_factura, safe='')}.json")
+
+
+def _escribir_atomico(ruta: str, contenido: bytes) -> None:
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as fichero:
+            fichero.write(contenido)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def _leer_indice(num_factura: str) -> Optional[dict]:
+    try:
+        with open(_ruta_indice(num_factura), encoding="utf-8") as fichero:
+            return json.load(fichero)
+    except (OSError, ValueError):
+        return None
+
+
+# ============================================================
+# API
+# ============================================================
+
+def buscar(num_factura: str, huella: str) -> Optional[Artefacto]:
+    """
+    PDF guardado de la factura si sigue vigente para esa huella.
+    """
+    indice = _leer_indice(num_factura)
+    if not indice or indice.get("huella") != huella:
+        return None
+    ruta = _ruta_objeto(indice["sha256"])
+    if not os.path.exists(ruta):
+        return None
+    return Artefacto(ruta=ruta, sha256=indice["sha256"], bytes=indice["bytes"])
+
+
+def guardar(num_factura: str, huella: str, contenido: bytes) -> Artefacto:
+    """
+    Guarda el PDF y apunta el índice de la factura a él. Borra el PDF
+    anterior de la factura si era de otra huella (el registro cambió).
+    """
+    sha256 = hashlib.sha256(contenido).hexdigest()
+    ruta = _ruta_objeto(sha256)
+    if not os.path.exists(ruta):
+        _escribir_atomico(ruta, contenido)
+
+    anterior = _leer_indice(num_factura)
+    _escribir_atomico(
+        _ruta_indice(num_factura),
+        json.dumps({"huella": huella, "sha256": sha256, "bytes": len(contenido)}).encode("utf-8"),
+    )
+    # Con la misma huella, el anterior es de otro worker que generó el PDF a
+    # la vez (ReportLab no da los mismos bytes dos veces) y puede estar
+    # sirviéndolo: se deja, como mucho queda un fichero huérfano
+    if anterior and anterior.get("huella") != huella and anterior.get("sha256") not in (None, sha256):
+        try:
+            os.remove(_ruta_objeto(anterior["sha256"]))
+        except OSError:
+            pass
+
+    return Artefacto(ruta=ruta, sha256=sha256, bytes=len(contenido))
+
+
+def artefacto_factura(db: Session, factura: Factura) -> Artefacto:
+    """
+    PDF de la factura desde el almacén; lo genera y guarda si falta o si
+    el registro ha cambiado.
+    """
+    huella = huella_factura(factura)
+    artefacto = buscar(factura.num_factura, huella)
+    if artefacto is None:
+        artefacto = guardar(factura.num_factura, huella, renderizar(datos_factura(db, factura)))
+    return artefacto
+
+
+def prerenderizar(bind, nums_factura: Iterable[str]) -> None:
+    """
+    Genera los PDF de facturas recién emitidas (tarea en segundo plano tras
+    la respuesta). Abre su propia sesión sobre `bind`: la de la petición ya
+    está cerrada. Un fallo aquí no es grave: el PDF se generará en la
+    primera descarga.
+    """
+    with Session(bind=bind) as db:
+        for num_factura in nums_factura:
+            try:
+                factura = db.get(Factura, num_factura)
+                if factura is not None:
+                    artefacto_factura(db, factura)
+            except Exception:
+                db.rollback()
@@ -0,0 +1,253 @@
+"""
+Caché de los listados de datos maestros (clientes, empleados, bancos y
+proyectos).
+
+Estos listados se piden en cada navegación del front y cambian pocas veces
+al día. Cada listado se guarda ya serializado (bytes JSON) junto con su
+ETag, un hash del contenido:
+
+- Si la petición trae If-None-Match con el ETag vigente, se responde 304
+  sin cuerpo.
+- Si no, se devuelve el cuerpo guardado con el ETag.
+- Solo en un fallo de caché se consulta la base de datos.
+
+Como el ETag depende solo del contenido, todos los workers dan el mismo
+ETag para los mismos datos, y un 304 es válido aunque la petición llegue a
+otro proceso. Las respuestas llevan Cache-Control: no-cache, para que el
+navegador guarde el listado pero lo revalide siempre con If-None-Match.
+
+Las entradas se guardan por recurso y por ruta + query string. Así
+/api/clientes/ y /api/clientes (factura.py) o cada filtro de
+/api/proyectos son entradas distintas del mismo recurso.
+
+Invalidación (mismo esquema que app/services/tarifas_timeline.py):
+    - Los endpoints de alta, edición y archivado de cada router llaman a
+      invalidar(recurso) tras el commit. También se invalidan los recursos
+      que muestran sus datos (DEPENDIENTES: el listado de proyectos incluye
+      el nombre del cliente).
+    - invalidar() reescribe el fichero marcador del recurso, de modo que el
+      resto de procesos descartan sus entradas en la siguiente petición.
+    - Como respaldo (cambios hechos directamente en la BBDD) las entradas
+      caducan a los LISTADOS_CACHE_TTL_SECONDS segundos.
+
+Los aciertos, fallos, 304 e invalidaciones de cada recurso se publican en
+GET /internal/metrics/cache.
+
+Configuración (.env):
+    LISTADOS_CACHE_TTL_SECONDS  caducidad de las entradas (por defecto 300; 0 desactiva la caché)
+    LISTADOS_CACHE_MAX_ENTRADAS entradas por recurso (por defecto 64)
+    LISTADOS_CACHE_MARKER_DIR   carpeta de los ficheros marcador
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from uuid import uuid4
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+
+CACHE_TTL_SECONDS = int(os.getenv("LISTADOS_CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRADAS = int(os.getenv("LISTADOS_CACHE_MAX_ENTRADAS", "64"))
+CACHE_MARKER_DIR = os.getenv("LISTADOS_CACHE_MARKER_DIR") or tempfile.gettempdir()
+
+CLIENTES = "clientes"
+EMPLEADOS = "empleados"
+BANCOS = "bancos"
+PROYECTOS = "proyectos"
+
+RECURSOS = (CLIENTES, EMPLEADOS, BANCOS, PROYECTOS)
+
+# Recursos cuyos listados incluyen datos de otro recurso
+DEPENDIENTES = {
+    CLIENTES: (PROYECTOS,),
+}
+
+
+# ============================================================
+# SERIALIZACIÓN
+# ============================================================
+
+def serializar(esquema, datos) -> bytes:
+    """
+    JSON del listado validado con el response_model del endpoint
+    (esquema=None: codificación por defecto de FastAPI).
+    """
+    if esquema is None:
+        return json.dumps(jsonable_encoder(datos), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    adaptador = TypeAdapter(esquema)
+    return adaptador.dump_json(adaptador.validate_python(datos, from_attributes=True), by_alias=True)
+
+
+def _etag(cuerpo: bytes) -> str:
+    return '"' + hashlib.blake2b(cuerpo, digest_size=16).hexdigest() + '"'
+
+
+def coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    etiquetas = {parte.strip().removeprefix("W/") for parte in if_none_match.split(",")}
+    return "*" in etiquetas or etag in etiquetas
+
+
+# ============================================================
+# CACHÉ DEL PROCESO
+# ============================================================
+
+class _Entrada:
+    __slots__ = ("cuerpo", "etag", "guardada_en")
+
+    def __init__(self, cuerpo: bytes):
+        self.cuerpo = cuerpo
+        self.etag = _etag(cuerpo)
+        self.guardada_en = time.monotonic()
+
+
+class _Recurso:
+    def __init__(self):
+        self.entradas: Dict[str, _Entrada] = {}
+        self.marcador: Optional[str] = None
+        self.generacion = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.no_modificados = 0
+        self.invalidaciones = 0
+
+
+_lock = threading.Lock()
+_recursos: Dict[str, _Recurso] = {recurso: _Recurso() for recurso in RECURSOS}
+
+
+def _ruta_marcador(recurso: str) -> str:
+    return os.path.join(CACHE_MARKER_DIR, f"facturacion_listado_{recurso}.version")
+
+
+def _version_marcador(recurso: str) -> Optional[str]:
+    try:
+        with open(_ruta_marcador(recurso)) as marcador:
+            return marcador.read()
+    except OSError:
+        return None
+
+
+def _clave(request: Request) -> str:
+    return request.url.path + "?" + "&".join(sorted(str(request.url.query).split("&")))
+
+
+def _buscar(recurso: str, clave: str) -> Tuple[Optional[_Entrada], int, Optional[str]]:
+    """
+    Entrada vigente (o None), generación actual y marcador leído.
+    """
+    marcador = _version_marcador(recurso)
+    with _lock:
+        estado = _recursos[recurso]
+        if marcador != estado.marcador:
+            # Otro proceso ha invalidado el recurso
+            estado.entradas.clear()
+            estado.marcador = marcador
+        entrada = estado.entradas.get(clave)
+        if entrada is not None and time.monotonic() - entrada.guardada_en >= CACHE_TTL_SECONDS:
+            del estado.entradas[clave]
+            entrada = None
+        return entrada, estado.generacion, marcador
+
+
+def _guardar(recurso: str, clave: str, entrada: _Entrada, generacion: int, marcador: Optional[str]) -> None:
+    with _lock:
+        estado = _recursos[recurso]
+        # Si se invalidó mientras se cargaba, la respuesta se sirve pero no se guarda
+        if generacion != estado.generacion or marcador != estado.marcador:
+            return
+        estado.entradas.pop(clave, None)
+        if len(estado.entradas) >= CACHE_MAX_ENTRADAS:
+            # Las entradas se insertan en orden: la primera es la más antigua
+            del estado.entradas[next(iter(estado.entradas))]
+        estado.entradas[clave] = entrada
+
+
+def _respuesta(request: Request, entrada: _Entrada, recurso: str) -> Response:
+    cabeceras = {"ETag": entrada.etag, "Cache-Control": "private, no-cache"}
+    if coincide_etag(request.headers.get("if-none-match"), entrada.etag):
+        with _lock:
+            _recursos[recurso].no_modificados += 1
+        return Response(status_code=304, headers=cabeceras)
+    return Response(content=entrada.cuerpo, media_type="application/json", headers=cabeceras)
+
+
+async def listado_cacheado(
+    request: Request,
+    recurso: str,
+    cargar: Callable[[], Awaitable[Any]],
+    esquema=None,
+) -> Response:
+    """
+    Responde el listado desde la caché; en un fallo lo carga con `cargar()`
+    (la consulta del endpoint) y lo serializa con `esquema`.
+    """
+    clave = _clave(request)
+    entrada, generacion, marcador = _buscar(recurso, clave) if CACHE_TTL_SECONDS > 0 else (None, 0, None)
+
+    with _lock:
+        if entrada is not None:
+            _recursos[recurso].aciertos += 1
+        else:
+            _recursos[recurso].fallos += 1
+
+    if entrada is None:
+        entrada = _Entrada(serializar(esquema, await cargar()))
+        if CACHE_TTL_SECONDS > 0:
+            _guardar(recurso, clave, entrada, generacion, marcador)
+
+    return _respuesta(request, entrada, recurso)
+
+
+def invalidar(recurso: str) -> None:
+    """
+    Descarta los listados del recurso (y de sus dependientes) en este
+    proceso y avisa al resto mediante los marcadores.
+
+    Llamar después del commit de cualquier cambio en la tabla del recurso.
+    """
+    for nombre in (recurso, *DEPENDIENTES.get(recurso, ())):
+        version = uuid4().hex
+        with _lock:
+            estado = _recursos[nombre]
+            estado.entradas.clear()
+            estado.generacion += 1
+            estado.invalidaciones += 1
+            estado.marcador = version
+
+        try:
+            with open(_ruta_marcador(nombre), "w") as marcador:
+                marcador.write(version)
+        except OSError:
+            # Sin marcador compartido, los demás procesos dependen del TTL
+            pass
+
+
+def estado_cache(reiniciar: bool = False) -> Dict:
+    """
+    Entradas y contadores por recurso (GET /internal/metrics/cache).
+    """
+    with _lock:
+        resultado = {"ttl_s": CACHE_TTL_SECONDS, "recursos": {}}
+        for nombre, estado in _recursos.items():
+            peticiones = estado.aciertos + estado.fallos
+            resultado["recursos"][nombre] = {
+                "entradas": len(estado.entradas),
+                "bytes": sum(len(e.cuerpo) for e in estado.entradas.values()),
+                "aciertos": estado.aciertos,
+                "fallos": estado.fallos,
+                "no_modificados": estado.no_modificados,
+                "invalidaciones": estado.invalidaciones,
+                "ratio_aciertos": round(estado.aciertos / peticiones, 4) if peticiones else None,
+            }
+            if reiniciar:
+                estado.aciertos = estado.fallos = estado.no_modificados = estado.invalidaciones = 0
+        return resultado
@@ -0,0 +1,13 @@
+"""
+Comparación de identificadores con el mismo criterio que MySQL.
+
+La colación de las columnas ID_* no distingue mayúsculas y, con PAD SPACE,
+no tiene en cuenta los espacios finales: una consulta con "e001 " encuentra
+"E001". Los diccionarios y conjuntos de Python que se cruzan con el
+resultado de una consulta (o que sustituyen a una consulta) deben usar
+clave_id() en sus claves para dar el mismo resultado que la base de datos.
+"""
+
+
+def clave_id(valor: str) -> str:
+    return valor.rstrip().casefold()
@@ -0,0 +1,231 @@
+"""
+Consulta paginada de HORAS_TRAB.
+
+GET /api/horas devolvía la tabla completa. Este módulo resuelve la consulta
+por páginas de tamaño fijo con paginación por clave (keyset) sobre
+(FECHA, ID_EMPLEADO, ID_PROYECTO):
+
+    WHERE (FECHA, ID_EMPLEADO, ID_PROYECTO) > (cursor) ORDER BY ... LIMIT n
+
+A diferencia de OFFSET, el coste de cada página no crece con el histórico:
+MySQL continúa el recorrido del índice ix_HORAS_TRAB_FECHA_EMP_PROY desde
+la última fila entregada.
+
+El cursor es la clave de la última fila de la página codificada en base64
+(opaco para el cliente). Los filtros deben repetirse en cada petición.
+
+pagina_horas y contar_horas son asíncronas: reciben la sesión de
+get_async_db (app/database.py).
+"""
+
+import base64
+import json
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, func, or_, select
+
+from app.models.horas_trab import HorasTrab
+from app.services.periodos import Rango, filtro_rango
+
+
+LIMITE_POR_DEFECTO = 500
+LIMITE_MAXIMO = 5000
+
+ORDEN_ASC = "asc"
+ORDEN_DESC = "desc"
+
+# Campos publicados (mismos nombres que _serialize_hora)
+CAMPOS = {
+    "id_sociedad": HorasTrab.id_sociedad,
+    "fecha": HorasTrab.fecha,
+    "id_empleado": HorasTrab.id_empleado,
+    "id_cliente": HorasTrab.id_cliente,
+    "id_proyecto": HorasTrab.id_proyecto,
+    "horas_dia": HorasTrab.horas_dia,
+    "desc_tarea": HorasTrab.desc_tarea,
+    "estado": HorasTrab.estado,
+    "id_factura": HorasTrab.id_factura,
+    "origen": HorasTrab.origen,
+}
+
+_CLAVE = (HorasTrab.fecha, HorasTrab.id_empleado, HorasTrab.id_proyecto)
+
+
+def parsear_campos(texto: Optional[str]) -> List[str]:
+    """
+    "fecha,horas_dia" -> ["fecha", "horas_dia"]. Vacío = todos los campos.
+    """
+    if not texto:
+        return list(CAMPOS)
+    campos = list(dict.fromkeys(c.strip() for c in texto.split(",") if c.strip()))
+    desconocidos = [c for c in campos if c not in CAMPOS]
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos: {', '.join(desconocidos)}")
+    return campos
+
+
+def filtros_horas(
+    rango: Optional[Rango] = None,
+    id_cliente: Optional[str] = None,
+    id_proyecto: Optional[str] = None,
+    id_empleado: Optional[str] = None,
+    estado: Optional[str] = None,
+) -> List:
+    """
+    Condiciones WHERE para los filtros opcionales de la consulta.
+    """
+    condiciones = []
+    if rango:
+        condiciones.append(filtro_rango(HorasTrab.fecha, rango))
+    if id_cliente:
+        condiciones.append(HorasTrab.id_cliente == id_cliente)
+    if id_proyecto:
+        condiciones.append(HorasTrab.id_proyecto == id_proyecto)
+    if id_empleado:
+        condiciones.append(HorasTrab.id_empleado == id_empleado)
+    if estado:
+        condiciones.append(HorasTrab.estado == estado)
+    return condiciones
+
+
+def serializar_fila(fila, campos: Sequence[str]) -> Dict:
+    """
+    Convierte una fila (con los campos pedidos) al formato de _serialize_hora.
+    """
+    salida = {}
+    for campo in campos:
+        valor = getattr(fila, campo)
+        if campo == "fecha":
+            valor = valor.strftime("%Y-%m-%d")
+        elif campo == "horas_dia":
+            valor = float(valor) if valor is not None else 0.0
+        salida[campo] = valor
+    return salida
+
+
+# ============================================================
+# CURSOR
+# ============================================================
+
+def codificar_cursor(fecha: date, id_empleado: str, id_proyecto: str) -> str:
+    crudo = json.dumps([fecha.isoformat(), id_empleado, id_proyecto], separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str):
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        fecha, id_empleado, id_proyecto = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return date.fromisoformat(fecha), str(id_empleado), str(id_proyecto)
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+
+def _despues_de(clave, orden: str):
+    """
+    (FECHA, ID_EMPLEADO, ID_PROYECTO) > clave (o < en orden descendente),
+    desarrollado con OR para que MySQL lo resuelva como rango del índice.
+    """
+    fecha, id_empleado, id_proyecto = clave
+    if orden == ORDEN_DESC:
+        mayor = lambda columna, valor: columna < valor  # noqa: E731
+        limite_fecha = HorasTrab.fecha <= fecha
+    else:
+        mayor = lambda columna, valor: columna > valor  # noqa: E731
+        limite_fecha = HorasTrab.fecha >= fecha
+
+    return and_(
+        limite_fecha,
+        or_(
+            mayor(HorasTrab.fecha, fecha),
+            and_(
+                HorasTrab.fecha == fecha,
+                or_(
+                    mayor(HorasTrab.id_empleado, id_empleado),
+                    and_(HorasTrab.id_empleado == id_empleado, mayor(HorasTrab.id_proyecto, id_proyecto)),
+                ),
+            ),
+        ),
+    )
+
+
+# ============================================================
+# CONSULTAS
+# ============================================================
+
+def consulta_pagina(
+    condiciones: List,
+    campos: Sequence[str],
+    limite: int,
+    cursor: Optional[str] = None,
+    orden: str = ORDEN_DESC,
+):
+    """
+    SELECT de una página: filtros + posición del cursor + ORDER BY clave + LIMIT.
+    """
+    if orden not in (ORDEN_ASC, ORDEN_DESC):
+        raise ValueError("orden debe ser 'asc' o 'desc'")
+
+    columnas = [CAMPOS[c].label(c) for c in campos]
+    # La clave se pide siempre para construir el cursor
+    columnas += [columna.label(columna.key) for columna in _CLAVE if columna.key not in campos]
+
+    consulta = select(*columnas).where(*condiciones)
+    if cursor:
+        consulta = consulta.where(_despues_de(decodificar_cursor(cursor), orden))
+    if orden == ORDEN_DESC:
+        consulta = consulta.order_by(*(columna.desc() for columna in _CLAVE))
+    else:
+        consulta = consulta.order_by(*_CLAVE)
+    return consulta.limit(limite)
+
+
+def consulta_exportacion(condiciones: List, campos: Sequence[str]):
+    """
+    SELECT completo (sin LIMIT) en orden ascendente de clave, para exportar.
+    """
+    return select(*(CAMPOS[c].label(c) for c in campos)).where(*condiciones).order_by(*_CLAVE)
+
+
+async def pagina_horas(
+    db: Any,
+    condiciones: List,
+    campos: Sequence[str],
+    limite: int = LIMITE_POR_DEFECTO,
+    cursor: Optional[str] = None,
+    orden: str = ORDEN_DESC,
+) -> Dict:
+    """
+    Devuelve una página de fichajes y el cursor de la siguiente.
+
+    Returns:
+        {"items": [...], "next_cursor": str | None, "limit": int}
+    """
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+
+    # Se pide una fila de más para saber si hay página siguiente
+    filas = (await db.execute(consulta_pagina(condiciones, campos, limite + 1, cursor, orden))).all()
+    hay_mas = len(filas) > limite
+    filas = filas[:limite]
+
+    siguiente = None
+    if hay_mas:
+        ultima = filas[-1]
+        siguiente = codificar_cursor(ultima.fecha, ultima.id_empleado, ultima.id_proyecto)
+
+    return {
+        "items": [serializar_fila(fila, campos) for fila in filas],
+        "next_cursor": siguiente,
+        "limit": limite,
+    }
+
+
+async def contar_horas(db: Any, condiciones: List) -> Dict:
+    """
+    Nº de fichajes y suma de horas que cumplen los filtros.
+    """
+    consulta = select(func.count(), func.coalesce(func.sum(HorasTrab.horas_dia), 0))\
+        .select_from(HorasTrab).where(*condiciones)
+    total, horas = (await db.execute(consulta)).one()
+    return {"total": total, "total_horas": round(float(horas), 2)}
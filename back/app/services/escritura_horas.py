@@ -0,0 +1,223 @@
+"""
+Escritura masiva de fichajes (POST/PUT/DELETE /api/horas/bulk).
+
+Las rutas unitarias de /api/horas hacen, por cada fichaje, una consulta de
+existencia y un commit: rellenar una semana de un equipo desde la rejilla
+de horas suponía cientos de peticiones. Aquí una petición procesa la lista
+completa:
+
+1. Valida todos los elementos con los esquemas de app/schemas/horas_trab.py
+   en una pasada (los inválidos y las claves repetidas se informan por
+   elemento).
+2. Consulta en una sola sentencia qué claves (ID_EMPLEADO, FECHA,
+   ID_PROYECTO) existen ya. Las claves se comparan con clave_id, igual que
+   MySQL (sin distinguir mayúsculas ni espacios finales).
+3. Aplica todos los cambios válidos y actualiza RESUMEN_HORAS_MES en una
+   única transacción.
+
+El resultado incluye el estado de cada elemento, en el orden recibido.
+Con todo_o_nada=True no se escribe nada si algún elemento falla.
+"""
+
+from typing import Dict, List, Sequence, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import delete, insert, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.horas_trab import HorasTrab
+from app.schemas.horas_trab import HoraBulkUpdate, HoraClave, HoraCreate
+from app.services.claves import clave_id
+from app.services.resumen_horas import clave_resumen, recalcular_claves
+
+
+# Nº máximo de elementos por petición
+LIMITE_ELEMENTOS = 1000
+
+CREADO = "CREADO"
+ACTUALIZADO = "ACTUALIZADO"
+ELIMINADO = "ELIMINADO"
+ERROR = "ERROR"
+
+_CLAVE = (HorasTrab.id_empleado, HorasTrab.fecha, HorasTrab.id_proyecto)
+
+
+def _clave(id_empleado: str, fecha, id_proyecto: str) -> Tuple:
+    """Clave del fichaje normalizada como la compara MySQL."""
+    return clave_id(id_empleado), fecha, clave_id(id_proyecto)
+
+
+def _detalle_validacion(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in error['loc']) or 'elemento'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def _validar(elementos: Sequence, esquema: Type[BaseModel]) -> Tuple[List[Dict], List]:
+    """
+    Valida los elementos y descarta las claves repetidas en la petición.
+
+    Returns:
+        (resultados por elemento, [(índice, elemento validado)] sin errores)
+    """
+    if len(elementos) > LIMITE_ELEMENTOS:
+        raise ValueError(f"Máximo {LIMITE_ELEMENTOS} elementos por petición")
+
+    resultados = []
+    validos = []
+    vistas = set()
+    for indice, crudo in enumerate(elementos):
+        resultado = {"indice": indice, "estado": ERROR, "detalle": None}
+        resultados.append(resultado)
+        try:
+            elemento = esquema.model_validate(crudo)
+        except ValidationError as exc:
+            resultado["detalle"] = _detalle_validacion(exc)
+            continue
+
+        clave = (elemento.id_empleado, elemento.fecha, elemento.id_proyecto)
+        resultado.update(id_empleado=clave[0], fecha=clave[1].isoformat(), id_proyecto=clave[2])
+        if _clave(*clave) in vistas:
+            resultado["detalle"] = "Fichaje repetido en la petición"
+            continue
+        vistas.add(_clave(*clave))
+        validos.append((indice, elemento))
+
+    return resultados, validos
+
+
+def _claves(validos) -> List[Tuple]:
+    return [(e.id_empleado, e.fecha, e.id_proyecto) for _, e in validos]
+
+
+def _resumen(resultados: List[Dict], aplicados: int) -> Dict:
+    return {
+        "total": len(resultados),
+        "aplicados": aplicados,
+        "errores": sum(1 for r in resultados if r["estado"] == ERROR),
+        "resultados": resultados,
+    }
+
+
+def _confirmar(db: Session, resultados: List[Dict], aplicadas: List[Tuple], todo_o_nada: bool) -> Dict:
+    """
+    Actualiza el resumen de las claves aplicadas y hace el commit único
+    (o rollback si todo_o_nada y algún elemento falló).
+    """
+    if todo_o_nada and any(r["estado"] == ERROR for r in resultados):
+        db.rollback()
+        for resultado in resultados:
+            if resultado["estado"] != ERROR:
+                resultado.update(estado=ERROR, detalle="No aplicado: hay elementos con error")
+        return _resumen(resultados, 0)
+
+    try:
+        if aplicadas:
+            recalcular_claves(db, {clave_resumen(fecha, proyecto, empleado) for empleado, fecha, proyecto in aplicadas})
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return _resumen(resultados, len(aplicadas))
+
+
+# ============================================================
+# OPERACIONES
+# ============================================================
+
+def crear_fichajes(db: Session, elementos: Sequence, todo_o_nada: bool = False) -> Dict:
+    """
+    Alta de fichajes con un INSERT por lotes. Las claves ya existentes se
+    informan como error, igual que en POST /api/horas.
+    """
+    resultados, validos = _validar(elementos, HoraCreate)
+
+    existentes = set()
+    if validos:
+        existentes = {_clave(*fila) for fila in db.query(*_CLAVE).filter(tuple_(*_CLAVE).in_(_claves(validos)))}
+
+    filas = []
+    aplicadas = []
+    for indice, elemento in validos:
+        clave = (elemento.id_empleado, elemento.fecha, elemento.id_proyecto)
+        if _clave(*clave) in existentes:
+            resultados[indice]["detalle"] = "Ya existe un fichaje para ese empleado, fecha y proyecto"
+            continue
+        filas.append({
+            "ID_SOCIEDAD": elemento.id_sociedad,
+            "FECHA": elemento.fecha,
+            "ID_EMPLEADO": elemento.id_empleado,
+            "ID_CLIENTE": elemento.id_cliente,
+            "ID_PROYECTO": elemento.id_proyecto,
+            "HORAS_DIA": elemento.horas_dia,
+            "DESC_TAREA": elemento.desc_tarea,
+            "ESTADO": elemento.estado,
+            "ORIGEN": elemento.origen,
+            "ID_FACTURA": None,
+        })
+        aplicadas.append(clave)
+        resultados[indice]["estado"] = CREADO
+
+    if filas:
+        db.execute(insert(HorasTrab.__table__), filas)
+
+    return _confirmar(db, resultados, aplicadas, todo_o_nada)
+
+
+def editar_fichajes(db: Session, elementos: Sequence, todo_o_nada: bool = False) -> Dict:
+    """
+    Modifica los campos enviados de cada fichaje (los ausentes no cambian).
+    """
+    resultados, validos = _validar(elementos, HoraBulkUpdate)
+
+    fichajes = {}
+    if validos:
+        fichajes = {
+            _clave(f.id_empleado, f.fecha, f.id_proyecto): f
+            for f in db.query(HorasTrab).filter(tuple_(*_CLAVE).in_(_claves(validos)))
+        }
+
+    aplicadas = []
+    for indice, elemento in validos:
+        clave = (elemento.id_empleado, elemento.fecha, elemento.id_proyecto)
+        fichaje = fichajes.get(_clave(*clave))
+        if fichaje is None:
+            resultados[indice]["detalle"] = "Fichaje no encontrado"
+            continue
+        for campo, valor in elemento.model_dump(exclude_unset=True, exclude=set(HoraClave.model_fields)).items():
+            setattr(fichaje, campo, valor)
+        aplicadas.append(clave)
+        resultados[indice]["estado"] = ACTUALIZADO
+
+    # El flush agrupa los UPDATE con los mismos campos en un executemany
+    db.flush()
+    return _confirmar(db, resultados, aplicadas, todo_o_nada)
+
+
+def eliminar_fichajes(db: Session, elementos: Sequence, todo_o_nada: bool = False) -> Dict:
+    """
+    Borra los fichajes indicados con un único DELETE.
+    """
+    resultados, validos = _validar(elementos, HoraClave)
+
+    existentes = set()
+    if validos:
+        existentes = {_clave(*fila) for fila in db.query(*_CLAVE).filter(tuple_(*_CLAVE).in_(_claves(validos)))}
+
+    aplicadas = []
+    for indice, elemento in validos:
+        clave = (elemento.id_empleado, elemento.fecha, elemento.id_proyecto)
+        if _clave(*clave) not in existentes:
+            resultados[indice]["detalle"] = "Fichaje no encontrado"
+            continue
+        aplicadas.append(clave)
+        resultados[indice]["estado"] = ELIMINADO
+
+    if aplicadas:
+        db.execute(
+            delete(HorasTrab).where(tuple_(*_CLAVE).in_(aplicadas)),
+            execution_options={"synchronize_session": False},
+        )
+
+    return _confirmar(db, resultados, aplicadas, todo_o_nada)
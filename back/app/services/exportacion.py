@@ -0,0 +1,124 @@
+"""
+Exportación en streaming (NDJSON, CSV y XLSX).
+
+Los listados JSON cargan todas las filas (objetos ORM + dicts) en memoria
+antes de responder. Las exportaciones recorren la consulta con un cursor de
+servidor (stream_results + yield_per: SSCursor en pymysql) y van emitiendo
+bloques de bytes a medida que llegan las filas, de modo que:
+
+- la memoria no depende del nº de filas exportadas,
+- el primer bloque sale en cuanto llega el primer lote de la base de datos.
+
+XLSX es un ZIP y no se puede emitir hasta cerrarlo: se escribe con openpyxl
+en modo write_only (tampoco guarda las filas en memoria) a un fichero
+temporal que después se envía por bloques.
+
+La consulta se ejecuta en una conexión propia del generador, porque el
+cuerpo de la respuesta se produce después de que el endpoint haya devuelto.
+
+Configuración (.env):
+    EXPORT_BATCH_SIZE   filas por lote leído de la base de datos (por defecto 1000)
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional, Sequence
+
+from openpyxl import Workbook
+from sqlalchemy.engine import Engine
+
+
+TAMANO_LOTE_EXPORTACION = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+TAMANO_BLOQUE_FICHERO = 64 * 1024
+
+TIPOS_CONTENIDO = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+Serializador = Callable[[object], Dict]
+
+
+def _lotes(bind: Engine, consulta, tamano_lote: int) -> Iterator[Sequence]:
+    """
+    Filas de la consulta en lotes, con cursor de servidor.
+    """
+    with bind.connect() as conn:
+        resultado = conn.execution_options(stream_results=True, yield_per=tamano_lote).execute(consulta)
+        for lote in resultado.partitions():
+            yield lote
+
+
+def _ndjson(lotes, serializar: Serializador, campos: Sequence[str]) -> Iterator[bytes]:
+    for lote in lotes:
+        yield "".join(
+            json.dumps(serializar(fila), ensure_ascii=False, default=str) + "\n" for fila in lote
+        ).encode("utf-8")
+
+
+def _csv(lotes, serializar: Serializador, campos: Sequence[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    # BOM para que Excel lo abra como UTF-8 (el importador lo acepta igual)
+    buffer.write("\ufeff")
+    escritor.writerow(campos)
+    yield buffer.getvalue().encode("utf-8")
+
+    for lote in lotes:
+        buffer.seek(0)
+        buffer.truncate()
+        for fila in lote:
+            valores = serializar(fila)
+            escritor.writerow([valores[campo] for campo in campos])
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _xlsx(lotes, serializar: Serializador, campos: Sequence[str]) -> Iterator[bytes]:
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append(list(campos))
+    for lote in lotes:
+        for fila in lote:
+            valores = serializar(fila)
+            hoja.append([valores[campo] for campo in campos])
+
+    with tempfile.TemporaryFile() as fichero:
+        libro.save(fichero)
+        fichero.seek(0)
+        for bloque in iter(lambda: fichero.read(TAMANO_BLOQUE_FICHERO), b""):
+            yield bloque
+
+
+_ESCRITORES = {"ndjson": _ndjson, "csv": _csv, "xlsx": _xlsx}
+
+
+def validar_formato(formato: str) -> str:
+    formato = (formato or "").lower()
+    if formato not in _ESCRITORES:
+        raise ValueError(f"Formato no soportado: use {', '.join(_ESCRITORES)}")
+    return formato
+
+
+def exportar(
+    bind: Engine,
+    consulta,
+    campos: Sequence[str],
+    serializar: Serializador,
+    formato: str,
+    tamano_lote: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    Generador con el contenido del fichero exportado, para StreamingResponse.
+    """
+    lotes = _lotes(bind, consulta, tamano_lote or TAMANO_LOTE_EXPORTACION)
+    return _ESCRITORES[validar_formato(formato)](lotes, serializar, campos)
+
+
+def nombre_fichero(prefijo: str, formato: str) -> str:
+    return f"{prefijo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
@@ -0,0 +1,225 @@
+"""
+Trabajos de importación en segundo plano.
+
+Las previsualizaciones y confirmaciones de ficheros grandes tardan más de lo
+que permite el proxy de cPanel/Passenger. Con este módulo el endpoint solo
+registra el trabajo y devuelve su id; la lectura, validación e inserción se
+ejecutan en un pool de hilos del proceso que recibió la petición.
+
+El estado y el progreso se guardan en la tabla IMPORT_JOBS, de modo que
+cualquier worker puede responder a GET /import-jobs/{id}. Si un trabajo deja
+de actualizarse (por ejemplo, porque el proceso se reinició), la consulta lo
+informa como INTERRUMPIDO.
+
+Configuración (.env):
+    IMPORT_JOB_WORKERS        hilos del pool (por defecto 2)
+    IMPORT_JOB_STALE_SECONDS  segundos sin progreso para darlo por interrumpido
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Optional
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.import_job import ImportJob
+from app.services.importacion_horas import confirmar_importacion, previsualizar_fichero
+from app.services.lectura_horas import FicheroNoLegible, estimar_filas
+from app.services.preview_store import get_preview_store
+
+
+JOB_WORKERS = int(os.getenv("IMPORT_JOB_WORKERS", "2"))
+JOB_STALE_SECONDS = int(os.getenv("IMPORT_JOB_STALE_SECONDS", "600"))
+
+TIPO_PREVIEW = "PREVIEW"
+TIPO_CONFIRM = "CONFIRM"
+
+ESTADO_PENDIENTE = "PENDIENTE"
+ESTADO_EN_CURSO = "EN_CURSO"
+ESTADO_COMPLETADO = "COMPLETADO"
+ESTADO_ERROR = "ERROR"
+ESTADO_INTERRUMPIDO = "INTERRUMPIDO"
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="import-job")
+
+
+# ============================================================
+# ESTADO DEL TRABAJO
+# ============================================================
+
+def _crear_job(db: Session, tipo: str, filas_totales: Optional[int]) -> str:
+    job = ImportJob(
+        id_job=str(uuid4()),
+        tipo=tipo,
+        estado=ESTADO_PENDIENTE,
+        filas_procesadas=0,
+        filas_totales=filas_totales,
+        errores=0,
+        fec_creacion=datetime.utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    return job.id_job
+
+
+def _actualizar_job(id_job: str, **campos) -> None:
+    """
+    Actualiza el registro del trabajo en una sesión propia.
+
+    El estado se guarda aparte de la sesión de trabajo para que el progreso
+    sea visible aunque la importación todavía no haya hecho commit.
+    """
+    db = SessionLocal()
+    try:
+        campos["fec_actualizacion"] = datetime.utcnow()
+        db.query(ImportJob).filter(ImportJob.id_job == id_job).update(
+            {getattr(ImportJob, campo): valor for campo, valor in campos.items()},
+            synchronize_session=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _ejecutar(id_job: str, tarea: Callable[[Session, Callable[[int, int], None]], Dict]) -> None:
+    _actualizar_job(id_job, estado=ESTADO_EN_CURSO, fec_inicio=datetime.utcnow())
+
+    def progreso(filas: int, errores: int) -> None:
+        _actualizar_job(id_job, filas_procesadas=filas, errores=errores)
+
+    db = SessionLocal()
+    try:
+        resultado = tarea(db, progreso)
+        _actualizar_job(
+            id_job,
+            estado=ESTADO_COMPLETADO,
+            resultado=json.dumps(resultado, default=str),
+            fec_fin=datetime.utcnow(),
+        )
+    except Exception as exc:
+        db.rollback()
+        _actualizar_job(
+            id_job,
+            estado=ESTADO_ERROR,
+            mensaje_error=str(exc) or exc.__class__.__name__,
+            fec_fin=datetime.utcnow(),
+        )
+    finally:
+        db.close()
+
+
+# ============================================================
+# LANZAR TRABAJOS
+# ============================================================
+
+def lanzar_previsualizacion(db: Session, fichero: BinaryIO, nombre: Optional[str]) -> str:
+    """
+    Copia el fichero subido a disco, registra el trabajo y lo encola.
+
+    Returns:
+        id del trabajo.
+    """
+    extension = Path(nombre or "").suffix.lower()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as copia:
+        ruta = copia.name
+        try:
+            shutil.copyfileobj(fichero, copia)
+        except BaseException:
+            copia.close()
+            os.unlink(ruta)
+            raise
+
+    def tarea(sesion: Session, progreso) -> Dict:
+        try:
+            with open(ruta, "rb") as leido:
+                return previsualizar_fichero(leido, nombre, sesion, progreso=progreso)
+        except FicheroNoLegible:
+            raise FicheroNoLegible("No se pudo leer el archivo Excel.")
+        finally:
+            os.unlink(ruta)
+
+    # Hasta que la tarea está encolada, la copia es responsabilidad de este hilo
+    try:
+        with open(ruta, "rb") as leido:
+            filas_totales = estimar_filas(leido, nombre)
+        id_job = _crear_job(db, TIPO_PREVIEW, filas_totales)
+        _executor.submit(_ejecutar, id_job, tarea)
+    except BaseException:
+        os.unlink(ruta)
+        raise
+    return id_job
+
+
+def lanzar_confirmacion(db: Session, import_token: str, tamano_lote: Optional[int] = None) -> Optional[str]:
+    """
+    Registra y encola la confirmación de una previsualización.
+
+    Returns:
+        id del trabajo o None si el token no existe o no tiene filas.
+    """
+    filas_totales = get_preview_store().contar_filas(import_token)
+    if not filas_totales:
+        return None
+
+    id_job = _crear_job(db, TIPO_CONFIRM, filas_totales)
+
+    def tarea(sesion: Session, progreso) -> Dict:
+        resultado = confirmar_importacion(sesion, import_token, tamano_lote, progreso=progreso)
+        if resultado is None:
+            raise LookupError("No hay datos para confirmar")
+        return {"mensaje": "Horas registradas correctamente", **resultado}
+
+    _executor.submit(_ejecutar, id_job, tarea)
+    return id_job
+
+
+# ============================================================
+# CONSULTA
+# ============================================================
+
+def consultar_job(db: Session, id_job: str) -> Optional[Dict]:
+    """
+    Devuelve el estado, el progreso y la estimación de tiempo restante.
+    """
+    job = db.query(ImportJob).filter(ImportJob.id_job == id_job).first()
+    if not job:
+        return None
+
+    ahora = datetime.utcnow()
+    estado = job.estado
+    if estado in (ESTADO_PENDIENTE, ESTADO_EN_CURSO):
+        ultima = job.fec_actualizacion or job.fec_creacion
+        if (ahora - ultima).total_seconds() > JOB_STALE_SECONDS:
+            estado = ESTADO_INTERRUMPIDO
+
+    eta_segundos = None
+    porcentaje = None
+    if job.filas_totales:
+        porcentaje = round(min(job.filas_procesadas / job.filas_totales, 1.0) * 100, 1)
+        if estado == ESTADO_EN_CURSO and job.fec_inicio and job.filas_procesadas:
+            transcurrido = (ahora - job.fec_inicio).total_seconds()
+            pendientes = max(job.filas_totales - job.filas_procesadas, 0)
+            eta_segundos = round(transcurrido / job.filas_procesadas * pendientes, 1)
+
+    return {
+        "job_id": job.id_job,
+        "tipo": job.tipo,
+        "estado": estado,
+        "filas_procesadas": job.filas_procesadas,
+        "filas_totales": job.filas_totales,
+        "porcentaje": porcentaje,
+        "errores": job.errores,
+        "eta_segundos": eta_segundos,
+        "fec_creacion": job.fec_creacion.isoformat(),
+        "fec_inicio": job.fec_inicio.isoformat() if job.fec_inicio else None,
+        "fec_fin": job.fec_fin.isoformat() if job.fec_fin else None,
+        "resultado": json.loads(job.resultado) if job.resultado else None,
+        "mensaje_error": job.mensaje_error,
+    }
@@ -0,0 +1,129 @@
+"""
+Flujo de importación de horas: previsualizar un fichero y confirmar la carga.
+
+Une la lectura por lotes (lectura_horas), la validación por conjuntos
+(validacion_horas), el almacén de previsualizaciones (preview_store) y la
+inserción masiva (insercion_horas). Lo usan los endpoints /preview-horas y
+/confirm-horas.
+
+Durante la previsualización solo se conservan, por cada lote, las filas
+válidas ya comprimidas y los errores, de modo que la memoria no depende del
+tamaño del fichero. El detalle de errores se limita a IMPORT_MAX_ERRORS;
+total_errores siempre refleja el número real. Si las filas válidas
+comprimidas superan PREVIEW_MAX_BYTES, la lectura se corta en ese lote.
+"""
+
+import os
+from typing import BinaryIO, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.services.insercion_horas import insertar_horas
+from app.services.lectura_horas import leer_por_lotes
+from app.services.preview_store import get_preview_store, serializar_filas
+from app.services.validacion_horas import CatalogoReferencias, normalizar_dataframe, validar_horas
+
+
+MAX_ERRORES_DETALLE = int(os.getenv("IMPORT_MAX_ERRORS", "5000"))
+
+# Callback de progreso: (filas procesadas, errores encontrados)
+Progreso = Callable[[int, int], None]
+
+
+def previsualizar_fichero(
+    fichero: BinaryIO,
+    nombre: Optional[str],
+    db: Session,
+    tamano_lote: Optional[int] = None,
+    progreso: Optional[Progreso] = None,
+) -> Dict:
+    """
+    Lee y valida el fichero lote a lote y guarda las filas válidas.
+
+    Si se indica progreso, se llama tras validar cada lote.
+
+    Returns:
+        Dict con import_token, total_filas, filas_validas, total_horas,
+        errores y total_errores.
+
+    Raises:
+        FicheroNoLegible: si el fichero no se puede leer.
+        PreviewDemasiadoGrande: si las filas válidas no caben en el almacén.
+    """
+    store = get_preview_store()
+    catalogo = CatalogoReferencias()
+    bloques: List[bytes] = []
+    tamano_bloques = 0
+    errores: List[Dict] = []
+    total_errores = 0
+    total_filas = 0
+    filas_validas = 0
+    total_horas = 0.0
+
+    for lote in leer_por_lotes(fichero, nombre, tamano_lote):
+        resultado = validar_horas(normalizar_dataframe(lote), db, catalogo)
+
+        total_filas += len(lote)
+        filas_validas += len(resultado["filas_validas"])
+        total_horas += resultado["total_horas"]
+        total_errores += len(resultado["errores"])
+
+        if resultado["filas_validas"]:
+            bloques.append(serializar_filas(resultado["filas_validas"]))
+            # 4 bytes de longitud por bloque, como en empaquetar_bloques
+            tamano_bloques += len(bloques[-1]) + 4
+            store.comprobar_tamano(tamano_bloques)
+
+        hueco = MAX_ERRORES_DETALLE - len(errores)
+        if hueco > 0:
+            errores.extend(resultado["errores"][:hueco])
+
+        if progreso:
+            progreso(total_filas, total_errores)
+
+    import_token = store.guardar_bloques(bloques, filas_validas)
+
+    return {
+        "import_token": import_token,
+        "total_filas": total_filas,
+        "filas_validas": filas_validas,
+        "total_horas": total_horas,
+        "errores": errores,
+        "total_errores": total_errores,
+    }
+
+
+def confirmar_importacion(
+    db: Session,
+    import_token: str,
+    tamano_lote: Optional[int] = None,
+    progreso: Optional[Progreso] = None,
+) -> Optional[Dict[str, int]]:
+    """
+    Inserta las filas de una previsualización y la elimina del almacén.
+
+    Si se indica progreso, se llama tras insertar cada bloque.
+
+    Returns:
+        {"insertadas", "omitidas"} o None si el token no existe, ha caducado
+        o no tiene filas válidas.
+    """
+    store = get_preview_store()
+    lotes = store.obtener_lotes(import_token)
+    if lotes is None:
+        return None
+
+    insertadas = 0
+    omitidas = 0
+    for lote in lotes:
+        resultado = insertar_horas(db, lote, tamano_lote)
+        insertadas += resultado["insertadas"]
+        omitidas += resultado["omitidas"]
+        if progreso:
+            progreso(insertadas + omitidas, 0)
+
+    if insertadas + omitidas == 0:
+        return None
+
+    store.eliminar(import_token)
+    return {"insertadas": insertadas, "omitidas": omitidas}
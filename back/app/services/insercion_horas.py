@@ -0,0 +1,167 @@
+"""
+Inserción masiva de horas en HORAS_TRAB.
+
+Sustituye el patrón "SELECT de existencia + INSERT de una fila" de
+/confirm-horas por INSERT multi-fila por lotes:
+
+- Cada lote se envía como un único INSERT con varias filas en VALUES.
+- Las filas cuya clave primaria (ID_EMPLEADO, FECHA, ID_PROYECTO) ya existe
+  se descartan antes del INSERT, con una consulta por lote. La sentencia
+  solo tolera además la clave duplicada de una importación simultánea
+  (INSERT IGNORE en MySQL, ON CONFLICT DO NOTHING en SQLite), y el nº de
+  insertadas es el rowcount: las filas de la otra importación no cuentan.
+  INSERT IGNORE convierte también en avisos los errores de clave ajena,
+  NOT NULL o truncado; por eso, si hay más avisos que filas omitidas, el
+  lote se rechaza con FilasRechazadas en lugar de perder esas filas.
+- Se hace commit por lote, de modo que una importación grande no mantiene
+  bloqueos durante toda la carga.
+- El resumen mensual (RESUMEN_HORAS_MES) de las claves del lote se
+  recalcula en la misma transacción que el INSERT.
+
+Como las filas existentes se omiten, reintentar una importación que falló a
+mitad es seguro: los lotes ya confirmados no se duplican.
+"""
+
+import os
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.horas_trab import HorasTrab
+from app.services.claves import clave_id
+from app.services.resumen_horas import clave_resumen, recalcular_claves
+
+
+# Tamaño de lote por defecto (configurable con IMPORT_CHUNK_SIZE)
+TAMANO_LOTE_POR_DEFECTO = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+
+# Aviso de MySQL por clave duplicada (la única que tolera el INSERT IGNORE)
+_AVISO_DUPLICADA = 1062
+
+_COLUMNAS = (
+    "ID_SOCIEDAD",
+    "ID_EMPLEADO",
+    "FECHA",
+    "ID_CLIENTE",
+    "ID_PROYECTO",
+    "HORAS_DIA",
+    "DESC_TAREA",
+    "ESTADO",
+    "ORIGEN",
+)
+
+
+class FilasRechazadas(Exception):
+    """MySQL ha convertido en aviso un error distinto de la clave duplicada."""
+
+
+def _preparar(fila: Dict) -> Dict:
+    valores = {columna: fila.get(columna) for columna in _COLUMNAS}
+    if isinstance(valores["FECHA"], str):
+        valores["FECHA"] = date.fromisoformat(valores["FECHA"][:10])
+    return valores
+
+
+def _clave(id_empleado: str, fecha: date, id_proyecto: str) -> Tuple:
+    # Igual que la clave primaria en MySQL: "e001" es la misma fila que "E001".
+    # Un ID nulo se deja tal cual: es la base de datos la que lo rechaza
+    return (clave_id(id_empleado) if id_empleado is not None else None, fecha,
+            clave_id(id_proyecto) if id_proyecto is not None else None)
+
+
+def _claves_existentes(db: Session, lote: List[Dict]) -> Set[Tuple]:
+    """
+    Consulta en una sola sentencia qué claves del lote ya existen.
+    """
+    claves = {(f["ID_EMPLEADO"], f["FECHA"], f["ID_PROYECTO"]) for f in lote}
+    filas = db.query(HorasTrab.id_empleado, HorasTrab.fecha, HorasTrab.id_proyecto).filter(
+        tuple_(HorasTrab.id_empleado, HorasTrab.fecha, HorasTrab.id_proyecto).in_(claves)
+    )
+    return {_clave(*fila) for fila in filas}
+
+
+def _comprobar_avisos(db: Session, duplicadas: int) -> None:
+    """
+    Cada fila duplicada deja exactamente un aviso 1062: cualquier otro aviso
+    del INSERT IGNORE es un error que MySQL ha dejado pasar.
+    """
+    if db.execute(text("SELECT @@warning_count")).scalar() == duplicadas:
+        return
+    avisos = [
+        f"{codigo}: {mensaje}"
+        for _, codigo, mensaje in db.execute(text("SHOW WARNINGS"))
+        if codigo != _AVISO_DUPLICADA
+    ]
+    raise FilasRechazadas("Filas rechazadas por la base de datos: " + "; ".join(avisos[:5]))
+
+
+def _insertar_lote(db: Session, lote: List[Dict]) -> int:
+    """
+    Inserta un lote con un INSERT multi-fila y devuelve las filas insertadas.
+    """
+    existentes = _claves_existentes(db, lote)
+    nuevas: Dict[Tuple, Dict] = {}
+    for fila in lote:
+        clave = _clave(fila["ID_EMPLEADO"], fila["FECHA"], fila["ID_PROYECTO"])
+        if clave not in existentes and clave not in nuevas:
+            nuevas[clave] = fila
+    if not nuevas:
+        return 0
+
+    tabla = HorasTrab.__table__
+    dialecto = db.get_bind().dialect.name
+
+    if dialecto == "mysql":
+        # El rowcount de INSERT IGNORE son las filas insertadas (no le afecta
+        # CLIENT_FOUND_ROWS, a diferencia de ON DUPLICATE KEY UPDATE)
+        insertadas = db.execute(mysql_insert(tabla).values(list(nuevas.values())).prefix_with("IGNORE")).rowcount
+        _comprobar_avisos(db, len(nuevas) - insertadas)
+        return insertadas
+
+    if dialecto == "sqlite":
+        resultado = db.execute(sqlite_insert(tabla).values(list(nuevas.values())).on_conflict_do_nothing())
+        return resultado.rowcount
+
+    db.execute(tabla.insert().values(list(nuevas.values())))
+    return len(nuevas)
+
+
+def insertar_horas(db: Session, filas: List[Dict], tamano_lote: Optional[int] = None) -> Dict[str, int]:
+    """
+    Inserta las filas validadas por /preview-horas en lotes.
+
+    Args:
+        filas: filas con las claves en mayúsculas (ID_EMPLEADO, FECHA...).
+        tamano_lote: filas por INSERT; por defecto IMPORT_CHUNK_SIZE.
+
+    Returns:
+        {"insertadas", "omitidas", "lotes"}
+    """
+    tamano = tamano_lote or TAMANO_LOTE_POR_DEFECTO
+    insertadas = 0
+    lotes = 0
+
+    for inicio in range(0, len(filas), tamano):
+        lote = [_preparar(fila) for fila in filas[inicio:inicio + tamano]]
+        try:
+            insertadas_lote = _insertar_lote(db, lote)
+            if insertadas_lote:
+                recalcular_claves(db, {
+                    clave_resumen(fila["FECHA"], fila["ID_PROYECTO"], fila["ID_EMPLEADO"]) for fila in lote
+                })
+            db.commit()
+            insertadas += insertadas_lote
+        except Exception:
+            db.rollback()
+            raise
+        lotes += 1
+
+    return {
+        "insertadas": insertadas,
+        "omitidas": len(filas) - insertadas,
+        "lotes": lotes,
+    }
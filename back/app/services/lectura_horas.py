@@ -0,0 +1,143 @@
+"""
+Lectura por lotes de los ficheros de horas del Tracker.
+
+En lugar de cargar el fichero completo con pd.read_excel, se recorre fila a
+fila y se entregan DataFrames de tamaño fijo:
+
+- .xlsx / .xlsm: openpyxl en modo read-only (no carga la hoja en memoria).
+- .csv: pd.read_csv con chunksize (separador detectado automáticamente).
+- .xls: formato antiguo sin lectura en streaming; se lee entero y se trocea.
+
+El índice de cada DataFrame conserva la posición de la fila en el fichero
+(0 = primera fila de datos), igual que pd.read_excel, para que los números de
+fila de los errores sigan siendo los del Excel.
+
+Las filas completamente vacías se descartan.
+"""
+
+import os
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional
+
+import pandas as pd
+from openpyxl import load_workbook
+
+
+# Filas por lote (configurable con IMPORT_BATCH_SIZE)
+TAMANO_LOTE_LECTURA = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+
+
+class FicheroNoLegible(Exception):
+    """El fichero subido no se puede interpretar como Excel/CSV."""
+
+
+def _cabeceras(fila) -> List[str]:
+    return [
+        str(valor) if valor is not None else f"Unnamed: {posicion}"
+        for posicion, valor in enumerate(fila)
+    ]
+
+
+def _leer_xlsx(fichero: BinaryIO, tamano_lote: int) -> Iterator[pd.DataFrame]:
+    libro = load_workbook(fichero, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        try:
+            cabeceras = _cabeceras(next(filas))
+        except StopIteration:
+            return
+
+        ancho = len(cabeceras)
+        datos: List[tuple] = []
+        posiciones: List[int] = []
+
+        for posicion, fila in enumerate(filas):
+            if all(valor is None or (isinstance(valor, str) and not valor.strip()) for valor in fila):
+                continue
+
+            fila = tuple(fila[:ancho]) + (None,) * (ancho - len(fila))
+            datos.append(fila)
+            posiciones.append(posicion)
+
+            if len(datos) >= tamano_lote:
+                yield pd.DataFrame(datos, columns=cabeceras, index=posiciones)
+                datos, posiciones = [], []
+
+        if datos:
+            yield pd.DataFrame(datos, columns=cabeceras, index=posiciones)
+    finally:
+        libro.close()
+
+
+def _leer_csv(fichero: BinaryIO, tamano_lote: int) -> Iterator[pd.DataFrame]:
+    lector = pd.read_csv(
+        fichero,
+        sep=None,
+        engine="python",
+        encoding="utf-8-sig",
+        chunksize=tamano_lote,
+    )
+    with lector:
+        for lote in lector:
+            yield lote.dropna(how="all")
+
+
+def _leer_excel_completo(fichero: BinaryIO, tamano_lote: int) -> Iterator[pd.DataFrame]:
+    df = pd.read_excel(fichero).dropna(how="all")
+    for inicio in range(0, len(df), tamano_lote):
+        yield df.iloc[inicio:inicio + tamano_lote]
+
+
+def estimar_filas(fichero: BinaryIO, nombre: Optional[str]) -> Optional[int]:
+    """
+    Estima el nº de filas de datos sin leer el fichero completo.
+
+    - .xlsx: dimensión declarada en la hoja (puede faltar en algunos ficheros).
+    - .csv: nº de saltos de línea menos la cabecera.
+
+    Deja el fichero posicionado al principio. Devuelve None si no se puede estimar.
+    """
+    extension = Path(nombre or "").suffix.lower()
+    try:
+        if extension == ".csv":
+            lineas = sum(bloque.count(b"\n") for bloque in iter(lambda: fichero.read(1024 * 1024), b""))
+            return max(lineas - 1, 0)
+        if extension in ("", ".xlsx", ".xlsm"):
+            libro = load_workbook(fichero, read_only=True)
+            try:
+                maximo = libro.worksheets[0].max_row
+            finally:
+                libro.close()
+            return max(maximo - 1, 0) if maximo else None
+        return None
+    except Exception:
+        return None
+    finally:
+        fichero.seek(0)
+
+
+def leer_por_lotes(
+    fichero: BinaryIO,
+    nombre: Optional[str],
+    tamano_lote: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Recorre el fichero subido en DataFrames de como mucho tamano_lote filas.
+
+    Raises:
+        FicheroNoLegible: si el fichero no se puede abrir o leer.
+    """
+    tamano = tamano_lote or TAMANO_LOTE_LECTURA
+    extension = Path(nombre or "").suffix.lower()
+
+    if extension == ".csv":
+        lector = _leer_csv
+    elif extension == ".xls":
+        lector = _leer_excel_completo
+    else:
+        lector = _leer_xlsx
+
+    try:
+        yield from lector(fichero, tamano)
+    except Exception as exc:
+        raise FicheroNoLegible(str(exc)) from exc
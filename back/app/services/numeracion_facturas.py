@@ -0,0 +1,204 @@
+"""
+Numeración de facturas: QS{aamm}{secuencia de 4 dígitos}.
+
+Sustituye el "ORDER BY NUM_FACTURA DESC LIMIT 1 + INSERT" de generar_factura,
+que asignaba el mismo número a dos generaciones concurrentes y recorría con
+LIKE todo el histórico del mes.
+
+El último número usado se guarda en SECUENCIAS_FACTURA, una fila por
+prefijo. Reservar consiste en:
+
+    UPDATE SECUENCIAS_FACTURA SET ULTIMO_NUMERO = ULTIMO_NUMERO + n WHERE ...
+
+El UPDATE bloquea la fila hasta el commit, así que las reservas concurrentes
+esperan y reciben rangos consecutivos sin solaparse. Si la transacción que
+crea la factura falla, el rollback deshace también el incremento: no quedan
+huecos en la numeración.
+
+La primera reserva de un prefijo crea la fila partiendo del mayor número que
+ya exista en FACTURAS (facturas anteriores a este módulo).
+
+NUM_FACTURA es la clave de FACTURAS, así que la serie es común a todas las
+sociedades: el contador no depende de ID_SOCIEDAD y las facturas de
+sociedades distintas se reparten números de la misma secuencia.
+
+Uso:
+    reserva = reservar_numeros(db, prefijo_mes(hoy), cantidad)
+    num_factura = reserva.tomar()
+    ...
+    reserva.cerrar()   # devuelve al contador los números no usados
+    db.commit()
+"""
+
+from datetime import date, datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.factura import Factura
+from app.models.secuencia_factura import SecuenciaFactura
+
+
+SERIE = "QS"
+DIGITOS_SECUENCIA = 4
+
+
+def prefijo_mes(fecha: date) -> str:
+    """
+    Prefijo de las facturas emitidas en el mes de la fecha (p. ej. "QS2503").
+    """
+    return f"{SERIE}{fecha.strftime('%y%m')}"
+
+
+def formatear_numero(prefijo: str, secuencia: int) -> str:
+    return f"{prefijo}{secuencia:0{DIGITOS_SECUENCIA}d}"
+
+
+class ReservaNumeros:
+    """
+    Rango de números reservado [primero, ultimo] dentro de la transacción.
+
+    Los números se entregan en orden con tomar(). Mientras la transacción
+    siga abierta, la fila del contador está bloqueada y los números no
+    usados se pueden devolver con cerrar().
+    """
+
+    def __init__(self, db: Session, prefijo: str, primero: int, ultimo: int):
+        self._db = db
+        self.prefijo = prefijo
+        self.primero = primero
+        self.ultimo = ultimo
+        self._siguiente = primero
+
+    @property
+    def usados(self) -> int:
+        return self._siguiente - self.primero
+
+    @property
+    def disponibles(self) -> int:
+        return self.ultimo - self._siguiente + 1
+
+    def tomar(self) -> str:
+        """
+        Devuelve el siguiente número del rango.
+        """
+        if self._siguiente > self.ultimo:
+            raise ValueError("No quedan números reservados")
+        secuencia = self._siguiente
+        self._siguiente += 1
+        return formatear_numero(self.prefijo, secuencia)
+
+    def devolver(self, num_factura: str) -> None:
+        """
+        Devuelve el último número tomado (p. ej. si su factura falló),
+        para que lo reciba la siguiente.
+        """
+        if num_factura != formatear_numero(self.prefijo, self._siguiente - 1) or not self.usados:
+            raise ValueError("Solo se puede devolver el último número tomado")
+        self._siguiente -= 1
+
+    def cerrar(self) -> int:
+        """
+        Devuelve al contador los números reservados que no se han usado.
+
+        Returns:
+            cantidad de números devueltos.
+        """
+        sobrantes = self.disponibles
+        if sobrantes:
+            self._db.execute(
+                update(SecuenciaFactura)
+                .where(
+                    SecuenciaFactura.prefijo == self.prefijo,
+                    SecuenciaFactura.ultimo_numero == self.ultimo,
+                )
+                .values(ultimo_numero=self._siguiente - 1, fec_actualizacion=datetime.utcnow())
+            )
+            self.ultimo = self._siguiente - 1
+        return sobrantes
+
+
+# ============================================================
+# CONTADOR
+# ============================================================
+
+def _ultimo_existente(db: Session, prefijo: str) -> int:
+    """
+    Mayor secuencia ya usada en FACTURAS para el prefijo (0 si no hay).
+
+    Solo cuentan los números con la forma prefijo + dígitos: el LIKE también
+    devuelve números del histórico con otro formato (sufijos, letras...),
+    que no pueden coincidir con uno generado aquí y se ignoran. El máximo se
+    calcula sobre el valor numérico, no sobre el texto.
+    """
+    numeros = db.execute(
+        select(Factura.num_factura).where(Factura.num_factura.like(f"{prefijo}%"))
+    ).scalars()
+    secuencias = [
+        int(sufijo)
+        for sufijo in (numero[len(prefijo):] for numero in numeros)
+        if sufijo.isascii() and sufijo.isdigit()
+    ]
+    return max(secuencias, default=0)
+
+
+def _crear_contador(db: Session, prefijo: str) -> None:
+    """
+    Crea la fila del contador si no existe. Si otra transacción la crea a la
+    vez, solo se omite la clave duplicada y ambas comparten la misma fila.
+    """
+    valores = {
+        "PREFIJO": prefijo,
+        "ULTIMO_NUMERO": _ultimo_existente(db, prefijo),
+        "FEC_ACTUALIZACION": datetime.utcnow(),
+    }
+    tabla = SecuenciaFactura.__table__
+    dialecto = db.get_bind().dialect.name
+
+    if dialecto == "mysql":
+        db.execute(mysql_insert(tabla).values(valores).on_duplicate_key_update(PREFIJO=tabla.c.PREFIJO))
+    elif dialecto == "sqlite":
+        db.execute(sqlite_insert(tabla).values(valores).on_conflict_do_nothing())
+    else:
+        try:
+            with db.begin_nested():
+                db.execute(tabla.insert().values(valores))
+        except IntegrityError:
+            pass
+
+
+def _incrementar(db: Session, prefijo: str, cantidad: int) -> int:
+    return db.execute(
+        update(SecuenciaFactura)
+        .where(SecuenciaFactura.prefijo == prefijo)
+        .values(
+            ultimo_numero=SecuenciaFactura.ultimo_numero + cantidad,
+            fec_actualizacion=datetime.utcnow(),
+        )
+    ).rowcount
+
+
+def reservar_numeros(db: Session, prefijo: str, cantidad: int = 1) -> ReservaNumeros:
+    """
+    Reserva `cantidad` números consecutivos del prefijo (para cualquier
+    sociedad).
+
+    No hace commit: la reserva queda ligada a la transacción del llamante y
+    la fila del contador permanece bloqueada hasta su commit o rollback.
+    """
+    if cantidad < 1:
+        raise ValueError("La cantidad a reservar debe ser positiva")
+
+    if not _incrementar(db, prefijo, cantidad):
+        _crear_contador(db, prefijo)
+        _incrementar(db, prefijo, cantidad)
+
+    ultimo = db.execute(
+        select(SecuenciaFactura.ultimo_numero).where(SecuenciaFactura.prefijo == prefijo)
+    ).scalar_one()
+
+    return ReservaNumeros(db, prefijo, ultimo - cantidad + 1, ultimo)
+
@@ -0,0 +1,251 @@
+"""
+Descarga de los PDF de muchas facturas en un ZIP
+(GET /api/facturas/pdf-bundle).
+
+1. La ruta lee las facturas del periodo y prepara el paquete
+   (preparar_paquete). Las que ya tienen PDF en el almacén
+   (app/services/almacen_pdf.py) se copian de disco. Para el resto se leen
+   los datos de cliente y banco en bloque (pdf_factura.datos_facturas).
+   Toda la lectura de la BBDD termina antes de empezar a enviar el ZIP.
+2. Los PDF que faltan se generan en un pool de procesos: ReportLab es
+   CPU y retiene el GIL, así que con hilos no se generan en paralelo. Se
+   envían como mucho 2 x FACTURAS_PDF_PROCESOS a la vez al pool, para no
+   acumular PDF en memoria si el cliente descarga despacio.
+3. El ZIP se escribe en streaming: cada PDF se añade en cuanto está listo
+   y sus bytes se envían, sin construir el archivo entero en memoria. Los
+   PDF generados se guardan también en el almacén.
+4. Al final se añade resumen.json con el nº de PDF, los errores y el
+   rendimiento (PDF por segundo).
+
+Los PDF ya van comprimidos, así que el ZIP los guarda sin comprimir
+(ZIP_STORED).
+
+Configuración (.env):
+    FACTURAS_PDF_PROCESOS    procesos del pool (por defecto, nº de CPU hasta 4; 0 = sin pool)
+    FACTURAS_PDF_BUNDLE_MAX  nº máximo de facturas por paquete (por defecto 2000)
+    FACTURAS_PDF_MP_CONTEXT  arranque de los procesos: spawn (por defecto), forkserver o fork
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.factura import Factura
+from app.services.almacen_pdf import Artefacto, buscar, guardar, huella_factura
+from app.services.pdf_factura import datos_facturas, renderizar
+
+
+PROCESOS = int(os.getenv("FACTURAS_PDF_PROCESOS", str(min(4, os.cpu_count() or 1))))
+BUNDLE_MAX = int(os.getenv("FACTURAS_PDF_BUNDLE_MAX", "2000"))
+MP_CONTEXT = os.getenv("FACTURAS_PDF_MP_CONTEXT", "spawn").strip() or "spawn"
+
+
+def nombre_pdf(num_factura: str) -> str:
+    return f"factura_{num_factura}.pdf"
+
+
+# ============================================================
+# POOL DE PROCESOS
+# ============================================================
+# Un pool por proceso de la API, creado en el primer uso. "spawn" evita
+# heredar por fork los hilos y conexiones abiertas del servidor, pero
+# reimporta el script principal en cada proceso: si el servidor se arranca
+# desde un script sin `if __name__ == "__main__"`, usar "fork".
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _obtener_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PROCESOS, mp_context=multiprocessing.get_context(MP_CONTEXT))
+        return _pool
+
+
+def _descartar_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class _Renderizador:
+    """
+    Genera los PDF de `pendientes` [(num_factura, huella, datos)] en el pool.
+    iniciar() envía el primer bloque sin esperar; al recorrerlo devuelve
+    (num_factura, huella, pdf, error) según terminan.
+    """
+
+    def __init__(self, pendientes: List[Tuple[str, str, Dict]]):
+        self._cola = iter(pendientes)
+        self._en_curso = {}
+        self._pool = None
+
+    def _rellenar(self) -> None:
+        for num_factura, huella, datos in self._cola:
+            self._en_curso[self._pool.submit(renderizar, datos)] = (num_factura, huella)
+            if len(self._en_curso) >= 2 * PROCESOS:
+                return
+
+    def iniciar(self) -> None:
+        if PROCESOS > 0:
+            self._pool = _obtener_pool()
+            self._rellenar()
+
+    def cancelar(self) -> None:
+        # Descarga interrumpida: no seguir generando PDF que nadie va a leer
+        for futuro in self._en_curso:
+            futuro.cancel()
+        self._en_curso.clear()
+
+    def __iter__(self) -> Iterator[Tuple[str, str, Optional[bytes], Optional[str]]]:
+        if self._pool is None:
+            for num_factura, huella, datos in self._cola:
+                try:
+                    yield num_factura, huella, renderizar(datos), None
+                except Exception as exc:
+                    yield num_factura, huella, None, str(exc) or exc.__class__.__name__
+            return
+
+        while self._en_curso:
+            hechos, _ = wait(self._en_curso, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                num_factura, huella = self._en_curso.pop(futuro)
+                try:
+                    pdf = futuro.result()
+                except BrokenProcessPool:
+                    # Un proceso murió (memoria, señal...): el siguiente paquete crea otro pool
+                    _descartar_pool()
+                    raise
+                except Exception as exc:
+                    yield num_factura, huella, None, str(exc) or exc.__class__.__name__
+                    continue
+                yield num_factura, huella, pdf, None
+            self._rellenar()
+
+
+# ============================================================
+# ZIP EN STREAMING
+# ============================================================
+
+class _Sumidero:
+    """
+    Destino de ZipFile que acumula lo escrito hasta el siguiente vaciar().
+    Sin seek ni tell, ZipFile escribe en modo streaming (descriptores de
+    datos tras cada fichero).
+    """
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+
+    def write(self, datos) -> int:
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self) -> None:
+        pass
+
+    def vaciar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+@dataclass
+class Paquete:
+    guardadas: List[Tuple[str, Artefacto]] = field(default_factory=list)
+    pendientes: List[Tuple[str, str, Dict]] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return len(self.guardadas) + len(self.pendientes)
+
+    def generar(self) -> Iterator[bytes]:
+        """
+        Bytes del ZIP, trozo a trozo (un PDF por trozo).
+        """
+        inicio = time.perf_counter()
+        errores = []
+        copiadas = 0
+        renderizadas = 0
+        sumidero = _Sumidero()
+
+        renderizador = _Renderizador(self.pendientes)
+        try:
+            with zipfile.ZipFile(sumidero, "w", compression=zipfile.ZIP_STORED) as archivo:
+                # El pool genera los PDF que faltan mientras se copian los guardados
+                renderizador.iniciar()
+                for num_factura, artefacto in self.guardadas:
+                    try:
+                        archivo.write(artefacto.ruta, nombre_pdf(num_factura))
+                    except OSError as exc:
+                        # Borrado entre la preparación y la copia (regenerado por otro worker)
+                        errores.append({"num_factura": num_factura, "detalle": str(exc)})
+                        continue
+                    yield sumidero.vaciar()
+                    copiadas += 1
+
+                for num_factura, huella, pdf, error in renderizador:
+                    if error is not None:
+                        errores.append({"num_factura": num_factura, "detalle": error})
+                        continue
+                    archivo.writestr(nombre_pdf(num_factura), pdf)
+                    yield sumidero.vaciar()
+                    renderizadas += 1
+                    try:
+                        guardar(num_factura, huella, pdf)
+                    except OSError:
+                        # Sin almacén el paquete sigue siendo válido
+                        pass
+
+                segundos = time.perf_counter() - inicio
+                generados = copiadas + renderizadas
+                resumen = {
+                    "facturas": self.total,
+                    "pdfs": generados,
+                    "desde_almacen": copiadas,
+                    "renderizadas": renderizadas,
+                    "errores": errores,
+                    "procesos": PROCESOS,
+                    "segundos": round(segundos, 3),
+                    "pdfs_por_segundo": round(generados / segundos, 2) if segundos else None,
+                }
+                archivo.writestr("resumen.json", json.dumps(resumen, ensure_ascii=False, indent=2))
+        finally:
+            renderizador.cancelar()
+
+        yield sumidero.vaciar()
+
+
+def preparar_paquete(db: Session, facturas: List[Factura]) -> Paquete:
+    """
+    Separa las facturas con PDF vigente en el almacén de las que hay que
+    generar, y lee los datos de estas últimas.
+    """
+    paquete = Paquete()
+    sin_pdf = []
+    huellas = {}
+    for factura in facturas:
+        huella = huella_factura(factura)
+        artefacto = buscar(factura.num_factura, huella)
+        if artefacto is not None:
+            paquete.guardadas.append((factura.num_factura, artefacto))
+        else:
+            sin_pdf.append(factura)
+            huellas[factura.num_factura] = huella
+
+    datos = datos_facturas(db, sin_pdf) if sin_pdf else {}
+    paquete.pendientes = [(f.num_factura, huellas[f.num_factura], datos[f.num_factura]) for f in sin_pdf]
+    return paquete
@@ -0,0 +1,236 @@
+"""
+Generación del PDF de una factura (GET /api/factura/pdf/{num_factura}).
+
+Separa la lectura de datos del dibujo:
+
+- datos_factura(db, factura) / datos_facturas(db, facturas): leen el
+  cliente y su banco y devuelven diccionarios con valores simples (sin
+  objetos ORM ni sesión).
+- renderizar(datos): construye el documento ReportLab y devuelve los bytes
+  del PDF. No toca la base de datos, así que puede ejecutarse en otro
+  proceso (app/services/paquete_pdf.py). Las partes fijas (estilos, logo,
+  datos de la empresa) vienen ya construidas de
+  app/services/plantilla_factura.py.
+
+Los PDF ya generados se guardan en app/services/almacen_pdf.py; este módulo
+solo se usa cuando falta el artefacto.
+"""
+
+import io
+from typing import Dict, List, Optional
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+from sqlalchemy.orm import Session
+
+from app.models.banco import Banco
+from app.models.cliente import Cliente
+from app.models.factura import Factura
+from app.services.plantilla_factura import PLANTILLA, Plantilla
+
+
+# Sube al cambiar el diseño: invalida todos los PDF guardados (almacen_pdf.py)
+VERSION_PLANTILLA = "1"
+
+
+# ============================================================
+# DATOS
+# ============================================================
+
+def datos_facturas(db: Session, facturas: List[Factura]) -> Dict[str, Dict]:
+    """
+    Datos que aparecen en el PDF de cada factura, por num_factura. Lee los
+    clientes y sus bancos con una consulta para cada tabla.
+    """
+    ids_cliente = {f.id_cliente for f in facturas}
+    clientes = {
+        c.id_cliente: c
+        for c in db.query(Cliente).filter(Cliente.id_cliente.in_(ids_cliente))
+    } if ids_cliente else {}
+
+    ids_banco = {c.id_banco_cobro for c in clientes.values() if c.id_banco_cobro}
+    bancos = {
+        b.id_banco_cobro: b
+        for b in db.query(Banco).filter(Banco.id_banco_cobro.in_(ids_banco))
+    } if ids_banco else {}
+
+    resultado = {}
+    for factura in facturas:
+        cliente = clientes.get(factura.id_cliente)
+        banco = bancos.get(cliente.id_banco_cobro) if cliente and cliente.id_banco_cobro else None
+        resultado[factura.num_factura] = {
+            "num_factura": factura.num_factura,
+            "fec_factura": factura.fec_factura,
+            "concepto": factura.concepto,
+            "base_imponible": float(factura.base_imponible),
+            "cliente": {
+                "n_cliente": cliente.n_cliente,
+                "direccion": cliente.direccion,
+                "cif": cliente.cif,
+                "telefono": cliente.telefono,
+            } if cliente else None,
+            "banco": {
+                "n_banco_cobro": banco.n_banco_cobro,
+                "num_cuenta": banco.num_cuenta,
+                "codigo_iban": banco.codigo_iban,
+            } if banco else None,
+        }
+    return resultado
+
+
+def datos_factura(db: Session, factura: Factura) -> Dict:
+    return datos_facturas(db, [factura])[factura.num_factura]
+
+
+# ============================================================
+# PDF (IGUAL A LA PLANTILLA ORIGINAL)
+# ============================================================
+
+def renderizar(datos: Dict, plantilla: Optional[Plantilla] = None) -> bytes:
+    """
+    Bytes del PDF de la factura a partir de datos_factura(). Las partes
+    fijas salen de `plantilla` (por defecto PLANTILLA, construida una vez).
+    """
+    p = plantilla or PLANTILLA
+    normal = p.normal
+    cliente: Optional[Dict] = datos["cliente"]
+    banco: Optional[Dict] = datos["banco"]
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=40,
+        rightMargin=40,
+        topMargin=40,
+        bottomMargin=40,
+    )
+
+    elements = []
+
+    # ============================================================
+    # LOGO + DATOS FACTURA
+    # ============================================================
+
+    datos_cabecera = [
+        [p.fijo("<b>Factura</b>")],
+        [Paragraph(f"<b>N° Factura:</b> {datos['num_factura']}", normal)],
+        [Paragraph(f"<b>Fecha de impresión:</b> {datos['fec_factura'].strftime('%d-%m-%Y')}", normal)],
+    ]
+
+    tabla_datos_factura = Table(datos_cabecera, colWidths=[200], hAlign='RIGHT')
+    tabla_datos_factura.setStyle(p.estilo_datos_factura)
+
+    tabla_superior = Table([[p.logo(), tabla_datos_factura]], colWidths=[200, 300])
+    tabla_superior.setStyle(p.estilo_arriba)
+
+    elements.append(tabla_superior)
+    elements.append(Spacer(1, 20))
+
+    # ============================================================
+    # DATOS EMPRESA + DATOS CLIENTE (EN DOS COLUMNAS)
+    # ============================================================
+
+    # Datos dinámicos del cliente
+    cliente_info = [
+        [p.fijo("<b>Cliente</b>")],
+        [Paragraph(f"<b>{cliente['n_cliente']}</b>", normal)],
+    ]
+
+    if cliente['direccion']:
+        cliente_info.append([Paragraph(cliente['direccion'], normal)])
+    if cliente['cif']:
+        cliente_info.append([Paragraph(f"CIF/NIF: {cliente['cif']}", normal)])
+    if cliente['telefono']:
+        cliente_info.append([Paragraph(f"ATT: {cliente['telefono']}", normal)])
+
+    tabla_cliente = Table(
+        cliente_info,
+        colWidths=[250],
+        hAlign='LEFT'
+    )
+    tabla_cliente.setStyle(p.estilo_cliente)
+
+    # Crear tabla de dos columnas
+    tabla_empresa_cliente = Table(
+        [
+            [tabla_cliente, p.tabla_empresa()]
+        ],
+        colWidths=[260, 260]
+    )
+    tabla_empresa_cliente.setStyle(p.estilo_arriba)
+
+    elements.append(tabla_empresa_cliente)
+    elements.append(Spacer(1, 20))
+
+    # ============================================================
+    # TABLA PRINCIPAL (DESCRIPCIÓN)
+    # ============================================================
+
+    base = datos["base_imponible"]
+    iva = round(base * 0.21, 2)
+    total = base + iva
+
+    tabla_lineas = Table([
+        ["DESCRIPCIÓN", "IVA", "BASE IMPONIBLE", "TOTAL"],
+        [datos["concepto"], f"{iva:.2f}", f"{base:.2f}", f"{total:.2f}"],
+    ], colWidths=[220, 60, 100, 100])
+    tabla_lineas.setStyle(p.estilo_lineas)
+
+    elements.append(tabla_lineas)
+    elements.append(Spacer(1, 20))
+
+    # ============================================================
+    # DATOS BANCARIOS (DINÁMICOS)
+    # ============================================================
+
+    elements.append(p.fijo("<b>Pago mediante transferencia a la cuenta bancaria siguiente:</b>"))
+    elements.append(Spacer(1, 5))
+
+    if banco:
+        datos_banco = [
+            f"Banco: {banco['n_banco_cobro']}",
+            f"Número cuenta: {banco['num_cuenta'] or '—'}",
+            f"Código IBAN: {banco['codigo_iban'] or '—'}",
+        ]
+    else:
+        datos_banco = [
+            "Banco: —",
+            "Número cuenta: —",
+            "Código IBAN: —",
+        ]
+
+    for linea in datos_banco:
+        elements.append(Paragraph(linea, normal))
+
+    elements.append(Spacer(1, 20))
+
+    # ============================================================
+    # TOTALES
+    # ============================================================
+
+    tabla_totales = Table([
+        ["TOTAL IVA 21%", f"{iva:.2f}"],
+        ["TOTAL BASE IMPONIBLE", f"{base:.2f}"],
+        ["TOTAL FACTURA", f"{total:.2f}"],
+    ], colWidths=[250, 150])
+    tabla_totales.setStyle(p.estilo_totales)
+
+    elements.append(tabla_totales)
+    #espacio entre la firma y la tabla
+    elements.append(Spacer(1, 40))
+
+    # ============================================================
+    # FIRMA (ALINEADA A LA DERECHA)
+    # ============================================================
+
+    tabla_firma = Table(
+        [[p.firma()]],
+        colWidths=[450]  # empuja la firma hacia la derecha
+    )
+    tabla_firma.setStyle(p.estilo_firma)
+
+    elements.append(tabla_firma)
+
+    doc.build(elements)
+    return buffer.getvalue()
@@ -0,0 +1,89 @@
+"""
+Filtros de periodo sobre columnas de fecha.
+
+Convierte (año, mes) o un intervalo de fechas en un rango semiabierto
+[inicio, fin) y genera la condición columna >= inicio AND columna < fin.
+
+A diferencia de extract("year"/"month", columna), esta condición permite a
+MySQL usar los índices sobre FECHA / FEC_FACTURA en lugar de recorrer la
+tabla completa.
+"""
+
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import and_, true
+
+
+Rango = Tuple[Optional[date], Optional[date]]
+
+
+def rango_mes(anio: int, mes: int) -> Tuple[date, date]:
+    """
+    Devuelve (primer día del mes, primer día del mes siguiente).
+    """
+    if mes < 1 or mes > 12:
+        raise ValueError("Mes inválido (1-12)")
+    inicio = date(anio, mes, 1)
+    return inicio, inicio + timedelta(days=monthrange(anio, mes)[1])
+
+
+def rango_fechas(desde: Optional[date] = None, hasta: Optional[date] = None) -> Rango:
+    """
+    Convierte un intervalo con ambos extremos incluidos en [desde, hasta + 1 día).
+    """
+    if desde and hasta and desde > hasta:
+        raise ValueError("La fecha 'desde' no puede ser posterior a 'hasta'")
+    return desde, (hasta + timedelta(days=1)) if hasta else None
+
+
+def rango_periodo(
+    anio: Optional[int] = None,
+    mes: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+) -> Optional[Rango]:
+    """
+    Resuelve los parámetros de periodo habituales de los endpoints.
+
+    - anio + mes: ese mes.
+    - solo anio: el año completo.
+    - desde / hasta: intervalo (cualquiera de los dos puede faltar).
+
+    Devuelve None si no se indicó ningún periodo.
+    """
+    if mes is not None and anio is None:
+        raise ValueError("Para filtrar por mes hay que indicar también el año")
+    if anio is not None and (desde or hasta):
+        raise ValueError("Usa anio/mes o desde/hasta, no ambos")
+
+    if anio is not None and mes is not None:
+        return rango_mes(anio, mes)
+    if anio is not None:
+        return date(anio, 1, 1), date(anio + 1, 1, 1)
+    if desde or hasta:
+        return rango_fechas(desde, hasta)
+    return None
+
+
+def filtro_rango(columna, rango: Optional[Rango]):
+    """
+    Condición columna >= inicio AND columna < fin (extremos opcionales).
+    """
+    if not rango:
+        return true()
+    inicio, fin = rango
+    condiciones = []
+    if inicio is not None:
+        condiciones.append(columna >= inicio)
+    if fin is not None:
+        condiciones.append(columna < fin)
+    return and_(true(), *condiciones)
+
+
+def filtro_mes(columna, anio: int, mes: int):
+    """
+    Atajo para filtrar una columna de fecha por (año, mes).
+    """
+    return filtro_rango(columna, rango_mes(anio, mes))
@@ -0,0 +1,210 @@
+"""
+Plantilla del PDF de factura (app/services/pdf_factura.py).
+
+Las partes fijas del documento se construyen una sola vez por proceso, al
+importar el módulo, en lugar de en cada PDF:
+
+- Estilos de párrafo: copias de getSampleStyleSheet() con los tamaños de
+  la factura. La hoja de ejemplo no se modifica.
+- TableStyle de cada tabla.
+- Textos fijos (datos de la empresa, firma, títulos) con el marcado ya
+  analizado: en cada PDF solo se crean los Paragraph.
+- Logo: la imagen se lee, se descomprime y se codifica para PDF una vez
+  (era más del 90% del tiempo de cada PDF). Cada documento recibe una copia
+  del objeto ya codificado, con el mismo nombre que le daría
+  Canvas.drawImage, así que el PDF sale idéntico.
+
+Los flowables (Paragraph, Table, Image) guardan estado al maquetarse, así
+que no se comparten entre documentos: se crean en cada PDF a partir de
+estas piezas, y se pueden generar varios PDF a la vez en hilos distintos.
+"""
+
+import copy
+from pathlib import Path
+from typing import List, Optional
+
+from reportlab.graphics.shapes import Drawing, Rect, String
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.utils import ImageReader, _digester
+from reportlab.pdfbase.pdfdoc import PDFImageXObject
+from reportlab.platypus import Flowable, Image, Paragraph, Table, TableStyle
+
+
+_RAIZ_REPO = Path(__file__).resolve().parents[3]
+ICON_PATH = _RAIZ_REPO / "front" / "public" / "icon.png"
+LEGACY_LOGO_PATH = Path(__file__).resolve().parents[1] / "static" / "logo.png"
+
+EMPRESA = [
+    "QUALITY SOLUTION CONSULTING SL",
+    "CIF/NIF: B86884707",
+    "Calle Henri Dunant Nº 15-17 Oficina 16",
+    "28036 Madrid",
+    "España",
+    "Teléfono: 91 565 42 48",
+    "Email: facturacion@qualitysolution.es",
+    "Web: http://www.qualitysolution.consulting/",
+]
+
+FIRMA = [
+    "<b>QUALITY SOLUTION CONSULTING SL</b>",
+    "C.I.F. B-86884707",
+]
+
+
+def ruta_logo() -> Optional[Path]:
+    # Si el logo existe → usarlo; si no → placeholder
+    for ruta in (ICON_PATH, LEGACY_LOGO_PATH):
+        if ruta.exists():
+            return ruta
+    return None
+
+
+def _placeholder_imagen(width=140, height=55):
+    d = Drawing(width, height)
+    d.add(Rect(0, 0, width, height, strokeColor=colors.grey, fillColor=None))
+    d.add(String(width / 2 - 20, height / 2 - 5, "Imagen", fontSize=10))
+    return d
+
+
+# ============================================================
+# LOGO
+# ============================================================
+
+class _Logo(Image):
+    """
+    Image del logo con la imagen ya codificada para PDF. Se usa una copia
+    (copy.copy) en cada documento.
+
+    Usa partes internas de ReportLab (_digester, Canvas._setXObjects,
+    PDFImageXObject): la versión está acotada en requirements.txt y
+    tests/test_plantilla_factura.py comprueba que el PDF sale igual que con
+    el flowable Image. Ejecutar las pruebas antes de ampliar el rango.
+    """
+
+    def __init__(self, ruta: Path):
+        super().__init__(str(ruta), width=140, height=55, kind="proportional")
+        self._img = ImageReader(str(ruta))
+        self._setup_inner()
+
+        # Mismo nombre que calcula Canvas.drawImage para un ImageReader
+        datos = self._img.getRGBData()
+        alfa = self._img._dataA
+        mascara = alfa.getRGBData() if self._mask == "auto" and alfa else str(self._mask).encode("utf8")
+        self._nombre = _digester(datos + mascara)
+        self._xobject = PDFImageXObject(self._nombre, self._img, mask=self._mask)
+
+    def draw(self):
+        # Registra el objeto ya codificado como lo haría drawImage la primera
+        # vez; drawImage lo encuentra y solo lo coloca en la página.
+        canv = self.canv
+        doc = canv._doc
+        nombre = doc.getXObjectName(self._nombre)
+        if nombre not in doc.idToObject:
+            imagen = copy.copy(self._xobject)
+            alfa = imagen.__dict__.pop("_smask", None)
+            canv._setXObjects(imagen)
+            doc.Reference(imagen, nombre)
+            doc.addForm(self._nombre, imagen)
+            if alfa is not None:
+                alfa = copy.copy(alfa)
+                canv._setXObjects(alfa)
+                imagen.smask = doc.Reference(alfa, doc.getXObjectName(alfa.name))
+        super().draw()
+
+
+# ============================================================
+# PLANTILLA
+# ============================================================
+
+class Plantilla:
+    """
+    Partes fijas del PDF de factura. Construir una es caro (lee el logo):
+    usar PLANTILLA.
+    """
+
+    def __init__(self, logo: Optional[Path] = None):
+        estilos = getSampleStyleSheet()
+        self.normal = ParagraphStyle("FacturaNormal", parent=estilos["Normal"], fontSize=10)
+        self.negrita = ParagraphStyle("FacturaNegrita", parent=estilos["Heading4"], fontSize=12)
+
+        self._logo = _Logo(logo) if logo else None
+
+        self._fijos = {}
+        for texto, estilo in [
+            *((t, self.normal) for t in [*EMPRESA, *FIRMA, "<b>Factura</b>",
+                                         "<b>Pago mediante transferencia a la cuenta bancaria siguiente:</b>"]),
+            ("<b>Cliente</b>", self.negrita),
+        ]:
+            parrafo = Paragraph(texto, estilo)
+            self._fijos[texto] = (parrafo.frags, parrafo.style)
+
+        self.estilo_datos_factura = TableStyle([
+            ("ALIGN", (0, 0), (-1, -1), "RIGHT"),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+        ])
+        self.estilo_arriba = TableStyle([
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ])
+        self.estilo_empresa = TableStyle([
+            ('BACKGROUND', (0,0), (-1,-1), colors.lightgrey),
+            ('BOX', (0,0), (-1,-1), 1, colors.black),
+            ('INNERGRID', (0,0), (-1,-1), 0.5, colors.grey),
+            ('LEFTPADDING', (0,0), (-1,-1), 6),
+            ('RIGHTPADDING', (0,0), (-1,-1), 6),
+            ('TOPPADDING', (0,0), (-1,-1), 4),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
+        ])
+        self.estilo_cliente = TableStyle([
+            ('BOX', (0,0), (-1,-1), 1, colors.black),
+            ('LEFTPADDING', (0,0), (-1,-1), 6),
+            ('RIGHTPADDING', (0,0), (-1,-1), 6),
+            ('TOPPADDING', (0,0), (-1,-1), 4),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
+        ])
+        self.estilo_lineas = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+            ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
+        ])
+        self.estilo_totales = TableStyle([
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+            ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+            # Fondo gris y negrita para TOTAL
+            ("BACKGROUND", (0, 2), (-1, 2), colors.lightgrey),
+            ("FONTNAME", (0, 2), (-1, 2), "Helvetica-Bold"),
+        ])
+        self.estilo_firma = TableStyle([
+            ("ALIGN", (0, 0), (-1, -1), "RIGHT"),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ])
+
+    # ------------------------------------------------------------
+    # Flowables nuevos para cada documento
+    # ------------------------------------------------------------
+
+    def logo(self) -> Flowable:
+        return copy.copy(self._logo) if self._logo else _placeholder_imagen()
+
+    def fijo(self, texto: str) -> Paragraph:
+        """
+        Paragraph de un texto fijo, sin volver a analizar el marcado.
+        """
+        frags, estilo = self._fijos[texto]
+        return Paragraph(texto, estilo, frags=frags)
+
+    def tabla_empresa(self) -> Table:
+        tabla = Table(
+            [[self.fijo(texto)] for texto in EMPRESA],
+            colWidths=[250],
+            hAlign='RIGHT'
+        )
+        tabla.setStyle(self.estilo_empresa)
+        return tabla
+
+    def firma(self) -> List[List[Paragraph]]:
+        return [[self.fijo(texto)] for texto in FIRMA]
+
+
+PLANTILLA = Plantilla(ruta_logo())
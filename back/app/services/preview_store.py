@@ -0,0 +1,408 @@
+"""
+Almacén de previsualizaciones de importación (/preview-horas → /confirm-horas).
+
+Sustituye al diccionario _PREVIEW_CACHE del proceso, que crecía sin límite y
+no se compartía entre workers. Ofrece dos backends intercambiables:
+
+- MemoryPreviewStore: en memoria del proceso (desarrollo, un solo worker).
+- SQLitePreviewStore: fichero SQLite compartido por todos los workers de la
+  máquina; las previsualizaciones sobreviven a saltos de worker y reinicios.
+
+Ambos aplican caducidad (TTL), un límite de entradas y de bytes, y expulsan
+la entrada usada hace más tiempo (LRU) cuando se supera el límite. Una
+previsualización que por sí sola supera el límite de bytes se rechaza con
+PreviewDemasiadoGrande (no se guarda ni expulsa a las demás).
+
+Las filas se guardan en formato columnar comprimido (JSON + zlib): una lista
+por columna y un único valor para las columnas constantes (ID_SOCIEDAD,
+ESTADO, ORIGEN...), en lugar de una lista de diccionarios. Una
+previsualización puede tener varios bloques (uno por lote leído del fichero),
+lo que permite guardarla y recorrerla sin descomprimirla entera. El nº total
+de filas se guarda junto al blob, de modo que contarlas no lo lee.
+
+Configuración (.env):
+    PREVIEW_STORE        memory | sqlite (por defecto sqlite)
+    PREVIEW_STORE_PATH   ruta del fichero SQLite
+    PREVIEW_TTL_SECONDS  segundos de vida de una previsualización
+    PREVIEW_MAX_ENTRIES  nº máximo de previsualizaciones guardadas
+    PREVIEW_MAX_BYTES    tamaño máximo (comprimido) del almacén
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import closing
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+
+TTL_POR_DEFECTO = int(os.getenv("PREVIEW_TTL_SECONDS", "3600"))
+MAX_ENTRADAS_POR_DEFECTO = int(os.getenv("PREVIEW_MAX_ENTRIES", "50"))
+MAX_BYTES_POR_DEFECTO = int(os.getenv("PREVIEW_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+class PreviewDemasiadoGrande(Exception):
+    """La previsualización comprimida supera el tamaño máximo del almacén."""
+
+
+# ============================================================
+# SERIALIZACIÓN COLUMNAR
+# ============================================================
+
+def serializar_filas(filas: List[Dict]) -> bytes:
+    """
+    Convierte una lista de filas en un bloque columnar comprimido.
+    """
+    columnas: List[str] = list(filas[0].keys()) if filas else []
+    datos: Dict[str, Dict] = {}
+
+    for columna in columnas:
+        valores = [fila.get(columna) for fila in filas]
+        primero = valores[0]
+        if all(valor == primero for valor in valores):
+            datos[columna] = {"constante": primero}
+        else:
+            datos[columna] = {"valores": valores}
+
+    bloque = {"filas": len(filas), "columnas": columnas, "datos": datos}
+    return zlib.compress(json.dumps(bloque, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def deserializar_filas(blob: bytes) -> List[Dict]:
+    """
+    Reconstruye la lista de filas a partir de serializar_filas.
+    """
+    bloque = json.loads(zlib.decompress(blob).decode("utf-8"))
+    total = bloque["filas"]
+
+    series = []
+    for columna in bloque["columnas"]:
+        dato = bloque["datos"][columna]
+        if "constante" in dato:
+            series.append([dato["constante"]] * total)
+        else:
+            series.append(dato["valores"])
+
+    return [dict(zip(bloque["columnas"], valores)) for valores in zip(*series)] if series else []
+
+
+def empaquetar_bloques(bloques: Iterable[bytes]) -> bytes:
+    """
+    Une varios bloques serializados, cada uno precedido de su longitud.
+    """
+    return b"".join(len(bloque).to_bytes(4, "big") + bloque for bloque in bloques)
+
+
+def desempaquetar_bloques(blob: bytes) -> Iterator[bytes]:
+    posicion = 0
+    while posicion < len(blob):
+        longitud = int.from_bytes(blob[posicion:posicion + 4], "big")
+        posicion += 4
+        yield blob[posicion:posicion + longitud]
+        posicion += longitud
+
+
+# ============================================================
+# INTERFAZ
+# ============================================================
+
+class PreviewStore(ABC):
+    """
+    Interfaz común de los almacenes de previsualizaciones.
+    """
+
+    def __init__(self, ttl: int, max_entradas: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+
+    def guardar(self, filas: List[Dict]) -> str:
+        """Guarda las filas y devuelve el token de importación."""
+        return self.guardar_bloques([serializar_filas(filas)], len(filas))
+
+    def guardar_bloques(self, bloques: Iterable[bytes], filas: int) -> str:
+        """
+        Guarda bloques ya serializados con serializar_filas.
+
+        `filas` es el total de filas de los bloques; se guarda aparte para
+        contar_filas.
+
+        Raises:
+            PreviewDemasiadoGrande: si el total comprimido supera max_bytes.
+        """
+        blob = empaquetar_bloques(bloques)
+        self.comprobar_tamano(len(blob))
+        token = str(uuid4())
+        self._guardar(token, blob, filas, time.time() + self.ttl)
+        return token
+
+    def comprobar_tamano(self, tamano: int) -> None:
+        """
+        Lanza PreviewDemasiadoGrande si `tamano` bytes comprimidos no caben en
+        el almacén. Permite cortar la previsualización antes de terminarla.
+        """
+        if tamano > self.max_bytes:
+            raise PreviewDemasiadoGrande(
+                f"La previsualización ocupa {tamano} bytes comprimida y el máximo es "
+                f"{self.max_bytes} (PREVIEW_MAX_BYTES). Divide el fichero en partes más pequeñas."
+            )
+
+    def obtener(self, token: str) -> Optional[List[Dict]]:
+        """Devuelve las filas del token o None si no existe o ha caducado."""
+        lotes = self.obtener_lotes(token)
+        if lotes is None:
+            return None
+        return [fila for lote in lotes for fila in lote]
+
+    def obtener_lotes(self, token: str) -> Optional[Iterator[List[Dict]]]:
+        """
+        Devuelve un iterador de lotes de filas (se descomprime bloque a bloque)
+        o None si el token no existe o ha caducado.
+        """
+        if not token:
+            return None
+        blob = self._obtener(token, time.time())
+        if blob is None:
+            return None
+        return (deserializar_filas(bloque) for bloque in desempaquetar_bloques(blob))
+
+    def contar_filas(self, token: str) -> Optional[int]:
+        """Nº de filas guardadas para el token (None si no existe)."""
+        if not token:
+            return None
+        return self._contar(token, time.time())
+
+    @abstractmethod
+    def eliminar(self, token: str) -> None:
+        """Borra la previsualización del token (si existe)."""
+
+    @abstractmethod
+    def _guardar(self, token: str, blob: bytes, filas: int, expira: float) -> None:
+        """Guarda el blob empaquetado con su nº de filas y su caducidad."""
+
+    @abstractmethod
+    def _obtener(self, token: str, ahora: float) -> Optional[bytes]:
+        """Devuelve el blob del token si existe y no ha caducado."""
+
+    @abstractmethod
+    def _contar(self, token: str, ahora: float) -> Optional[int]:
+        """Devuelve el nº de filas guardado para el token, sin leer el blob."""
+
+
+# ============================================================
+# BACKEND EN MEMORIA
+# ============================================================
+
+class MemoryPreviewStore(PreviewStore):
+    """
+    Almacén en memoria del proceso con TTL y expulsión LRU.
+    """
+
+    def __init__(self, ttl: int, max_entradas: int, max_bytes: int):
+        super().__init__(ttl, max_entradas, max_bytes)
+        self._entradas: "OrderedDict[str, Tuple[float, int, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _guardar(self, token: str, blob: bytes, filas: int, expira: float) -> None:
+        with self._lock:
+            self._purgar(time.time())
+            self._entradas[token] = (expira, filas, blob)
+            self._bytes += len(blob)
+            while self._entradas and (
+                len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes
+            ):
+                _, (_, _, expulsado) = self._entradas.popitem(last=False)
+                self._bytes -= len(expulsado)
+
+    def _vigente(self, token: str, ahora: float) -> Optional[Tuple[float, int, bytes]]:
+        # Llamar con el lock adquirido
+        entrada = self._entradas.get(token)
+        if entrada is None:
+            return None
+        if entrada[0] <= ahora:
+            del self._entradas[token]
+            self._bytes -= len(entrada[2])
+            return None
+        self._entradas.move_to_end(token)
+        return entrada
+
+    def _obtener(self, token: str, ahora: float) -> Optional[bytes]:
+        with self._lock:
+            entrada = self._vigente(token, ahora)
+            return entrada[2] if entrada else None
+
+    def _contar(self, token: str, ahora: float) -> Optional[int]:
+        with self._lock:
+            entrada = self._vigente(token, ahora)
+            return entrada[1] if entrada else None
+
+    def eliminar(self, token: str) -> None:
+        with self._lock:
+            entrada = self._entradas.pop(token, None)
+            if entrada is not None:
+                self._bytes -= len(entrada[2])
+
+    def _purgar(self, ahora: float) -> None:
+        caducadas = [token for token, (expira, _, _) in self._entradas.items() if expira <= ahora]
+        for token in caducadas:
+            _, _, blob = self._entradas.pop(token)
+            self._bytes -= len(blob)
+
+
+# ============================================================
+# BACKEND SQLITE COMPARTIDO
+# ============================================================
+
+class SQLitePreviewStore(PreviewStore):
+    """
+    Almacén en un fichero SQLite compartido entre procesos.
+
+    Cada operación abre su propia conexión, por lo que es seguro entre hilos
+    y entre workers. El último acceso se actualiza en cada lectura para
+    aplicar la expulsión LRU.
+    """
+
+    def __init__(self, ruta: str, ttl: int, max_entradas: int, max_bytes: int):
+        super().__init__(ttl, max_entradas, max_bytes)
+        self.ruta = ruta
+        with closing(self._conectar()) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS PREVIEWS (
+                    TOKEN TEXT PRIMARY KEY,
+                    DATOS BLOB NOT NULL,
+                    TAMANO INTEGER NOT NULL,
+                    FILAS INTEGER,
+                    EXPIRA REAL NOT NULL,
+                    ULTIMO_ACCESO REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS IX_PREVIEWS_ACCESO ON PREVIEWS (ULTIMO_ACCESO)")
+            # Ficheros creados por versiones anteriores, sin la columna FILAS
+            columnas = {fila[1] for fila in conn.execute("PRAGMA table_info(PREVIEWS)")}
+            if "FILAS" not in columnas:
+                try:
+                    conn.execute("ALTER TABLE PREVIEWS ADD COLUMN FILAS INTEGER")
+                except sqlite3.OperationalError:
+                    pass  # la ha añadido otro worker a la vez
+
+    def _conectar(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.ruta, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _guardar(self, token: str, blob: bytes, filas: int, expira: float) -> None:
+        ahora = time.time()
+        conn = self._conectar()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM PREVIEWS WHERE EXPIRA <= ?", (ahora,))
+            conn.execute(
+                "INSERT INTO PREVIEWS (TOKEN, DATOS, TAMANO, FILAS, EXPIRA, ULTIMO_ACCESO) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (token, blob, len(blob), filas, expira, ahora),
+            )
+            self._expulsar(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _expulsar(self, conn: sqlite3.Connection) -> None:
+        entradas, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(TAMANO), 0) FROM PREVIEWS").fetchone()
+        if entradas <= self.max_entradas and total <= self.max_bytes:
+            return
+
+        for token, tamano in conn.execute(
+            "SELECT TOKEN, TAMANO FROM PREVIEWS ORDER BY ULTIMO_ACCESO ASC"
+        ).fetchall():
+            if entradas <= self.max_entradas and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM PREVIEWS WHERE TOKEN = ?", (token,))
+            entradas -= 1
+            total -= tamano
+
+    def _obtener(self, token: str, ahora: float) -> Optional[bytes]:
+        conn = self._conectar()
+        try:
+            fila = conn.execute(
+                "SELECT DATOS FROM PREVIEWS WHERE TOKEN = ? AND EXPIRA > ?", (token, ahora)
+            ).fetchone()
+            if fila is None:
+                return None
+            conn.execute("UPDATE PREVIEWS SET ULTIMO_ACCESO = ? WHERE TOKEN = ?", (ahora, token))
+            return fila[0]
+        finally:
+            conn.close()
+
+    def _contar(self, token: str, ahora: float) -> Optional[int]:
+        conn = self._conectar()
+        try:
+            fila = conn.execute(
+                "SELECT FILAS FROM PREVIEWS WHERE TOKEN = ? AND EXPIRA > ?", (token, ahora)
+            ).fetchone()
+            if fila is None:
+                return None
+            conn.execute("UPDATE PREVIEWS SET ULTIMO_ACCESO = ? WHERE TOKEN = ?", (ahora, token))
+            if fila[0] is not None:
+                return fila[0]
+            # Guardada antes de existir FILAS: se cuentan los bloques una vez
+            blob = conn.execute("SELECT DATOS FROM PREVIEWS WHERE TOKEN = ?", (token,)).fetchone()[0]
+            filas = sum(
+                json.loads(zlib.decompress(bloque).decode("utf-8"))["filas"]
+                for bloque in desempaquetar_bloques(blob)
+            )
+            conn.execute("UPDATE PREVIEWS SET FILAS = ? WHERE TOKEN = ?", (filas, token))
+            return filas
+        finally:
+            conn.close()
+
+    def eliminar(self, token: str) -> None:
+        conn = self._conectar()
+        try:
+            conn.execute("DELETE FROM PREVIEWS WHERE TOKEN = ?", (token,))
+        finally:
+            conn.close()
+
+
+# ============================================================
+# INSTANCIA CONFIGURADA
+# ============================================================
+
+_store: Optional[PreviewStore] = None
+_store_lock = threading.Lock()
+
+
+def get_preview_store() -> PreviewStore:
+    """
+    Devuelve el almacén configurado en PREVIEW_STORE (se crea una sola vez).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = os.getenv("PREVIEW_STORE", "sqlite").strip().lower()
+                if backend == "memory":
+                    _store = MemoryPreviewStore(
+                        TTL_POR_DEFECTO, MAX_ENTRADAS_POR_DEFECTO, MAX_BYTES_POR_DEFECTO
+                    )
+                elif backend == "sqlite":
+                    ruta = os.getenv("PREVIEW_STORE_PATH") or os.path.join(
+                        tempfile.gettempdir(), "qs_import_previews.sqlite3"
+                    )
+                    _store = SQLitePreviewStore(
+                        ruta, TTL_POR_DEFECTO, MAX_ENTRADAS_POR_DEFECTO, MAX_BYTES_POR_DEFECTO
+                    )
+                else:
+                    raise RuntimeError(f"PREVIEW_STORE no soportado: {backend}. Usa memory o sqlite.")
+    return _store
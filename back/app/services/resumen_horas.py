@@ -0,0 +1,283 @@
+"""
+Resumen mensual de horas (tabla RESUMEN_HORAS_MES).
+
+La previsualización de facturas agregaba en cada petición todas las filas
+diarias de HORAS_TRAB del mes. RESUMEN_HORAS_MES guarda esos totales por
+(año, mes, sociedad, cliente, proyecto, empleado) y se mantiene desde las
+rutas que escriben en HORAS_TRAB, dentro de la misma transacción:
+
+- Altas, ediciones, bajas e importaciones: se recalculan solo las claves
+  afectadas (año, mes, proyecto, empleado) a partir de sus filas de
+  HORAS_TRAB, como mucho una por día del mes. Recalcular en lugar de sumar
+  diferencias mantiene también PRIMERA_FECHA y corrige cualquier desvío.
+- Facturación: las horas PENDIENTES del cliente y mes pasan a FACTURADAS
+  con un único UPDATE del resumen (mismo filtro que _bloquear_horas).
+
+Cualquier escritura nueva sobre HORAS_TRAB debe llamar a recalcular_claves
+antes de su commit.
+
+Mantenimiento (desde la carpeta back, con el .env de producción):
+
+    python -m app.services.resumen_horas reconstruir [--anio 2025 --mes 3]
+    python -m app.services.resumen_horas verificar [--anio 2025 --mes 3]
+
+verificar sale con código 1 si el resumen no coincide con HORAS_TRAB.
+"""
+
+import argparse
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Integer, Numeric, SmallInteger, case, cast, delete, extract, func, insert, literal, select, \
+    tuple_, update
+from sqlalchemy.orm import Session
+
+from app.models.horas_trab import HorasTrab
+from app.models.resumen_horas_mes import ResumenHorasMes
+from app.services.periodos import filtro_mes
+
+
+# (anio, mes, id_proyecto, id_empleado)
+ClaveResumen = Tuple[int, int, str, str]
+
+# Pares (proyecto, empleado) por sentencia en los recálculos
+TAMANO_TROZO = 500
+
+_TABLA = ResumenHorasMes.__table__
+
+_COLUMNAS = (
+    "ANIO",
+    "MES",
+    "ID_SOCIEDAD",
+    "ID_CLIENTE",
+    "ID_PROYECTO",
+    "ID_EMPLEADO",
+    "HORAS_TOTAL",
+    "HORAS_PENDIENTES",
+    "HORAS_FACTURADAS",
+    "NUM_REGISTROS",
+    "PRIMERA_FECHA",
+    "FEC_ACTUALIZACION",
+)
+
+
+def clave_resumen(fecha: date, id_proyecto: str, id_empleado: str) -> ClaveResumen:
+    return fecha.year, fecha.month, id_proyecto, id_empleado
+
+
+def _horas(condicion=None):
+    horas = cast(HorasTrab.horas_dia, Numeric(12, 4))
+    if condicion is not None:
+        horas = case((condicion, horas), else_=0)
+    return func.coalesce(func.sum(horas), 0)
+
+
+def _agregado(anio: int, mes: int, condiciones: List):
+    """
+    SELECT con las filas del resumen de un mes, en el orden de _COLUMNAS.
+    """
+    sociedad = func.coalesce(HorasTrab.id_sociedad, "")
+    cliente = func.coalesce(HorasTrab.id_cliente, "")
+    return (
+        select(
+            literal(anio, SmallInteger),
+            literal(mes, SmallInteger),
+            sociedad,
+            cliente,
+            HorasTrab.id_proyecto,
+            HorasTrab.id_empleado,
+            _horas(),
+            _horas(HorasTrab.estado == "PENDIENTE"),
+            _horas(HorasTrab.estado == "FACTURADA"),
+            func.count(),
+            func.min(HorasTrab.fecha),
+            literal(datetime.now()),
+        )
+        .where(filtro_mes(HorasTrab.fecha, anio, mes), *condiciones)
+        .group_by(sociedad, cliente, HorasTrab.id_proyecto, HorasTrab.id_empleado)
+    )
+
+
+def _rellenar_mes(db: Session, anio: int, mes: int, condiciones_horas: List, condiciones_resumen: List) -> None:
+    db.execute(delete(_TABLA).where(_TABLA.c.ANIO == anio, _TABLA.c.MES == mes, *condiciones_resumen))
+    db.execute(insert(_TABLA).from_select(_COLUMNAS, _agregado(anio, mes, condiciones_horas)))
+
+
+# ============================================================
+# MANTENIMIENTO DESDE LAS ESCRITURAS
+# ============================================================
+
+def recalcular_claves(db: Session, claves: Iterable[ClaveResumen]) -> int:
+    """
+    Recalcula las filas del resumen de las claves indicadas a partir de
+    HORAS_TRAB. No hace commit: se llama antes del commit de la escritura.
+
+    Returns:
+        nº de claves (año, mes, proyecto, empleado) recalculadas
+    """
+    por_mes: Dict[Tuple[int, int], set] = defaultdict(set)
+    for anio, mes, id_proyecto, id_empleado in claves:
+        por_mes[(anio, mes)].add((id_proyecto, id_empleado))
+
+    for (anio, mes), pares in sorted(por_mes.items()):
+        pares = sorted(pares)
+        for inicio in range(0, len(pares), TAMANO_TROZO):
+            trozo = pares[inicio:inicio + TAMANO_TROZO]
+            _rellenar_mes(
+                db, anio, mes,
+                [tuple_(HorasTrab.id_proyecto, HorasTrab.id_empleado).in_(trozo)],
+                [tuple_(_TABLA.c.ID_PROYECTO, _TABLA.c.ID_EMPLEADO).in_(trozo)],
+            )
+
+    return sum(len(pares) for pares in por_mes.values())
+
+
+def aplicar_facturacion(db: Session, id_cliente: str, anio: int, mes: int) -> int:
+    """
+    Pasa a facturadas las horas pendientes del cliente en el mes, igual que
+    el UPDATE de HORAS_TRAB al generar la factura. No hace commit.
+    """
+    # ordered_values: MySQL aplica las asignaciones en orden, y PENDIENTES
+    # debe ponerse a 0 después de sumarlo a FACTURADAS
+    return db.execute(
+        update(_TABLA)
+        .where(
+            _TABLA.c.ID_CLIENTE == id_cliente,
+            _TABLA.c.ANIO == anio,
+            _TABLA.c.MES == mes,
+            _TABLA.c.HORAS_PENDIENTES != 0,
+        )
+        .ordered_values(
+            (_TABLA.c.HORAS_FACTURADAS, _TABLA.c.HORAS_FACTURADAS + _TABLA.c.HORAS_PENDIENTES),
+            (_TABLA.c.HORAS_PENDIENTES, 0),
+            (_TABLA.c.FEC_ACTUALIZACION, datetime.now()),
+        )
+    ).rowcount
+
+
+# ============================================================
+# RECONSTRUCCIÓN Y VERIFICACIÓN
+# ============================================================
+
+def _meses(db: Session, anio: Optional[int] = None, mes: Optional[int] = None) -> List[Tuple[int, int]]:
+    if anio and mes:
+        return [(anio, mes)]
+
+    anio_col = cast(extract("year", HorasTrab.fecha), Integer)
+    mes_col = cast(extract("month", HorasTrab.fecha), Integer)
+    consulta = select(anio_col, mes_col).distinct()
+    if anio:
+        consulta = consulta.where(anio_col == anio)
+
+    meses = {(int(a), int(m)) for a, m in db.execute(consulta)}
+    # Meses que ya no tienen horas pero siguen en el resumen
+    consulta = select(_TABLA.c.ANIO, _TABLA.c.MES).distinct()
+    if anio:
+        consulta = consulta.where(_TABLA.c.ANIO == anio)
+    meses.update((int(a), int(m)) for a, m in db.execute(consulta))
+    return sorted(meses)
+
+
+def reconstruir(db: Session, anio: Optional[int] = None, mes: Optional[int] = None) -> int:
+    """
+    Regenera el resumen desde HORAS_TRAB (todo, un año o un mes).
+    Hace commit por mes para no mantener bloqueos durante toda la carga.
+
+    Returns:
+        nº de meses reconstruidos
+    """
+    meses = _meses(db, anio, mes)
+    for anio_mes, mes_mes in meses:
+        try:
+            _rellenar_mes(db, anio_mes, mes_mes, [], [])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return len(meses)
+
+
+def _valores(fila) -> Tuple:
+    return (
+        Decimal(fila[0] or 0).quantize(Decimal("0.0001")),
+        Decimal(fila[1] or 0).quantize(Decimal("0.0001")),
+        Decimal(fila[2] or 0).quantize(Decimal("0.0001")),
+        int(fila[3] or 0),
+        fila[4],
+    )
+
+
+def verificar(db: Session, anio: Optional[int] = None, mes: Optional[int] = None) -> Dict:
+    """
+    Compara el resumen con el agregado de HORAS_TRAB, mes a mes.
+
+    Returns:
+        {"meses", "claves", "diferencias": [{"clave", "resumen", "horas_trab"}]}
+    """
+    diferencias = []
+    claves = 0
+    meses = _meses(db, anio, mes)
+
+    for anio_mes, mes_mes in meses:
+        esperado = {
+            tuple(fila[2:6]): _valores(fila[6:11])
+            for fila in db.execute(_agregado(anio_mes, mes_mes, []))
+        }
+        actual = {
+            tuple(fila[:4]): _valores(fila[4:])
+            for fila in db.execute(
+                select(
+                    _TABLA.c.ID_SOCIEDAD, _TABLA.c.ID_CLIENTE, _TABLA.c.ID_PROYECTO, _TABLA.c.ID_EMPLEADO,
+                    _TABLA.c.HORAS_TOTAL, _TABLA.c.HORAS_PENDIENTES, _TABLA.c.HORAS_FACTURADAS,
+                    _TABLA.c.NUM_REGISTROS, _TABLA.c.PRIMERA_FECHA,
+                ).where(_TABLA.c.ANIO == anio_mes, _TABLA.c.MES == mes_mes)
+            )
+        }
+
+        for clave in sorted(set(esperado) | set(actual)):
+            claves += 1
+            if esperado.get(clave) != actual.get(clave):
+                diferencias.append({
+                    "clave": (anio_mes, mes_mes) + clave,
+                    "resumen": actual.get(clave),
+                    "horas_trab": esperado.get(clave),
+                })
+
+    return {"meses": len(meses), "claves": claves, "diferencias": diferencias}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("accion", choices=["reconstruir", "verificar"])
+    parser.add_argument("--anio", type=int)
+    parser.add_argument("--mes", type=int)
+    args = parser.parse_args()
+
+    if args.mes and not args.anio:
+        parser.error("--mes requiere --anio")
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.accion == "reconstruir":
+            meses = reconstruir(db, args.anio, args.mes)
+            print(f"Resumen reconstruido: {meses} mes(es)")
+            return
+
+        informe = verificar(db, args.anio, args.mes)
+        print(f"Meses revisados: {informe['meses']}, claves: {informe['claves']}")
+        for diferencia in informe["diferencias"]:
+            print(f"  {diferencia['clave']}: resumen={diferencia['resumen']} horas_trab={diferencia['horas_trab']}")
+        if informe["diferencias"]:
+            print(f"{len(informe['diferencias'])} diferencia(s)")
+            raise SystemExit(1)
+        print("Resumen correcto")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Índice en memoria del histórico de tarifas (HIST_PROYECTOS).
+
+Carga todas las tarifas una vez y las agrupa por (empleado, proyecto) en
+listas ordenadas por fec_inicio. La tarifa vigente en una fecha se resuelve
+con búsqueda binaria, sin consultar la base de datos:
+
+    tarifa vigente = la de mayor fec_inicio <= fecha
+
+Es la misma regla que la consulta original de get_tarifa
+(ORDER BY FEC_INICIO DESC LIMIT 1). Las claves se comparan con clave_id,
+igual que MySQL: sin distinguir mayúsculas ni espacios finales.
+
+Invalidación:
+    - Los endpoints de tarifas.py llaman a invalidar() tras cada alta,
+      modificación o baja.
+    - invalidar() reescribe un fichero marcador compartido, de modo que el
+      resto de procesos (workers de Passenger/gunicorn en la misma máquina)
+      recargan el índice en su siguiente consulta.
+    - Como respaldo (cambios hechos directamente en la BBDD) el índice
+      caduca a los TARIFAS_CACHE_TTL_SECONDS segundos.
+
+Configuración (.env):
+    TARIFAS_CACHE_TTL_SECONDS  caducidad del índice (por defecto 300)
+    TARIFAS_CACHE_MARKER       ruta del fichero marcador
+"""
+
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_right
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from app.models.hist_proyecto import HistProyecto
+from app.services.claves import clave_id
+
+
+CACHE_TTL_SECONDS = int(os.getenv("TARIFAS_CACHE_TTL_SECONDS", "300"))
+CACHE_MARKER = os.getenv("TARIFAS_CACHE_MARKER") or os.path.join(
+    tempfile.gettempdir(), "facturacion_tarifas.version"
+)
+
+Par = Tuple[str, str]
+
+
+class IndiceTarifas:
+    """
+    Tarifas agrupadas por (id_empleado, id_proyecto) y ordenadas por fecha.
+    """
+
+    def __init__(self, filas: Iterable[Tuple[str, str, date, object]]):
+        agrupadas: Dict[Par, List[Tuple[date, float]]] = {}
+        for id_empleado, id_proyecto, fec_inicio, tarifa in filas:
+            par = (clave_id(id_empleado), clave_id(id_proyecto))
+            agrupadas.setdefault(par, []).append((fec_inicio, float(tarifa)))
+
+        self._fechas: Dict[Par, List[date]] = {}
+        self._tarifas: Dict[Par, List[float]] = {}
+        for par, historico in agrupadas.items():
+            # sort es estable: con la misma fec_inicio gana la última leída
+            historico.sort(key=lambda fila: fila[0])
+            self._fechas[par] = [fila[0] for fila in historico]
+            self._tarifas[par] = [fila[1] for fila in historico]
+
+    def __len__(self) -> int:
+        return len(self._fechas)
+
+    def tarifa(self, id_empleado: str, id_proyecto: str, fecha: date) -> Optional[float]:
+        """
+        Tarifa vigente en la fecha o None si no hay ninguna anterior.
+        """
+        par = (clave_id(id_empleado), clave_id(id_proyecto))
+        fechas = self._fechas.get(par)
+        if not fechas:
+            return None
+        posicion = bisect_right(fechas, fecha)
+        return self._tarifas[par][posicion - 1] if posicion else None
+
+    def tarifas(self, pares: Iterable[Par], fecha: date) -> Dict[Par, Optional[float]]:
+        """
+        Tarifa vigente en la fecha para varios (empleado, proyecto).
+        """
+        return {par: self.tarifa(par[0], par[1], fecha) for par in pares}
+
+
+# ============================================================
+# CACHÉ DEL PROCESO
+# ============================================================
+
+_lock = threading.Lock()
+_indice: Optional[IndiceTarifas] = None
+_cargado_en = 0.0
+_marcador_cargado: Optional[str] = None
+_generacion = 0
+
+
+def _version_marcador() -> Optional[str]:
+    try:
+        with open(CACHE_MARKER) as marcador:
+            return marcador.read()
+    except OSError:
+        return None
+
+
+def _cargar(db: Session) -> IndiceTarifas:
+    filas = db.query(
+        HistProyecto.id_empleado,
+        HistProyecto.id_proyecto,
+        HistProyecto.fec_inicio,
+        HistProyecto.tarifa,
+    ).all()
+    return IndiceTarifas(filas)
+
+
+def obtener_indice(db: Session) -> IndiceTarifas:
+    """
+    Devuelve el índice del proceso, cargándolo si no existe, ha caducado o
+    otro proceso ha invalidado las tarifas.
+    """
+    global _indice, _cargado_en, _marcador_cargado
+
+    marcador = _version_marcador()
+    with _lock:
+        vigente = (
+            _indice is not None
+            and marcador == _marcador_cargado
+            and time.monotonic() - _cargado_en < CACHE_TTL_SECONDS
+        )
+        if vigente:
+            return _indice
+        generacion = _generacion
+
+    indice = _cargar(db)
+
+    with _lock:
+        # Si se invalidó mientras se cargaba, el índice se usa pero no se guarda
+        if generacion == _generacion:
+            _indice = indice
+            _cargado_en = time.monotonic()
+            _marcador_cargado = marcador
+    return indice
+
+
+def invalidar() -> None:
+    """
+    Descarta el índice en este proceso y avisa al resto mediante el marcador.
+
+    Llamar después del commit de cualquier cambio en HIST_PROYECTOS.
+    """
+    global _indice, _generacion
+
+    with _lock:
+        _indice = None
+        _generacion += 1
+
+    try:
+        with open(CACHE_MARKER, "w") as marcador:
+            marcador.write(uuid4().hex)
+    except OSError:
+        # Sin marcador compartido, los demás procesos dependen del TTL
+        pass
+
+
+def tarifa_vigente(db: Session, id_empleado: str, id_proyecto: str, fecha: date) -> Optional[float]:
+    return obtener_indice(db).tarifa(id_empleado, id_proyecto, fecha)
+
+
+def tarifas_vigentes(db: Session, pares: Iterable[Par], fecha: date) -> Dict[Par, Optional[float]]:
+    return obtener_indice(db).tarifas(pares, fecha)
@@ -0,0 +1,325 @@
+"""
+Motor de validación de horas importadas (Excel del Tracker).
+
+Sustituye la validación fila a fila de /preview-horas, que lanzaba dos SELECT
+por cada fila del Excel, por una validación por conjuntos:
+
+- Se recogen los ID de empleado y de proyecto distintos del DataFrame.
+- Se resuelven con unas pocas consultas IN (...) por bloques.
+- Todas las filas se validan con máscaras vectorizadas de pandas.
+
+El resultado (filas_validas, errores, total_horas) es el mismo que producía
+la validación fila a fila, incluido el orden de prioridad de los errores:
+una fila solo informa del primer error que encuentra.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from app.services.claves import clave_id
+
+
+# Columnas del Excel exportado por el Tracker
+COL_EMPLEADO = "ID del empleado"
+COLS_PROYECTO = ("Codigo de proyecto", "Código de proyecto")
+COLS_FECHA = ("Dia", "Día")
+COL_HORAS = "Tiempo trabajado"
+COL_DESCRIPCION = "Nombre del proyecto"
+
+ID_SOCIEDAD_IMPORTACION = "01"
+
+# Nº máximo de ID por consulta IN (...)
+TAMANO_BLOQUE_IN = 1000
+
+_SQL_EMPLEADOS = text(
+    "SELECT ID_EMPLEADO FROM EMPLEADOS WHERE ID_EMPLEADO IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+
+_SQL_PROYECTOS = text(
+    "SELECT ID_PROYECTO, ID_CLIENTE FROM PROYECTOS WHERE ID_PROYECTO IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+
+
+# ============================================================
+# NORMALIZACIÓN DEL DATAFRAME
+# ============================================================
+
+def normalizar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Limpia cabeceras (espacios y saltos de línea) y recorta los textos.
+
+    Solo recorre las columnas de texto; las numéricas y de fecha se dejan
+    tal cual en lugar de aplicar df.map sobre todas las celdas.
+    """
+    df = df.copy()
+    df.columns = df.columns.astype(str).str.strip().str.replace("\n", "", regex=False)
+
+    for columna in df.columns:
+        serie = df[columna]
+        if serie.dtype == object or isinstance(serie.dtype, pd.StringDtype):
+            df[columna] = serie.map(lambda value: value.strip() if isinstance(value, str) else value)
+
+    return df
+
+
+def _columna(df: pd.DataFrame, candidatas: Iterable[str]) -> Optional[pd.Series]:
+    for nombre in candidatas:
+        if nombre in df.columns:
+            return df[nombre]
+    return None
+
+
+def _texto(serie: Optional[pd.Series], index: pd.Index) -> pd.Series:
+    # Equivale a str(valor).strip() de la validación fila a fila
+    if serie is None:
+        return pd.Series("", index=index, dtype=object)
+    return serie.map(str).str.strip()
+
+
+# ============================================================
+# CONVERSIONES POR VALOR DISTINTO
+# ============================================================
+
+def _convertir_fechas(serie: Optional[pd.Series], index: pd.Index):
+    """
+    Convierte la columna de fecha a ISO (YYYY-MM-DD).
+
+    Un Excel mensual solo tiene unas decenas de fechas distintas, así que se
+    parsea cada valor distinto una única vez con el mismo criterio que antes
+    (dayfirst=True) y se propaga el resultado a todas las filas.
+
+    Returns:
+        (iso, error, vacia): tres Series alineadas con el DataFrame.
+    """
+    iso = pd.Series(None, index=index, dtype=object)
+    error = pd.Series(None, index=index, dtype=object)
+
+    if serie is None:
+        return iso, error, pd.Series(True, index=index)
+
+    vacia = serie.isna()
+    presentes = serie[~vacia]
+
+    convertidas: Dict = {}
+    errores: Dict = {}
+    for valor in pd.unique(presentes.to_numpy(dtype=object)):
+        try:
+            convertidas[valor] = pd.to_datetime(valor, dayfirst=True).date().isoformat()
+        except Exception as exc:
+            errores[valor] = str(exc)
+
+    iso[~vacia] = presentes.map(convertidas)
+    error[~vacia] = presentes.map(errores)
+    return iso, error, vacia
+
+
+def _convertir_horas(serie: Optional[pd.Series], index: pd.Index):
+    """
+    Convierte la columna de horas a float por valor distinto.
+
+    Returns:
+        (horas, error, vacia): tres Series alineadas con el DataFrame.
+    """
+    horas = pd.Series(np.nan, index=index, dtype=float)
+    error = pd.Series(None, index=index, dtype=object)
+
+    if serie is None:
+        return horas, error, pd.Series(True, index=index)
+
+    vacia = serie.isna()
+    presentes = serie[~vacia]
+
+    convertidas: Dict = {}
+    errores: Dict = {}
+    for valor in pd.unique(presentes.to_numpy(dtype=object)):
+        try:
+            convertidas[valor] = float(valor)
+        except Exception as exc:
+            errores[valor] = str(exc)
+
+    horas[~vacia] = presentes.map(convertidas)
+    error[~vacia] = presentes.map(errores)
+    return horas, error, vacia
+
+
+# ============================================================
+# CONSULTAS EN BLOQUE
+# ============================================================
+
+def _bloques(valores: List[str], tamano: int):
+    for inicio in range(0, len(valores), tamano):
+        yield valores[inicio:inicio + tamano]
+
+
+def resolver_empleados(db: Session, ids: Iterable[str]) -> Set[str]:
+    """
+    Devuelve las claves (clave_id) de los empleados que existen en EMPLEADOS.
+    """
+    existentes: Set[str] = set()
+    for bloque in _bloques(sorted(set(ids)), TAMANO_BLOQUE_IN):
+        for fila in db.execute(_SQL_EMPLEADOS, {"ids": bloque}):
+            existentes.add(clave_id(str(fila.ID_EMPLEADO)))
+    return existentes
+
+
+def resolver_proyectos(db: Session, ids: Iterable[str]) -> Dict[str, Optional[str]]:
+    """
+    Devuelve un diccionario clave de proyecto (clave_id) → ID_CLIENTE.
+    """
+    clientes: Dict[str, Optional[str]] = {}
+    for bloque in _bloques(sorted(set(ids)), TAMANO_BLOQUE_IN):
+        for fila in db.execute(_SQL_PROYECTOS, {"ids": bloque}):
+            clientes[clave_id(str(fila.ID_PROYECTO))] = fila.ID_CLIENTE
+    return clientes
+
+
+class CatalogoReferencias:
+    """
+    Caché de empleados y proyectos ya resueltos durante una importación.
+
+    Al validar un fichero por lotes, cada lote solo consulta los ID que no
+    aparecieron en lotes anteriores.
+    """
+
+    def __init__(self):
+        self.empleados: Set[str] = set()
+        self.proyectos: Dict[str, Optional[str]] = {}
+        self._consultados_empleado: Set[str] = set()
+        self._consultados_proyecto: Set[str] = set()
+
+    def resolver(self, db: Session, ids_empleado: Iterable[str], ids_proyecto: Iterable[str]) -> None:
+        nuevos_empleado = {i for i in ids_empleado if clave_id(i) not in self._consultados_empleado}
+        nuevos_proyecto = {i for i in ids_proyecto if clave_id(i) not in self._consultados_proyecto}
+
+        if nuevos_empleado:
+            self.empleados |= resolver_empleados(db, nuevos_empleado)
+            self._consultados_empleado |= {clave_id(i) for i in nuevos_empleado}
+        if nuevos_proyecto:
+            self.proyectos.update(resolver_proyectos(db, nuevos_proyecto))
+            self._consultados_proyecto |= {clave_id(i) for i in nuevos_proyecto}
+
+
+# ============================================================
+# VALIDACIÓN
+# ============================================================
+
+def validar_horas(df: pd.DataFrame, db: Session, catalogo: Optional[CatalogoReferencias] = None) -> Dict:
+    """
+    Valida todas las filas de un DataFrame ya normalizado.
+
+    El número de fila de cada error es índice + 2 (cabecera + base 1), por lo
+    que el índice del DataFrame debe conservar la posición original en el Excel.
+
+    Si se validan varios lotes del mismo fichero, pasar el mismo catalogo
+    evita volver a consultar los ID ya resueltos.
+
+    Returns:
+        Dict con:
+            - filas_validas: List[Dict] listas para insertar en HORAS_TRAB
+            - errores: List[Dict] {"fila", "mensaje"} ordenados por fila
+            - total_horas: float
+    """
+    index = df.index
+
+    empleados = _texto(df[COL_EMPLEADO] if COL_EMPLEADO in df.columns else None, index)
+    proyectos = _texto(_columna(df, COLS_PROYECTO), index)
+
+    descripciones = df[COL_DESCRIPCION] if COL_DESCRIPCION in df.columns else pd.Series(np.nan, index=index)
+    descripciones = descripciones.map(lambda value: "" if pd.isna(value) else str(value))
+
+    fechas, error_fecha, fecha_vacia = _convertir_fechas(_columna(df, COLS_FECHA), index)
+    horas, error_horas, horas_vacias = _convertir_horas(
+        df[COL_HORAS] if COL_HORAS in df.columns else None, index
+    )
+
+    claves_empleado = empleados.map(clave_id)
+    claves_proyecto = proyectos.map(clave_id)
+
+    # Solo se consultan los ID de filas que superan las validaciones locales
+    pendientes = (
+        error_fecha.isna()
+        & (empleados != "")
+        & (proyectos != "")
+        & ~horas_vacias
+        & ~fecha_vacia
+    )
+
+    catalogo = catalogo or CatalogoReferencias()
+    catalogo.resolver(db, empleados[pendientes], proyectos[pendientes])
+    empleados_existentes = catalogo.empleados
+    clientes_proyecto = catalogo.proyectos
+
+    empleado_existe = claves_empleado.isin(empleados_existentes)
+    proyecto_existe = claves_proyecto.isin(list(clientes_proyecto.keys()))
+
+    # Mismo orden de prioridad que la validación fila a fila
+    condiciones = [
+        error_fecha.notna(),
+        empleados == "",
+        proyectos == "",
+        horas_vacias,
+        fecha_vacia,
+        ~empleado_existe,
+        ~proyecto_existe,
+        error_horas.notna(),
+    ]
+    mensajes = [
+        error_fecha,
+        pd.Series("Empleado vacio", index=index),
+        pd.Series("Proyecto vacio", index=index),
+        pd.Series("Horas vacias", index=index),
+        pd.Series("Fecha invalida", index=index),
+        pd.Series("Empleado no existe", index=index),
+        pd.Series("Proyecto no existe", index=index),
+        error_horas,
+    ]
+
+    con_error = np.logical_or.reduce([c.to_numpy(dtype=bool) for c in condiciones])
+    mensaje = np.select(
+        [c.to_numpy(dtype=bool) for c in condiciones],
+        [m.to_numpy(dtype=object) for m in mensajes],
+        default=None,
+    )
+
+    errores = [
+        {"fila": int(fila) + 2, "mensaje": texto}
+        for fila, texto in zip(index[con_error], mensaje[con_error])
+    ]
+
+    validas = ~con_error
+    ids_empleado = empleados[validas].tolist()
+    ids_proyecto = proyectos[validas].tolist()
+    clientes = [clientes_proyecto[clave] for clave in claves_proyecto[validas].tolist()]
+    horas_validas = horas[validas].tolist()
+
+    filas_validas = [
+        {
+            "ID_SOCIEDAD": ID_SOCIEDAD_IMPORTACION,
+            "ID_EMPLEADO": id_empleado,
+            "FECHA": fecha,
+            "ID_CLIENTE": id_cliente,
+            "ID_PROYECTO": id_proyecto,
+            "HORAS_DIA": horas_dia,
+            "DESC_TAREA": desc_tarea,
+            "ESTADO": "PENDIENTE",
+            "ORIGEN": "EXCEL",
+        }
+        for id_empleado, fecha, id_cliente, id_proyecto, horas_dia, desc_tarea in zip(
+            ids_empleado,
+            fechas[validas].tolist(),
+            clientes,
+            ids_proyecto,
+            horas_validas,
+            descripciones[validas].tolist(),
+        )
+    ]
+
+    return {
+        "filas_validas": filas_validas,
+        "errores": errores,
+        "total_horas": sum(horas_validas, 0.0),
+    }
@@ -0,0 +1,83 @@
+"""
+Utilidades compartidas por los scripts de benchmark.
+
+Los benchmarks se ejecutan desde la carpeta back:
+
+    python -m benchmarks.<script>
+
+y usan una base SQLite en memoria con el esquema de los modelos ORM,
+de forma que no necesitan acceso al MySQL real.
+"""
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+# app.database exige las variables de conexión al importarse; en los
+# benchmarks no se conecta nunca a MySQL, basta con que existan.
+for _clave, _valor in {
+    "DB_USER": "bench",
+    "DB_PASSWORD": "bench",
+    "DB_HOST": "localhost",
+    "DB_PORT": "3306",
+    "DB_NAME": "bench",
+    "SECRET_KEY": "bench",
+}.items():
+    os.environ.setdefault(_clave, _valor)
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.models import (  # noqa: E402,F401
+    banco, cliente, empleado, factura, hist_proyecto, horas_trab, import_job, proyecto, resumen_horas_mes,
+    secuencia_factura,
+)
+
+
+def crear_sesion_sqlite():
+    """
+    Crea una sesión sobre una base SQLite en memoria con todas las tablas.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def crear_fichero_sqlite_horas(filas: int) -> str:
+    """
+    Crea un fichero SQLite con todas las tablas y `filas` fichajes, para los
+    benchmarks que levantan la API en otro proceso. Devuelve la ruta.
+    """
+    ruta = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(bind=engine)
+    inicio = date(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(horas_trab.HorasTrab.__table__), [
+            {
+                "ID_EMPLEADO": f"E{n % 200:04d}", "FECHA": inicio + timedelta(days=n // 600),
+                "ID_PROYECTO": f"P{(n // 200) % 3}", "ID_SOCIEDAD": "01", "ID_CLIENTE": "CLI001",
+                "HORAS_DIA": 8.0, "DESC_TAREA": "Desarrollo", "ESTADO": "PENDIENTE", "ORIGEN": "EXCEL",
+            }
+            for n in range(filas)
+        ])
+    engine.dispose()
+    return ruta
+
+
+@contextmanager
+def cronometro():
+    resultado = {"segundos": 0.0}
+    inicio = time.perf_counter()
+    try:
+        yield resultado
+    finally:
+        resultado["segundos"] = time.perf_counter() - inicio
@@ -0,0 +1,89 @@
+"""
+Benchmark del alta masiva de fichajes.
+
+Compara rellenar una semana de un equipo con N peticiones POST /api/horas
+(consulta de existencia + commit por fichaje) frente a una sola petición
+POST /api/horas/bulk. Informa de sentencias SQL y tiempo total, y comprueba
+que las dos rutas dejan las mismas filas y el mismo resumen mensual.
+
+Uso (desde la carpeta back):
+
+    python -m benchmarks.bench_bulk_horas
+    python -m benchmarks.bench_bulk_horas --empleados 100 --dias 5
+"""
+
+import argparse
+from datetime import date, timedelta
+
+from benchmarks._common import crear_sesion_sqlite, cronometro
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.main import app
+from app.models.horas_trab import HorasTrab
+from app.query_counter import contar_consultas
+from app.services.resumen_horas import verificar
+
+
+def _elementos(empleados: int, dias: int):
+    lunes = date(2025, 3, 3)
+    return [
+        {
+            "id_sociedad": "01",
+            "fecha": (lunes + timedelta(days=d)).isoformat(),
+            "id_empleado": f"E{e:04d}",
+            "id_cliente": "CLI001",
+            "id_proyecto": "P001",
+            "horas_dia": 8,
+        }
+        for e in range(empleados)
+        for d in range(dias)
+    ]
+
+
+def _medir(nombre, enviar, elementos):
+    db = crear_sesion_sqlite()
+    app.dependency_overrides[get_db] = lambda: db
+    cliente = TestClient(app)
+    try:
+        with contar_consultas(db.get_bind()) as consultas, cronometro() as tiempo:
+            enviar(cliente, elementos)
+        filas = db.query(HorasTrab).count()
+        diferencias = len(verificar(db)["diferencias"])
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        db.close()
+
+    print(f"{nombre:<22} | {consultas.total:>9} | {tiempo['segundos'] * 1000:>9.0f} | {filas:>6} | {diferencias:>7}")
+    return filas, diferencias
+
+
+def _unitarias(cliente, elementos):
+    for elemento in elementos:
+        cliente.post("/api/horas", json=elemento).raise_for_status()
+
+
+def _masiva(cliente, elementos):
+    cliente.post("/api/horas/bulk", json=elementos).raise_for_status()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--empleados", type=int, default=40)
+    parser.add_argument("--dias", type=int, default=5)
+    args = parser.parse_args()
+
+    elementos = _elementos(args.empleados, args.dias)
+    print(f"{len(elementos)} fichajes")
+    print(f"{'ruta':<22} | {'consultas':>9} | {'ms total':>9} | {'filas':>6} | {'difs.':>7}")
+    print("-" * 66)
+    unitarias = _medir("POST /horas x N", _unitarias, elementos)
+    masiva = _medir("POST /horas/bulk", _masiva, elementos)
+
+    if unitarias != masiva or masiva != (len(elementos), 0):
+        raise SystemExit("Los resultados no coinciden")
+    print("Mismas filas y resumen correcto")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark de la caché de listados (app/services/cache_listados.py).
+
+Simula N navegaciones del front, cada una pidiendo los listados de clientes,
+empleados, bancos y proyectos, con la caché desactivada y activada. El
+navegador reenvía el ETag recibido en If-None-Match. Informa de sentencias
+SQL, respuestas 304, bytes enviados y tiempo total.
+
+Uso (desde la carpeta back):
+
+    python -m benchmarks.bench_cache_listados
+    python -m benchmarks.bench_cache_listados --navegaciones 500 --clientes 2000
+"""
+
+import argparse
+import os
+import tempfile
+from datetime import date
+
+os.environ.setdefault("LISTADOS_CACHE_MARKER_DIR", tempfile.mkdtemp())
+
+from benchmarks._common import crear_sesion_sqlite, cronometro  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import SesionEnHilo, get_async_db, get_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.banco import Banco  # noqa: E402
+from app.models.cliente import Cliente  # noqa: E402
+from app.models.empleado import Empleado  # noqa: E402
+from app.models.proyecto import Proyecto  # noqa: E402
+from app.query_counter import contar_consultas  # noqa: E402
+from app.services import cache_listados  # noqa: E402
+
+
+RUTAS = ("/api/clientes/", "/api/empleados/", "/api/bancos/", "/api/proyectos/")
+
+
+def _sembrar(db, clientes: int):
+    db.add_all(Cliente(id_sociedad="01", id_cliente=f"C{n:05d}", n_cliente=f"Cliente {n}", cif=f"B{n:08d}")
+               for n in range(clientes))
+    db.add_all(Proyecto(id_sociedad="01", id_proyecto=f"P{n:05d}", id_cliente=f"C{n % clientes:05d}",
+                        nombre_proyecto=f"Proyecto {n}", codigo_proyecto_tracker=f"T{n}", tipo_pago="HORAS",
+                        fec_inicio=date(2024, 1, 1))
+               for n in range(clientes * 2))
+    db.add_all(Empleado(id_empleado=f"E{n:05d}", id_empleado_tracker=f"TR{n}", nombre="Nombre", apellidos="Apellidos")
+               for n in range(200))
+    db.add_all(Banco(id_sociedad="01", id_banco_cobro=f"B{n}", n_banco_cobro=f"Banco {n}") for n in range(5))
+    db.commit()
+
+
+def _navegar(cliente: TestClient, navegaciones: int):
+    etags = {}
+    respuestas_304 = 0
+    enviados = 0
+    for _ in range(navegaciones):
+        for ruta in RUTAS:
+            cabeceras = {"If-None-Match": etags[ruta]} if ruta in etags else {}
+            respuesta = cliente.get(ruta, headers=cabeceras)
+            if respuesta.status_code == 304:
+                respuestas_304 += 1
+            else:
+                respuesta.raise_for_status()
+            if "etag" in respuesta.headers:
+                etags[ruta] = respuesta.headers["etag"]
+            enviados += len(respuesta.content)
+    return respuestas_304, enviados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--navegaciones", type=int, default=200)
+    parser.add_argument("--clientes", type=int, default=500)
+    args = parser.parse_args()
+
+    db = crear_sesion_sqlite()
+    _sembrar(db, args.clientes)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_async_db] = lambda: SesionEnHilo(db)
+    cliente = TestClient(app)
+
+    print(f"{args.navegaciones} navegaciones x {len(RUTAS)} listados, {args.clientes} clientes")
+    print(f"{'caché':<11} | {'consultas':>9} | {'304':>6} | {'KB enviados':>11} | {'ms total':>9}")
+    print("-" * 58)
+    ttl = cache_listados.CACHE_TTL_SECONDS
+    for nombre, ttl_prueba in (("desactivada", 0), ("activada", ttl or 300)):
+        cache_listados.CACHE_TTL_SECONDS = ttl_prueba
+        for recurso in cache_listados.RECURSOS:
+            cache_listados.invalidar(recurso)
+        cache_listados.estado_cache(reiniciar=True)
+        with contar_consultas(db.get_bind()) as consultas, cronometro() as tiempo:
+            respuestas_304, enviados = _navegar(cliente, args.navegaciones)
+        print(f"{nombre:<11} | {consultas.total:>9} | {respuestas_304:>6} | "
+              f"{enviados / 1024:>11.0f} | {tiempo['segundos'] * 1000:>9.0f}")
+    cache_listados.CACHE_TTL_SECONDS = ttl
+    print(cache_listados.estado_cache()["recursos"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark de la exportación en streaming de HORAS_TRAB.
+
+Para varios tamaños de tabla mide, por formato:
+
+- tiempo hasta el primer bloque de bytes,
+- tiempo total,
+- pico de memoria Python (tracemalloc) durante la exportación,
+
+y lo compara con el listado anterior (query().all() + un dict por fila), que
+carga toda la tabla antes de responder. El pico de memoria de la exportación
+debe mantenerse estable aunque crezca el nº de filas.
+
+Uso (desde la carpeta back):
+
+    python -m benchmarks.bench_exportacion
+    python -m benchmarks.bench_exportacion --tamanos 10000 100000 --formatos ndjson csv
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks._common import crear_sesion_sqlite  # noqa: F401  (variables de entorno)
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.horas_trab import HorasTrab
+from app.routes.horas_trab import _serialize_hora
+from app.services.consulta_horas import CAMPOS, consulta_exportacion, serializar_fila
+from app.services.exportacion import exportar
+
+
+def _engine_con_datos(filas: int):
+    ruta = os.path.join(tempfile.mkdtemp(), "export.db")
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(bind=engine)
+
+    inicio = date(2023, 1, 1)
+    lote = []
+    with engine.begin() as conn:
+        for n in range(filas):
+            lote.append({
+                "ID_EMPLEADO": f"E{n % 400:04d}",
+                "FECHA": inicio + timedelta(days=n // 1200),
+                "ID_PROYECTO": f"P{(n // 400) % 3}",
+                "ID_SOCIEDAD": "01",
+                "ID_CLIENTE": "CLI001",
+                "HORAS_DIA": 8.0,
+                "DESC_TAREA": "Desarrollo de funcionalidades del proyecto",
+                "ESTADO": "PENDIENTE",
+                "ORIGEN": "EXCEL",
+            })
+            if len(lote) == 5000:
+                conn.execute(insert(HorasTrab.__table__), lote)
+                lote = []
+        if lote:
+            conn.execute(insert(HorasTrab.__table__), lote)
+    return engine
+
+
+def _cronometrar(generar):
+    inicio = time.perf_counter()
+    primer_bloque = None
+    total_bytes = 0
+    for bloque in generar():
+        if primer_bloque is None:
+            primer_bloque = time.perf_counter() - inicio
+        total_bytes += len(bloque)
+    total = time.perf_counter() - inicio
+    return primer_bloque or total, total, total_bytes
+
+
+def _pico_memoria(generar):
+    # Pasada aparte: tracemalloc ralentiza mucho y falsearía los tiempos
+    tracemalloc.start()
+    for _ in generar():
+        pass
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--formatos", nargs="+", default=["ndjson", "csv", "xlsx"])
+    args = parser.parse_args()
+
+    campos = list(CAMPOS)
+    print(f"{'filas':>8} | {'formato':<14} | {'1er bloque ms':>13} | {'total s':>8} | {'pico MB':>8} | {'MB salida':>9}")
+    print("-" * 76)
+
+    for filas in args.tamanos:
+        engine = _engine_con_datos(filas)
+
+        def legacy():
+            db = sessionmaker(bind=engine)()
+            try:
+                datos = [_serialize_hora(registro) for registro in db.query(HorasTrab).all()]
+                yield repr(datos).encode("utf-8")
+            finally:
+                db.close()
+
+        resultados = [("listado .all()", legacy)]
+        for formato in args.formatos:
+            resultados.append((formato, lambda formato=formato: exportar(
+                engine, consulta_exportacion([], campos), campos,
+                lambda fila: serializar_fila(fila, campos), formato,
+            )))
+
+        for nombre, generar in resultados:
+            primero, total, salida = _cronometrar(generar)
+            pico = _pico_memoria(generar)
+            print(f"{filas:>8} | {nombre:<14} | {primero * 1000:>13.1f} | {total:>8.2f} | "
+                  f"{pico / 1e6:>8.1f} | {salida / 1e6:>9.1f}")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark de las métricas por petición (app/request_metrics.py).
+
+1. Llama varias veces a la previsualización de factura actual
+   (POST /api/factura/preview), a una ruta de prueba con el cálculo original
+   N+1 (bench_preview_factura._preview_legacy) y al listado de bancos, y
+   muestra lo que publican las métricas por ruta y la cabecera Server-Timing:
+   el N+1 aparece como cientos de sentencias por petición, con avisos en el
+   log (app/query_counter.py).
+2. Mide el coste del middleware: N peticiones a un listado cacheado (sin
+   SQL) con REQUEST_METRICS activado y desactivado.
+
+Uso (desde la carpeta back):
+
+    python -m benchmarks.bench_metricas
+    python -m benchmarks.bench_metricas --consultores 400 --peticiones 2000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+os.environ.setdefault("LISTADOS_CACHE_MARKER_DIR", tempfile.mkdtemp())
+# GET /metrics solo responde con token
+os.environ.setdefault("INTERNAL_METRICS_TOKEN", "bench")
+
+from benchmarks._common import crear_sesion_sqlite  # noqa: E402
+from benchmarks.bench_preview_factura import ANIO, ID_CLIENTE, MES, _preview_legacy, _sembrar  # noqa: E402
+from fastapi import Depends  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import request_metrics  # noqa: E402
+from app.database import SesionEnHilo, get_async_db, get_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.request_metrics import metricas_peticiones  # noqa: E402
+
+
+CUERPO = {"anio": ANIO, "mes": MES, "id_cliente": ID_CLIENTE}
+
+
+@app.post("/bench/preview-n1", include_in_schema=False)
+def _preview_n1(db=Depends(get_db)):
+    return _preview_legacy(ANIO, MES, ID_CLIENTE, db)
+
+
+def _tabla():
+    print(f"{'ruta':<28} | {'pet.':>5} | {'ms/pet.':>8} | {'SQL/pet.':>8} | {'BBDD ms':>8} | {'KB/pet.':>8}")
+    print("-" * 80)
+    for (metodo, ruta), metricas_ruta in sorted(metricas_peticiones._rutas.items()):
+        n = sum(metricas_ruta.latencia.cuentas)
+        print(f"{metodo + ' ' + ruta:<28} | {n:>5} | {metricas_ruta.latencia.suma * 1000 / n:>8.1f} | "
+              f"{metricas_ruta.consultas.suma / n:>8.1f} | {metricas_ruta.db.suma * 1000 / n:>8.1f} | "
+              f"{metricas_ruta.bytes.suma / 1024 / n:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consultores", type=int, default=100)
+    parser.add_argument("--proyectos", type=int, default=12)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--peticiones", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = crear_sesion_sqlite()
+    _sembrar(db, args.consultores, args.proyectos)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_async_db] = lambda: SesionEnHilo(db)
+    cliente = TestClient(app)
+
+    request_metrics.ACTIVO = True
+    cabeceras = {}
+    for _ in range(args.repeticiones):
+        for metodo, ruta in (("post", "/api/factura/preview"), ("post", "/bench/preview-n1"), ("get", "/api/bancos/")):
+            respuesta = getattr(cliente, metodo)(ruta, json=CUERPO) if metodo == "post" else cliente.get(ruta)
+            respuesta.raise_for_status()
+            cabeceras[ruta] = respuesta.headers["server-timing"]
+
+    _tabla()
+    print()
+    for ruta, cabecera in cabeceras.items():
+        print(f"Server-Timing {ruta}: {cabecera}")
+
+    metricas = cliente.get("/metrics", headers={"X-Internal-Token": os.environ["INTERNAL_METRICS_TOKEN"]}).text
+    print(f"\nGET /metrics: {len(metricas.splitlines())} líneas, p. ej.:")
+    for linea in metricas.splitlines():
+        if linea.startswith(('http_request_db_statements_bucket{method="POST",route="/bench/preview-n1"',
+                             "http_request_query_warnings_total{")):
+            print(f"  {linea}")
+
+    print(f"\nCoste del middleware ({args.peticiones} GET /api/bancos/ sin SQL):")
+    for activo in (False, True):
+        request_metrics.ACTIVO = activo
+        inicio = time.perf_counter()
+        for _ in range(args.peticiones):
+            cliente.get("/api/bancos/")
+        ms = (time.perf_counter() - inicio) * 1000 / args.peticiones
+        print(f"  REQUEST_METRICS={'true' if activo else 'false':<5}: {ms:.3f} ms/petición")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark del ZIP de PDF de facturas (GET /api/facturas/pdf-bundle).
+
+Con el almacén de PDF vacío, genera el paquete de N facturas:
+
+- sin pool:  FACTURAS_PDF_PROCESOS=0, los PDF se generan uno tras otro en
+             el hilo de la petición (lo mismo que descargarlos de uno en uno).
+- pool de P: los PDF se generan en P procesos.
+
+y después una segunda vez, con todos los PDF ya en el almacén. El pool se
+arranca antes de medir (en la API se crea una vez por proceso). Informa de
+PDF por segundo, tiempo hasta el primer trozo del ZIP y el trozo más grande
+enviado (el ZIP nunca está entero en memoria). Comprueba que el ZIP es
+válido y contiene todas las facturas y resumen.json.
+
+En una máquina con una sola CPU el pool no puede ir más rápido que sin él.
+
+Uso (desde la carpeta back):
+
+    python -m benchmarks.bench_paquete_pdf
+    python -m benchmarks.bench_paquete_pdf --facturas 100 --procesos 2 4
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import zipfile
+
+from benchmarks._common import crear_sesion_sqlite
+from benchmarks.bench_pdf_factura import _sembrar
+
+from app.models.factura import Factura
+from app.services import almacen_pdf, paquete_pdf
+from app.services.pdf_factura import datos_factura, renderizar
+
+
+def _medir(nombre, db, facturas):
+    paquete = paquete_pdf.preparar_paquete(db, facturas)
+    inicio = time.perf_counter()
+    primer_trozo = None
+    mayor = 0
+    salida = io.BytesIO()
+    for trozo in paquete.generar():
+        if primer_trozo is None:
+            primer_trozo = time.perf_counter() - inicio
+        mayor = max(mayor, len(trozo))
+        salida.write(trozo)
+    segundos = time.perf_counter() - inicio
+
+    with zipfile.ZipFile(salida) as archivo:
+        if archivo.testzip() is not None or len(archivo.namelist()) != len(facturas) + 1:
+            raise SystemExit(f"{nombre}: ZIP incorrecto")
+        resumen = json.loads(archivo.read("resumen.json"))
+
+    print(f"{nombre:<22} | {len(facturas) / segundos:>8.1f} | {primer_trozo * 1000:>10.0f} | "
+          f"{mayor / 1024:>10.0f} | {salida.tell() / 1024 / 1024:>7.1f} | {resumen['pdfs_por_segundo']:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--facturas", type=int, default=20)
+    parser.add_argument("--procesos", type=int, nargs="+", default=[2, 4])
+    args = parser.parse_args()
+
+    db = crear_sesion_sqlite()
+    _sembrar(db, args.facturas)
+    facturas = db.query(Factura).order_by(Factura.num_factura).all()
+
+    print(f"{args.facturas} facturas, {os.cpu_count()} CPU")
+    print(f"{'paquete':<22} | {'PDF/s':>8} | {'1er trozo ms':>10} | {'trozo máx KB':>10} | {'ZIP MB':>7} | "
+          f"{'resumen PDF/s':>12}")
+    print("-" * 86)
+
+    arranques = {}
+    for procesos in [0, *args.procesos]:
+        paquete_pdf.PROCESOS = procesos
+        paquete_pdf._descartar_pool()
+        if procesos:
+            # El pool vive mientras el proceso de la API: su arranque no cuenta por paquete
+            inicio = time.perf_counter()
+            datos = datos_factura(db, facturas[0])
+            pool = paquete_pdf._obtener_pool()
+            for futuro in [pool.submit(renderizar, datos) for _ in range(procesos)]:
+                futuro.result()
+            arranques[procesos] = time.perf_counter() - inicio
+        almacen_pdf.PDF_DIR = tempfile.mkdtemp()
+        _medir("sin pool" if procesos == 0 else f"pool de {procesos}", db, facturas)
+
+    _medir("desde el almacén", db, facturas)
+    paquete_pdf._descartar_pool()
+    for procesos, segundos in arranques.items():
+        print(f"Arranque del pool de {procesos} (una vez por proceso de la API): {segundos:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark de la descarga de PDF de facturas (GET /api/factura/pdf/{num}).
+
+Compara, para N facturas:
+
+- render:     generar el PDF con ReportLab en cada descarga (comportamiento
+              anterior: consulta cliente y banco y construye el documento).
+- 1ª descarga: almacén vacío, se genera y guarda el artefacto.
+- siguientes: descarga servida desde el almacén de PDF.
+- 304:        el navegador ya tiene el PDF y envía If-None-Match.
+
+Informa de ms por descarga y sentencias SQL.
+
+Uso (desde la carpeta back):
+
+    python -m benchmarks.bench_pdf_factura
+    python -m benchmarks.bench_pdf_factura --facturas 50 --repeticiones 5
+"""
+
+import argparse
+import os
+import tempfile
+from datetime import date
+
+os.environ.setdefault("FACTURAS_PDF_DIR", tempfile.mkdtemp())
+
+from benchmarks._common import crear_sesion_sqlite, cronometro  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import get_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.banco import Banco  # noqa: E402
+from app.models.cliente import Cliente  # noqa: E402
+from app.models.factura import Factura  # noqa: E402
+from app.query_counter import contar_consultas  # noqa: E402
+from app.services.pdf_factura import datos_factura, renderizar  # noqa: E402
+
+
+def _sembrar(db, facturas: int):
+    db.add(Banco(id_sociedad="01", id_banco_cobro="B1", n_banco_cobro="Banco", num_cuenta="0000", codigo_iban="ES00"))
+    db.add(Cliente(id_sociedad="01", id_cliente="CLI001", n_cliente="Cliente benchmark", cif="B00000000",
+                   direccion="Calle Mayor 1", id_banco_cobro="B1"))
+    nums = [f"QS2503{n:04d}" for n in range(facturas)]
+    db.add_all(Factura(id_sociedad="01", id_cliente="CLI001", num_factura=num, fec_factura=date(2025, 3, 31),
+                       concepto="Servicios de consultoría", base_imponible=1000 + n, total=1000 + n)
+               for n, num in enumerate(nums))
+    db.commit()
+    return nums
+
+
+def _fila(nombre, descargas, consultas, segundos):
+    print(f"{nombre:<12} | {descargas:>9} | {segundos * 1000 / descargas:>10.1f} | {consultas / descargas:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--facturas", type=int, default=20)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    db = crear_sesion_sqlite()
+    nums = _sembrar(db, args.facturas)
+    app.dependency_overrides[get_db] = lambda: db
+    cliente = TestClient(app)
+    engine = db.get_bind()
+
+    print(f"{args.facturas} facturas, {args.repeticiones} descargas de cada una")
+    print(f"{'ruta':<12} | {'descargas':>9} | {'ms/descarga':>10} | {'consultas/desc.':>14}")
+    print("-" * 55)
+
+    with contar_consultas(engine) as consultas, cronometro() as tiempo:
+        for _ in range(args.repeticiones):
+            for num in nums:
+                factura = db.query(Factura).filter(Factura.num_factura == num).first()
+                renderizar(datos_factura(db, factura))
+    _fila("render", len(nums) * args.repeticiones, consultas.total, tiempo["segundos"])
+
+    etags = {}
+    with contar_consultas(engine) as consultas, cronometro() as tiempo:
+        for num in nums:
+            respuesta = cliente.get(f"/api/factura/pdf/{num}")
+            respuesta.raise_for_status()
+            etags[num] = respuesta.headers["etag"]
+    _fila("1ª descarga", len(nums), consultas.total, tiempo["segundos"])
+
+    with contar_consultas(engine) as consultas, cronometro() as tiempo:
+        for _ in range(args.repeticiones):
+            for num in nums:
+                cliente.get(f"/api/factura/pdf/{num}").raise_for_status()
+    _fila("siguientes", len(nums) * args.repeticiones, consultas.total, tiempo["segundos"])
+
+    with contar_consultas(engine) as consultas, cronometro() as tiempo:
+        for _ in range(args.repeticiones):
+            for num in nums:
+                assert cliente.get(f"/api/factura/pdf/{num}", headers={"If-None-Match": etags[num]}).status_code == 304
+    _fila("304", len(nums) * args.repeticiones, consultas.total, tiempo["segundos"])
+
+
+if __name__ == "__main__":
+    main()
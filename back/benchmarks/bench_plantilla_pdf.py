@@ -0,0 +1,87 @@
+"""
+Benchmark de la plantilla precompilada del PDF de factura
+(app/services/plantilla_factura.py).
+
+Compara, para N PDF:
+
+- sin plantilla: cada PDF construye de nuevo estilos, TableStyle, textos
+                 fijos y logo (comportamiento anterior).
+- con plantilla: solo se rellenan los datos de la factura.
+
+Informa de ms por PDF y del pico de memoria asignada (tracemalloc) durante
+un PDF, y comprueba que ambos PDF son idénticos byte a byte.
+
+Uso (desde la carpeta back):
+
+    python -m benchmarks.bench_plantilla_pdf
+    python -m benchmarks.bench_plantilla_pdf --pdfs 50
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import date
+
+from benchmarks import _common  # noqa: F401  (variables de entorno de app.database)
+from reportlab import rl_config
+
+from app.services.pdf_factura import renderizar
+from app.services.plantilla_factura import Plantilla, ruta_logo
+
+
+def _datos(n: int):
+    return {
+        "num_factura": f"QS2503{n:04d}",
+        "fec_factura": date(2025, 3, 31),
+        "concepto": "Servicios de consultoría",
+        "base_imponible": 1000.0 + n,
+        "cliente": {"n_cliente": "Cliente benchmark", "direccion": "Calle Mayor 1", "cif": "B00000000",
+                    "telefono": "910000000"},
+        "banco": {"n_banco_cobro": "Banco", "num_cuenta": "0000", "codigo_iban": "ES00"},
+    }
+
+
+def _sin_plantilla(datos):
+    return renderizar(datos, Plantilla(ruta_logo()))
+
+
+def _medir(nombre, generar, pdfs):
+    inicio = time.perf_counter()
+    for n in range(pdfs):
+        generar(_datos(n))
+    ms = (time.perf_counter() - inicio) * 1000 / pdfs
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    antes, _ = tracemalloc.get_traced_memory()
+    generar(_datos(0))
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{nombre:<14} | {pdfs:>5} | {ms:>8.1f} | {(pico - antes) / 1024:>12.0f}")
+    return ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdfs", type=int, default=20)
+    args = parser.parse_args()
+
+    # Sin fecha ni ID aleatorio en el PDF, para poder compararlos
+    rl_config.invariant = 1
+    if _sin_plantilla(_datos(0)) != renderizar(_datos(0)):
+        raise SystemExit("Los PDF con y sin plantilla no son iguales")
+
+    inicio = time.perf_counter()
+    Plantilla(ruta_logo())
+    construccion = (time.perf_counter() - inicio) * 1000
+
+    print(f"{'PDF':<14} | {'PDFs':>5} | {'ms/PDF':>8} | {'pico KB/PDF':>12}")
+    print("-" * 48)
+    antes = _medir("sin plantilla", _sin_plantilla, args.pdfs)
+    despues = _medir("con plantilla", renderizar, args.pdfs)
+    print(f"\nx{antes / despues:.1f} más rápido; construir la plantilla (una vez por proceso): {construccion:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Benchmark de la previsualización de factura (_preview_calculo).
+
+Compara el cálculo original (todas las horas del mes en Python + get_tarifa y
+get_empleado_nombre por cada empleado/proyecto) con la consulta agregada
+actual, para un cliente con 200 consultores. Informa del nº de consultas y
+la latencia, y comprueba que ambas previsualizaciones coinciden.
+
+La versión actual lee las horas del resumen mensual (RESUMEN_HORAS_MES,
+reconstruido tras sembrar los datos) y se mide con el índice de tarifas en frío (se invalida antes
+de cada repetición: +1 consulta a HIST_PROYECTOS) y en caliente (0 consultas
+de tarifas).
+
+Uso (desde la carpeta back):
+
+    python -m benchmarks.bench_preview_factura
+    python -m benchmarks.bench_preview_factura --consultores 500 --repeticiones 20
+"""
+
+import argparse
+import random
+from calendar import monthrange
+from datetime import date, timedelta
+from statistics import median
+
+from sqlalchemy import extract
+
+from benchmarks._common import crear_sesion_sqlite, cronometro
+from app.models.cliente import Cliente
+from app.models.empleado import Empleado
+from app.models.hist_proyecto import HistProyecto
+from app.models.horas_trab import HorasTrab
+from app.models.proyecto import Proyecto
+from app.query_counter import contar_consultas
+from app.routes.factura import _preview_calculo
+from app.services import tarifas_timeline
+from app.services.resumen_horas import reconstruir
+
+
+ANIO = 2025
+MES = 3
+ID_CLIENTE = "CLI001"
+
+
+def _sembrar(db, consultores: int, proyectos: int, semilla: int = 7):
+    rnd = random.Random(semilla)
+
+    db.add(Cliente(id_sociedad="01", id_cliente=ID_CLIENTE, n_cliente="Cliente benchmark", cif="B00000000"))
+    db.add(Cliente(id_sociedad="01", id_cliente="OTRO", n_cliente="Otro cliente", cif="B11111111"))
+    for p in range(proyectos):
+        db.add(Proyecto(id_sociedad="01", id_proyecto=f"P{p:03d}", id_cliente=ID_CLIENTE, nombre_proyecto=f"P{p}"))
+    db.add(Proyecto(id_sociedad="01", id_proyecto="POTRO", id_cliente="OTRO", nombre_proyecto="Otro"))
+
+    dias = [date(ANIO, MES, d) for d in range(1, monthrange(ANIO, MES)[1] + 1) if date(ANIO, MES, d).weekday() < 5]
+
+    for e in range(consultores):
+        id_empleado = f"E{e:04d}"
+        db.add(Empleado(id_empleado=id_empleado, id_empleado_tracker=id_empleado, nombre=f"N{e}", apellidos=f"A{e}"))
+        asignados = rnd.sample(range(proyectos), k=min(2, proyectos))
+
+        for p in asignados:
+            # Histórico con varias tarifas, una de ellas posterior al mes
+            for desfase, tarifa in ((400, 35), (120, 40), (-30, 45)):
+                db.add(HistProyecto(
+                    id_sociedad="01", id_empleado=id_empleado, id_cliente=f"{ID_CLIENTE}-{desfase}",
+                    id_proyecto=f"P{p:03d}", fec_inicio=date(ANIO, MES, 1) - timedelta(days=desfase),
+                    tarifa=tarifa + e % 5,
+                ))
+
+        for dia in dias:
+            for p in asignados:
+                db.add(HorasTrab(
+                    id_empleado=id_empleado, fecha=dia, id_proyecto=f"P{p:03d}", id_sociedad="01",
+                    id_cliente=ID_CLIENTE, horas_dia=rnd.choice([2, 4, 3.5]), estado="PENDIENTE", origen="EXCEL",
+                ))
+        # Horas de otro mes y de otro cliente que no deben contar
+        db.add(HorasTrab(id_empleado=id_empleado, fecha=date(ANIO, MES + 1, 2), id_proyecto="P000",
+                         id_sociedad="01", id_cliente=ID_CLIENTE, horas_dia=8, estado="PENDIENTE"))
+        db.add(HorasTrab(id_empleado=id_empleado, fecha=dias[0], id_proyecto="POTRO",
+                         id_sociedad="01", id_cliente="OTRO", horas_dia=8, estado="PENDIENTE"))
+    db.commit()
+    reconstruir(db)
+
+
+def _preview_legacy(anio, mes, id_cliente, db):
+    """
+    Copia del cálculo original de _preview_calculo (antes de la consulta agregada).
+    """
+    def get_empleado_nombre(dni):
+        emp = db.query(Empleado).filter(Empleado.id_empleado == dni).first()
+        return f"{emp.nombre} {emp.apellidos}" if emp else dni
+
+    def get_tarifa(id_empleado, id_proyecto, fecha):
+        tarifa = db.query(HistProyecto).filter(
+            HistProyecto.id_empleado == id_empleado,
+            HistProyecto.id_proyecto == id_proyecto,
+            HistProyecto.fec_inicio <= fecha,
+        ).order_by(HistProyecto.fec_inicio.desc()).first()
+        return float(tarifa.tarifa) if tarifa else None
+
+    alertas = []
+    proyectos_ids = [p.id_proyecto for p in db.query(Proyecto.id_proyecto).filter(Proyecto.id_cliente == id_cliente)]
+    horas = db.query(HorasTrab).filter(
+        HorasTrab.id_proyecto.in_(proyectos_ids),
+        extract("year", HorasTrab.fecha) == anio,
+        extract("month", HorasTrab.fecha) == mes,
+    ).all()
+
+    agrupado = {}
+    for h in horas:
+        agrupado[(h.id_empleado, h.id_proyecto)] = agrupado.get((h.id_empleado, h.id_proyecto), 0) + float(h.horas_dia)
+
+    lineas, total_importe, total_horas = [], 0, 0
+    for (empleado, proyecto), horas_totales in agrupado.items():
+        tarifa = get_tarifa(empleado, proyecto, date(anio, mes, monthrange(anio, mes)[1]))
+        if not tarifa:
+            alertas.append(f"Falta tarifa para {empleado} en proyecto {proyecto}.")
+            continue
+        subtotal = round(horas_totales * tarifa, 2)
+        lineas.append({
+            "empleado_dni": empleado, "empleado": get_empleado_nombre(empleado), "proyecto": proyecto,
+            "horas": horas_totales, "tarifa_hora": tarifa, "subtotal": subtotal,
+        })
+        total_importe += subtotal
+        total_horas += horas_totales
+
+    return {
+        "anio": anio, "mes": mes, "id_cliente": id_cliente,
+        "total_horas": round(total_horas, 2), "total_importe": round(total_importe, 2),
+        "lineas": lineas, "alertas": alertas,
+    }
+
+
+def _medir(nombre, funcion, db, repeticiones, antes=None):
+    engine = db.get_bind()
+    tiempos = []
+    for _ in range(repeticiones):
+        db.expire_all()
+        if antes:
+            antes()
+        with contar_consultas(engine) as consultas, cronometro() as tiempo:
+            resultado = funcion(ANIO, MES, ID_CLIENTE, db)
+        tiempos.append(tiempo["segundos"])
+    print(f"{nombre:<20} | {consultas.total:>9} | {median(tiempos) * 1000:>10.1f} | {len(resultado['lineas']):>6}")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consultores", type=int, default=200)
+    parser.add_argument("--proyectos", type=int, default=12)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    db = crear_sesion_sqlite()
+    _sembrar(db, args.consultores, args.proyectos)
+
+    print(f"{'calculo':<20} | {'consultas':>9} | {'ms (med.)':>10} | {'lineas':>6}")
+    print("-" * 56)
+    legacy = _medir("por linea (N+1)", _preview_legacy, db, args.repeticiones)
+    _medir("agregado (frio)", _preview_calculo, db, args.repeticiones, antes=tarifas_timeline.invalidar)
+    nuevo = _medir("agregado (caliente)", _preview_calculo, db, args.repeticiones)
+
+    ordenar = lambda p: sorted(p["lineas"], key=lambda l: (l["empleado_dni"], l["proyecto"]))  # noqa: E731
+    iguales = (
+        ordenar(legacy) == ordenar(nuevo)
+        and legacy["total_importe"] == nuevo["total_importe"]
+        and legacy["total_horas"] == nuevo["total_horas"]
+        and sorted(legacy["alertas"]) == sorted(nuevo["alertas"])
+    )
+    if not iguales:
+        raise SystemExit("Las previsualizaciones no coinciden")
+    print("Previsualizaciones idénticas")
+
+
+if __name__ == "__main__":
+    main()
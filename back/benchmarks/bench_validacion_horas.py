@@ -0,0 +1,205 @@
+"""
+Benchmark de la validación de /preview-horas.
+
+Compara la validación fila a fila original (dos SELECT por fila) con el motor
+por conjuntos de app.services.validacion_horas sobre Excels sintéticos de
+1k, 10k y 100k filas, y comprueba que ambos devuelven el mismo resultado.
+
+Uso (desde la carpeta back):
+
+    python -m benchmarks.bench_validacion_horas
+    python -m benchmarks.bench_validacion_horas --tamanos 1000 10000 --sin-legacy
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+
+import pandas as pd
+from sqlalchemy import text
+
+from benchmarks._common import crear_sesion_sqlite, cronometro
+from app.models.empleado import Empleado
+from app.models.proyecto import Proyecto
+from app.query_counter import contar_consultas
+from app.services.validacion_horas import normalizar_dataframe, validar_horas
+
+
+NUM_EMPLEADOS = 300
+NUM_PROYECTOS = 60
+
+
+def _sembrar(db):
+    db.add_all(
+        Empleado(
+            id_empleado=f"E{i:05d}",
+            id_empleado_tracker=f"T{i:05d}",
+            nombre=f"Nombre{i}",
+            apellidos=f"Apellido{i}",
+        )
+        for i in range(NUM_EMPLEADOS)
+    )
+    db.add_all(
+        Proyecto(
+            id_sociedad="01",
+            id_proyecto=f"P{i:04d}",
+            id_cliente=f"C{i % 10:03d}",
+            nombre_proyecto=f"Proyecto {i}",
+        )
+        for i in range(NUM_PROYECTOS)
+    )
+    db.commit()
+
+
+def _excel_sintetico(filas: int, semilla: int = 42) -> pd.DataFrame:
+    """
+    Genera un DataFrame con el formato del Excel del Tracker.
+
+    Un 5% de las filas llevan errores (empleado/proyecto inexistente,
+    horas vacías o fecha inválida) para ejercitar todas las ramas.
+    """
+    rnd = random.Random(semilla)
+    inicio = date(2025, 1, 1)
+    datos: Dict[str, List] = {
+        "ID del empleado": [],
+        "Día": [],
+        "Código de proyecto": [],
+        "Tiempo trabajado": [],
+        "Nombre del proyecto": [],
+    }
+
+    for _ in range(filas):
+        empleado = f"E{rnd.randrange(NUM_EMPLEADOS):05d}"
+        proyecto = f"P{rnd.randrange(NUM_PROYECTOS):04d}"
+        dia = (inicio + timedelta(days=rnd.randrange(28))).strftime("%d/%m/%Y")
+        horas = rnd.choice([4, 6, 7.5, 8])
+
+        fallo = rnd.random()
+        if fallo < 0.01:
+            empleado = "NOEXISTE"
+        elif fallo < 0.02:
+            proyecto = "PNOEXISTE"
+        elif fallo < 0.03:
+            horas = None
+        elif fallo < 0.04:
+            dia = "no es fecha"
+        elif fallo < 0.05:
+            horas = "ocho"
+
+        datos["ID del empleado"].append(f" {empleado} ")
+        datos["Día"].append(dia)
+        datos["Código de proyecto"].append(proyecto)
+        datos["Tiempo trabajado"].append(horas)
+        datos["Nombre del proyecto"].append(f"Proyecto {proyecto}")
+
+    return pd.DataFrame(datos)
+
+
+def _validar_fila_a_fila(df: pd.DataFrame, db) -> Dict:
+    """
+    Copia de la validación original de preview_horas (antes del motor por conjuntos).
+    """
+    filas_validas: List[Dict] = []
+    errores: List[Dict] = []
+    total_horas = 0.0
+
+    for index, fila in df.iterrows():
+        try:
+            id_empleado = str(fila.get("ID del empleado", "")).strip()
+            id_proyecto = str(fila.get("Codigo de proyecto", fila.get("Código de proyecto", ""))).strip()
+            horas_dia = fila.get("Tiempo trabajado")
+            desc_tarea = fila.get("Nombre del proyecto")
+            desc_tarea = "" if pd.isna(desc_tarea) else str(desc_tarea)
+
+            fecha_raw = fila.get("Dia", fila.get("Día"))
+            fecha = None if pd.isna(fecha_raw) else pd.to_datetime(fecha_raw, dayfirst=True).date()
+
+            if not id_empleado:
+                errores.append({"fila": int(index) + 2, "mensaje": "Empleado vacio"})
+                continue
+            if not id_proyecto:
+                errores.append({"fila": int(index) + 2, "mensaje": "Proyecto vacio"})
+                continue
+            if pd.isna(horas_dia):
+                errores.append({"fila": int(index) + 2, "mensaje": "Horas vacias"})
+                continue
+            if fecha is None:
+                errores.append({"fila": int(index) + 2, "mensaje": "Fecha invalida"})
+                continue
+
+            empleado = db.execute(
+                text("SELECT 1 FROM EMPLEADOS WHERE ID_EMPLEADO = :id"), {"id": id_empleado}
+            ).fetchone()
+            if not empleado:
+                errores.append({"fila": int(index) + 2, "mensaje": "Empleado no existe"})
+                continue
+
+            proyecto = db.execute(
+                text("SELECT ID_CLIENTE FROM PROYECTOS WHERE ID_PROYECTO = :id"), {"id": id_proyecto}
+            ).fetchone()
+            if not proyecto:
+                errores.append({"fila": int(index) + 2, "mensaje": "Proyecto no existe"})
+                continue
+
+            horas = float(horas_dia)
+            total_horas += horas
+
+            filas_validas.append(
+                {
+                    "ID_SOCIEDAD": "01",
+                    "ID_EMPLEADO": id_empleado,
+                    "FECHA": fecha.isoformat(),
+                    "ID_CLIENTE": proyecto.ID_CLIENTE,
+                    "ID_PROYECTO": id_proyecto,
+                    "HORAS_DIA": horas,
+                    "DESC_TAREA": desc_tarea,
+                    "ESTADO": "PENDIENTE",
+                    "ORIGEN": "EXCEL",
+                }
+            )
+        except Exception as exc:
+            errores.append({"fila": int(index) + 2, "mensaje": str(exc)})
+
+    return {"filas_validas": filas_validas, "errores": errores, "total_horas": total_horas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--sin-legacy", action="store_true", help="No ejecuta la validación fila a fila")
+    args = parser.parse_args()
+
+    db = crear_sesion_sqlite()
+    _sembrar(db)
+    engine = db.get_bind()
+
+    print(f"{'filas':>8} | {'motor':<12} | {'consultas':>9} | {'segundos':>8} | {'filas/s':>10}")
+    print("-" * 60)
+
+    for tamano in args.tamanos:
+        df = normalizar_dataframe(_excel_sintetico(tamano))
+
+        with contar_consultas(engine) as consultas, cronometro() as tiempo:
+            nuevo = validar_horas(df, db)
+        print(
+            f"{tamano:>8} | {'conjuntos':<12} | {consultas.total:>9} | "
+            f"{tiempo['segundos']:>8.3f} | {tamano / tiempo['segundos']:>10.0f}"
+        )
+
+        if args.sin_legacy:
+            continue
+
+        with contar_consultas(engine) as consultas, cronometro() as tiempo:
+            legacy = _validar_fila_a_fila(df, db)
+        print(
+            f"{tamano:>8} | {'fila a fila':<12} | {consultas.total:>9} | "
+            f"{tiempo['segundos']:>8.3f} | {tamano / tiempo['segundos']:>10.0f}"
+        )
+
+        if legacy != nuevo:
+            raise SystemExit(f"Resultados distintos para {tamano} filas")
+
+
+if __name__ == "__main__":
+    main()
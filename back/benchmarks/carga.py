@@ -0,0 +1,407 @@
+"""
+Prueba de carga de la API con perfiles de uso y concurrencia.
+
+Simula N contables a la vez (usuarios virtuales con asyncio + httpx): cada
+uno elige una acción según los pesos del perfil, la ejecuta, espera
+--pausa-ms y repite hasta agotar --segundos. Acciones:
+
+- listados:      clientes, empleados, proyectos y bancos (como al navegar el front)
+- horas:         GET /api/horas?limit=50
+- facturas:      GET /api/facturas
+- preview:       POST /api/factura/preview del último mes, cliente al azar
+- pdf:           GET /api/factura/pdf/{num_factura} de una factura ya generada
+- importacion:   POST /preview-horas con un CSV del Tracker + POST /confirm-horas
+
+Perfiles (PERFILES): navegacion, cierre_mes (previsualizaciones y PDF de
+fin de mes), importacion y mixto.
+
+La API corre en un subproceso por servidor, sobre una copia de los datos
+de benchmarks/generador.py (SQLite):
+
+- uvicorn:  la aplicación ASGI servida por uvicorn (un worker).
+- workers:  uvicorn con --workers procesos (uvicorn --workers).
+- gunicorn: gunicorn.conf.py (workers de uvicorn, aplicación precargada en
+            el maestro) con --workers procesos. Necesita gunicorn y
+            uvicorn-worker instalados.
+- a2wsgi:   la misma envoltura que passenger_wsgi.py (a2wsgi.ASGIMiddleware)
+            en un servidor WSGI con un hilo por petición (wsgiref +
+            ThreadingMixIn), como el modo multihilo de Passenger. Este
+            servidor cierra la conexión tras cada respuesta (HTTP/1.0);
+            con --sin-keepalive el cliente hace lo mismo con el resto y
+            la comparación solo mide la envoltura.
+
+El tiempo hasta la primera respuesta de cada servidor mide el arranque
+(importar la aplicación y, con varios procesos, arrancar los workers).
+
+Para cada servidor, perfil y nº de usuarios informa de peticiones/s y
+latencia p50/p95/p99 por ruta, y con --salida lo guarda en JSON. Con dos
+servidores muestra al final la comparación de peticiones/s.
+
+El cliente de carga comparte máquina con la API: con pocos núcleos, las
+cifras absolutas son bajas, pero la comparación entre servidores es válida.
+
+Uso (desde la carpeta back):
+
+    python -m benchmarks.carga
+    python -m benchmarks.carga --perfil cierre_mes --usuarios 1 8 32 --segundos 30
+    python -m benchmarks.carga --servidores uvicorn a2wsgi --sin-keepalive --salida carga.json
+    python -m benchmarks.carga --servidores a2wsgi gunicorn --workers 4 --usuarios 16 64
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from benchmarks import generador
+from benchmarks.generador import ESCALAS, FIN, csv_importacion, id_cliente
+import httpx
+
+
+SERVIDORES = ("uvicorn", "workers", "gunicorn", "a2wsgi")
+
+CONFIG_GUNICORN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+PERFILES: Dict[str, Dict[str, int]] = {
+    "navegacion": {"listados": 6, "horas": 3, "facturas": 1},
+    "cierre_mes": {"preview": 5, "pdf": 3, "listados": 2},
+    "importacion": {"importacion": 1},
+    "mixto": {"listados": 5, "horas": 2, "facturas": 1, "preview": 3, "pdf": 2, "importacion": 1},
+}
+
+LISTADOS = ("/api/clientes/", "/api/empleados/", "/api/proyectos/", "/api/bancos/")
+
+
+# ============================================================
+# SERVIDOR (subproceso)
+# ============================================================
+
+def aplicacion():
+    """
+    La API sobre el fichero SQLite de CARGA_SQLITE. uvicorn --factory y
+    gunicorn la cargan como "benchmarks.carga:aplicacion()".
+    """
+    from sqlalchemy.orm import sessionmaker
+
+    from app.database import crear_engine, dependencia_en_hilo, get_async_db, get_db
+    from app.main import app
+
+    engine = crear_engine(f"sqlite:///{os.environ['CARGA_SQLITE']}", connect_args={"check_same_thread": False})
+    Sesion = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def sesion():
+        db = Sesion()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = sesion
+    app.dependency_overrides[get_async_db] = dependencia_en_hilo(Sesion)
+    return app
+
+
+def _servir_a2wsgi(puerto: int):
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+    from a2wsgi import ASGIMiddleware
+
+    class _Servidor(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+        request_queue_size = 128
+
+    class _SinLog(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    make_server("127.0.0.1", puerto, ASGIMiddleware(aplicacion()), server_class=_Servidor,
+                handler_class=_SinLog).serve_forever()
+
+
+def _comando(servidor: str, puerto: int, workers: int) -> List[str]:
+    uvicorn = [sys.executable, "-m", "uvicorn", "--factory", "benchmarks.carga:aplicacion",
+               "--host", "127.0.0.1", "--port", str(puerto), "--log-level", "warning"]
+    if servidor == "uvicorn":
+        return uvicorn
+    if servidor == "workers":
+        return uvicorn + ["--workers", str(workers)]
+    if servidor == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "-c", CONFIG_GUNICORN, "--bind", f"127.0.0.1:{puerto}",
+                "--workers", str(workers), "benchmarks.carga:aplicacion()"]
+    return [sys.executable, "-m", "benchmarks.carga", "--servir-a2wsgi", "--puerto", str(puerto)]
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _arrancar(servidor: str, plantilla: str, workers: int):
+    """
+    Arranca la API sobre una copia de los datos. Devuelve (proceso, url
+    base, segundos hasta la primera respuesta).
+    """
+    copia = os.path.join(tempfile.mkdtemp(prefix="carga_db_"), "bench.db")
+    shutil.copyfile(plantilla, copia)
+    # PDF, marcadores de caché y previsualizaciones propios de cada servidor,
+    # sin prerender. Las previsualizaciones en SQLite, compartidas por sus
+    # workers: el confirm puede llegar a otro proceso que el preview
+    entorno = {
+        **os.environ,
+        "FACTURAS_PDF_DIR": tempfile.mkdtemp(prefix="carga_pdf_"),
+        "LISTADOS_CACHE_MARKER_DIR": tempfile.mkdtemp(prefix="carga_cache_"),
+        "PREVIEW_STORE": "sqlite",
+        "PREVIEW_STORE_PATH": os.path.join(os.path.dirname(copia), "previews.sqlite3"),
+        "FACTURAS_PDF_PRERENDER": "false",
+        "CARGA_SQLITE": copia,
+    }
+    puerto = _puerto_libre()
+    inicio = time.perf_counter()
+    # stdout: el log de accesos de gunicorn.conf.py
+    proceso = subprocess.Popen(_comando(servidor, puerto, workers), env=entorno, stdout=subprocess.DEVNULL)
+
+    base = f"http://127.0.0.1:{puerto}"
+    for _ in range(600):
+        try:
+            if httpx.get(f"{base}/api/bancos/").status_code == 200:
+                return proceso, base, time.perf_counter() - inicio
+        except httpx.TransportError:
+            pass
+        if proceso.poll() is not None:
+            break
+        time.sleep(0.05)
+    proceso.terminate()
+    raise SystemExit(f"El servidor {servidor} no arrancó")
+
+
+# ============================================================
+# USUARIOS VIRTUALES
+# ============================================================
+
+class Resultados:
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.errores: Dict[str, int] = defaultdict(int)
+
+    def anotar(self, ruta: str, inicio: float, respuesta) -> None:
+        self.latencias[ruta].append((time.perf_counter() - inicio) * 1000)
+        if respuesta is None or respuesta.status_code >= 400:
+            self.errores[ruta] += 1
+
+
+async def _peticion(cliente, resultados: Resultados, ruta: str, metodo: str, url: str, **kwargs):
+    inicio = time.perf_counter()
+    try:
+        respuesta = await cliente.request(metodo, url, **kwargs)
+    except httpx.HTTPError:
+        respuesta = None
+    resultados.anotar(ruta, inicio, respuesta)
+    return respuesta
+
+
+class Acciones:
+    """
+    Acciones de un contable. Los datos que necesitan (clientes, facturas,
+    CSV) se preparan antes de la carga.
+    """
+
+    def __init__(self, escala, numeros_factura: List[str], csv: bytes):
+        self.escala = escala
+        self.numeros_factura = numeros_factura
+        self.csv = csv
+
+    async def listados(self, cliente, resultados, rnd):
+        for url in LISTADOS:
+            await _peticion(cliente, resultados, f"GET {url}", "GET", url)
+
+    async def horas(self, cliente, resultados, rnd):
+        await _peticion(cliente, resultados, "GET /api/horas", "GET", "/api/horas", params={"limit": 50})
+
+    async def facturas(self, cliente, resultados, rnd):
+        await _peticion(cliente, resultados, "GET /api/facturas", "GET", "/api/facturas")
+
+    async def preview(self, cliente, resultados, rnd):
+        await _peticion(cliente, resultados, "POST /api/factura/preview", "POST", "/api/factura/preview", json={
+            "anio": FIN.year, "mes": FIN.month, "id_cliente": id_cliente(rnd.randrange(self.escala.clientes))})
+
+    async def pdf(self, cliente, resultados, rnd):
+        await _peticion(cliente, resultados, "GET /api/factura/pdf/{num_factura}", "GET",
+                        f"/api/factura/pdf/{rnd.choice(self.numeros_factura)}")
+
+    async def importacion(self, cliente, resultados, rnd):
+        respuesta = await _peticion(cliente, resultados, "POST /preview-horas", "POST", "/preview-horas",
+                                    files={"archivo": ("horas.csv", self.csv, "text/csv")})
+        if respuesta is not None and respuesta.status_code == 200:
+            # El mismo fichero en cada importación: a partir de la segunda, las horas se omiten
+            await _peticion(cliente, resultados, "POST /confirm-horas", "POST", "/confirm-horas",
+                            json={"import_token": respuesta.json()["import_token"]})
+
+
+async def _usuario(n: int, base: str, acciones: Acciones, perfil: Dict[str, int], fin: float, pausa: float,
+                   keepalive: bool, resultados: Resultados):
+    rnd = random.Random(n)
+    nombres, pesos = list(perfil), list(perfil.values())
+    limites = httpx.Limits(max_keepalive_connections=1 if keepalive else 0)
+    async with httpx.AsyncClient(base_url=base, timeout=120, limits=limites) as cliente:
+        while time.perf_counter() < fin:
+            accion = rnd.choices(nombres, pesos)[0]
+            await getattr(acciones, accion)(cliente, resultados, rnd)
+            if pausa:
+                await asyncio.sleep(rnd.uniform(0, 2 * pausa))
+
+
+async def _carga(base: str, acciones: Acciones, perfil: Dict[str, int], usuarios: int, segundos: float,
+                 pausa: float, keepalive: bool) -> Dict:
+    resultados = Resultados()
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _usuario(n, base, acciones, perfil, inicio + segundos, pausa, keepalive, resultados)
+        for n in range(usuarios)
+    ))
+    duracion = time.perf_counter() - inicio
+    return _resumen(resultados, duracion)
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+
+def _resumen(resultados: Resultados, duracion: float) -> Dict:
+    rutas = {}
+    for ruta, latencias in sorted(resultados.latencias.items()):
+        rutas[ruta] = {
+            "peticiones": len(latencias),
+            "req_s": round(len(latencias) / duracion, 2),
+            "ms_p50": round(_percentil(latencias, 50), 1),
+            "ms_p95": round(_percentil(latencias, 95), 1),
+            "ms_p99": round(_percentil(latencias, 99), 1),
+            "errores": resultados.errores.get(ruta, 0),
+        }
+    todas = [latencia for latencias in resultados.latencias.values() for latencia in latencias]
+    return {
+        "segundos": round(duracion, 1),
+        "peticiones": len(todas),
+        "req_s": round(len(todas) / duracion, 2),
+        "ms_p50": round(_percentil(todas, 50), 1) if todas else None,
+        "ms_p95": round(_percentil(todas, 95), 1) if todas else None,
+        "ms_p99": round(_percentil(todas, 99), 1) if todas else None,
+        "errores": sum(resultados.errores.values()),
+        "rutas": rutas,
+    }
+
+
+# ============================================================
+# PREPARACIÓN Y EJECUCIÓN
+# ============================================================
+
+def _preparar(base: str, escala, facturas: int) -> List[str]:
+    """
+    Genera facturas del último mes (fuera de la medición) para las
+    descargas de PDF.
+    """
+    numeros = []
+    with httpx.Client(base_url=base, timeout=120) as cliente:
+        for n in range(min(facturas, escala.clientes)):
+            respuesta = cliente.post("/api/factura/generar", json={
+                "id_sociedad": generador.ID_SOCIEDAD, "anio": FIN.year, "mes": FIN.month,
+                "id_cliente": id_cliente(n), "concepto": "Servicios de consultoría"})
+            if respuesta.status_code == 200:
+                numeros.append(respuesta.json()["num_factura"])
+    if not numeros:
+        raise SystemExit("No se pudo generar ninguna factura para las descargas de PDF")
+    return numeros
+
+
+def _tabla(servidor: str, perfil: str, usuarios: int, resultado: Dict) -> None:
+    print(f"\n{servidor} · {perfil} · {usuarios} usuario(s): {resultado['req_s']:.1f} req/s, "
+          f"p50 {resultado['ms_p50']} ms, p95 {resultado['ms_p95']} ms, {resultado['errores']} errores")
+    print(f"  {'ruta':<38} | {'pet.':>6} | {'req/s':>7} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'err.':>4}")
+    for ruta, datos in resultado["rutas"].items():
+        print(f"  {ruta:<38} | {datos['peticiones']:>6} | {datos['req_s']:>7.1f} | {datos['ms_p50']:>8.1f} | "
+              f"{datos['ms_p95']:>8.1f} | {datos['ms_p99']:>8.1f} | {datos['errores']:>4}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servidores", nargs="+", choices=SERVIDORES, default=["uvicorn", "a2wsgi"])
+    parser.add_argument("--workers", type=int, default=2, help="procesos de los servidores workers y gunicorn")
+    parser.add_argument("--perfil", nargs="+", choices=PERFILES, default=["mixto"])
+    parser.add_argument("--usuarios", nargs="+", type=int, default=[1, 8])
+    parser.add_argument("--segundos", type=float, default=15)
+    parser.add_argument("--calentamiento", type=float, default=3)
+    parser.add_argument("--pausa-ms", type=float, default=0, help="pausa media entre acciones de un usuario")
+    parser.add_argument("--sin-keepalive", action="store_true", help="una conexión nueva por petición")
+    parser.add_argument("--escala", choices=ESCALAS, default="mini")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--facturas", type=int, default=10, help="facturas generadas para las descargas de PDF")
+    parser.add_argument("--filas-importacion", type=int, default=500)
+    parser.add_argument("--salida", help="fichero JSON con los resultados")
+    # Uso interno: servidor a2wsgi del subproceso
+    parser.add_argument("--servir-a2wsgi", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--puerto", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.servir_a2wsgi:
+        _servir_a2wsgi(args.puerto)
+        return
+
+    if "gunicorn" in args.servidores and importlib.util.find_spec("gunicorn") is None:
+        parser.error("gunicorn no está instalado (pip install gunicorn uvicorn-worker)")
+
+    escala = ESCALAS[args.escala]
+    plantilla = generador.plantilla_sqlite(args.escala, args.semilla)
+    csv = csv_importacion(escala, args.semilla, filas=args.filas_importacion)
+    keepalive = not args.sin_keepalive
+    informe = {"escala": args.escala, "semilla": args.semilla, "segundos": args.segundos,
+               "pausa_ms": args.pausa_ms, "keepalive": keepalive, "workers": args.workers, "cpus": os.cpu_count(), "resultados": []}
+
+    for servidor in args.servidores:
+        proceso, base, arranque = _arrancar(servidor, plantilla, args.workers)
+        print(f"\n{servidor}: primera respuesta a los {arranque:.1f} s")
+        try:
+            acciones = Acciones(escala, _preparar(base, escala, args.facturas), csv)
+            for perfil in args.perfil:
+                for usuarios in args.usuarios:
+                    asyncio.run(_carga(base, acciones, PERFILES[perfil], usuarios, args.calentamiento,
+                                       args.pausa_ms / 1000, keepalive))
+                    resultado = asyncio.run(_carga(base, acciones, PERFILES[perfil], usuarios, args.segundos,
+                                                   args.pausa_ms / 1000, keepalive))
+                    _tabla(servidor, perfil, usuarios, resultado)
+                    informe["resultados"].append({"servidor": servidor, "arranque_s": round(arranque, 2),
+                                                  "perfil": perfil, "usuarios": usuarios, **resultado})
+        finally:
+            proceso.terminate()
+            proceso.wait()
+
+    if len(args.servidores) > 1:
+        print(f"\n{'perfil':<12} | {'usuarios':>8} | " + " | ".join(f"{s + ' req/s':>14}" for s in args.servidores)
+              + f" | {'p95 ms':>16}")
+        print("-" * (40 + 17 * len(args.servidores)))
+        for perfil in args.perfil:
+            for usuarios in args.usuarios:
+                filas = [r for s in args.servidores for r in informe["resultados"]
+                         if r["servidor"] == s and r["perfil"] == perfil and r["usuarios"] == usuarios]
+                print(f"{perfil:<12} | {usuarios:>8} | " + " | ".join(f"{r['req_s']:>14.1f}" for r in filas)
+                      + " | " + " / ".join(f"{r['ms_p95']:g}" for r in filas))
+
+    if args.salida:
+        with open(args.salida, "w") as fichero:
+            json.dump(informe, fichero, indent=2, ensure_ascii=False)
+        print(f"\nResultados: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
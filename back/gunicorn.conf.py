@@ -0,0 +1,71 @@
+"""
+Configuración de gunicorn para servir la API como aplicación ASGI nativa,
+con varios procesos worker de uvicorn (paquetes gunicorn y uvicorn-worker).
+
+Alternativa a passenger_wsgi.py, que envuelve la aplicación en WSGI con
+a2wsgi: aquí los endpoints async se ejecutan en el bucle de eventos de
+cada worker, sin el puente WSGI ni un hilo por petición.
+
+Arranque (desde la carpeta back, con el .env de producción):
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+- preload_app: el proceso maestro importa la aplicación (pandas, numpy,
+  openpyxl, ReportLab y la plantilla del PDF de factura) una sola vez y los
+  workers la heredan al hacer fork: arrancan al momento y comparten esa
+  memoria mientras no la modifiquen.
+- post_fork: cada worker descarta las conexiones del pool heredadas del
+  maestro (engine.dispose(close=False)) y abre las suyas.
+- Recarga sin cortar peticiones: kill -HUP <pid del maestro> arranca workers
+  nuevos y cierra los antiguos cuando terminan sus peticiones (hasta
+  API_GRACEFUL_TIMEOUT segundos). Con preload_app, HUP no vuelve a leer el
+  código: tras un git pull hay que reiniciar el maestro, o hacer
+  kill -USR2 <pid> (arranca otro maestro con el código nuevo) y después
+  kill -QUIT al maestro antiguo.
+- kill -TTIN / -TTOU <pid del maestro> añade o quita un worker.
+
+Cada worker tiene su propio pool de MySQL (app/database.py): API_WORKERS x
+(DB_POOL_SIZE + DB_MAX_OVERFLOW), el doble con la sesión asíncrona, no debe
+superar el max_user_connections del usuario MySQL.
+
+Configuración (.env o entorno):
+    API_BIND              dirección de escucha (por defecto 127.0.0.1:8000)
+    API_WORKERS           procesos worker (por defecto, nº de CPU y como mínimo 2)
+    API_TIMEOUT           segundos sin respuesta antes de reiniciar un worker (por defecto 120)
+    API_GRACEFUL_TIMEOUT  segundos para terminar las peticiones en curso al recargar o parar (por defecto 30)
+    API_MAX_REQUESTS      reinicia cada worker tras N peticiones (por defecto 0, nunca)
+    API_PRELOAD           true (por defecto) importa la aplicación en el maestro antes del fork
+"""
+
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+bind = os.getenv("API_BIND", "127.0.0.1:8000")
+workers = int(os.getenv("API_WORKERS", "0")) or max(2, multiprocessing.cpu_count())
+worker_class = "uvicorn_worker.UvicornWorker"
+
+timeout = int(os.getenv("API_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("API_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+max_requests = int(os.getenv("API_MAX_REQUESTS", "0"))
+# Que los workers no se reinicien todos a la vez
+max_requests_jitter = max_requests // 10
+
+preload_app = os.getenv("API_PRELOAD", "true").strip().lower() == "true"
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Las conexiones abiertas en el maestro (INIT_DB, por ejemplo) no se
+    # comparten entre procesos: el worker las olvida sin cerrarlas
+    from app.database import engine
+
+    engine.dispose(close=False)
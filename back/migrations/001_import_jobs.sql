@@ -0,0 +1,17 @@
+-- Trabajos de importación en segundo plano (app/models/import_job.py)
+CREATE TABLE IF NOT EXISTS IMPORT_JOBS (
+    ID_JOB VARCHAR(36) NOT NULL,
+    TIPO VARCHAR(20) NOT NULL,
+    ESTADO VARCHAR(20) NOT NULL,
+    FILAS_PROCESADAS INT NOT NULL DEFAULT 0,
+    FILAS_TOTALES INT NULL,
+    ERRORES INT NOT NULL DEFAULT 0,
+    RESULTADO MEDIUMTEXT NULL,
+    MENSAJE_ERROR TEXT NULL,
+    FEC_CREACION DATETIME NOT NULL,
+    FEC_INICIO DATETIME NULL,
+    FEC_ACTUALIZACION DATETIME NULL,
+    FEC_FIN DATETIME NULL,
+    PRIMARY KEY (ID_JOB),
+    INDEX ix_IMPORT_JOBS_ESTADO (ESTADO)
+);
@@ -0,0 +1,8 @@
+-- Índices para los filtros por periodo (app/services/periodos.py)
+-- Las consultas mensuales usan FECHA >= inicio AND FECHA < fin en lugar de
+-- YEAR(FECHA) / MONTH(FECHA), por lo que pueden recorrer solo el rango del índice.
+-- migrations/aplicar.py omite los índices que ya existan.
+CREATE INDEX ix_HORAS_TRAB_CLIENTE_FECHA ON HORAS_TRAB (ID_CLIENTE, FECHA);
+CREATE INDEX ix_HORAS_TRAB_PROYECTO_FECHA ON HORAS_TRAB (ID_PROYECTO, FECHA);
+CREATE INDEX ix_HORAS_TRAB_ESTADO ON HORAS_TRAB (ESTADO);
+CREATE INDEX ix_FACTURAS_CLIENTE_FECHA ON FACTURAS (ID_CLIENTE, FEC_FACTURA);
@@ -0,0 +1,10 @@
+-- Contadores de numeración de facturas (app/models/secuencia_factura.py)
+-- Las filas se crean en la primera reserva de cada prefijo, partiendo del
+-- mayor NUM_FACTURA existente, por lo que no hace falta cargar datos.
+-- Una fila por prefijo: NUM_FACTURA es único entre sociedades.
+CREATE TABLE IF NOT EXISTS SECUENCIAS_FACTURA (
+    PREFIJO VARCHAR(10) NOT NULL,
+    ULTIMO_NUMERO INT NOT NULL DEFAULT 0,
+    FEC_ACTUALIZACION DATETIME NULL,
+    PRIMARY KEY (PREFIJO)
+);
@@ -0,0 +1,4 @@
+-- Paginación por clave de GET /api/horas (app/services/consulta_horas.py)
+-- El orden (FECHA, ID_EMPLEADO, ID_PROYECTO) se recorre directamente en el
+-- índice, sin ordenar la tabla en cada página.
+CREATE INDEX ix_HORAS_TRAB_FECHA_EMP_PROY ON HORAS_TRAB (FECHA, ID_EMPLEADO, ID_PROYECTO);
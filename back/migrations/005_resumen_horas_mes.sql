@@ -0,0 +1,42 @@
+-- Resumen mensual de HORAS_TRAB (app/models/resumen_horas_mes.py)
+-- La previsualización de facturas lee esta tabla en lugar de las filas
+-- diarias. Se carga aquí con el histórico existente; después la mantienen
+-- las escrituras de horas. Para regenerarla o comprobarla:
+--     python -m app.services.resumen_horas reconstruir | verificar
+CREATE TABLE IF NOT EXISTS RESUMEN_HORAS_MES (
+    ANIO SMALLINT NOT NULL,
+    MES SMALLINT NOT NULL,
+    ID_SOCIEDAD VARCHAR(10) NOT NULL,
+    ID_CLIENTE VARCHAR(50) NOT NULL,
+    ID_PROYECTO VARCHAR(50) NOT NULL,
+    ID_EMPLEADO VARCHAR(20) NOT NULL,
+    HORAS_TOTAL DECIMAL(12, 4) NOT NULL DEFAULT 0,
+    HORAS_PENDIENTES DECIMAL(12, 4) NOT NULL DEFAULT 0,
+    HORAS_FACTURADAS DECIMAL(12, 4) NOT NULL DEFAULT 0,
+    NUM_REGISTROS INT NOT NULL DEFAULT 0,
+    PRIMERA_FECHA DATE NULL,
+    FEC_ACTUALIZACION DATETIME NULL,
+    PRIMARY KEY (ANIO, MES, ID_SOCIEDAD, ID_CLIENTE, ID_PROYECTO, ID_EMPLEADO)
+);
+
+-- REPLACE: si la migración se vuelve a aplicar (o la tabla ya tenía filas),
+-- cada resumen se sustituye por el recalculado desde HORAS_TRAB
+REPLACE INTO RESUMEN_HORAS_MES (
+    ANIO, MES, ID_SOCIEDAD, ID_CLIENTE, ID_PROYECTO, ID_EMPLEADO,
+    HORAS_TOTAL, HORAS_PENDIENTES, HORAS_FACTURADAS, NUM_REGISTROS, PRIMERA_FECHA, FEC_ACTUALIZACION
+)
+SELECT
+    YEAR(FECHA),
+    MONTH(FECHA),
+    COALESCE(ID_SOCIEDAD, ''),
+    COALESCE(ID_CLIENTE, ''),
+    ID_PROYECTO,
+    ID_EMPLEADO,
+    COALESCE(SUM(CAST(HORAS_DIA AS DECIMAL(12, 4))), 0),
+    COALESCE(SUM(CASE WHEN ESTADO = 'PENDIENTE' THEN CAST(HORAS_DIA AS DECIMAL(12, 4)) ELSE 0 END), 0),
+    COALESCE(SUM(CASE WHEN ESTADO = 'FACTURADA' THEN CAST(HORAS_DIA AS DECIMAL(12, 4)) ELSE 0 END), 0),
+    COUNT(*),
+    MIN(FECHA),
+    NOW()
+FROM HORAS_TRAB
+GROUP BY YEAR(FECHA), MONTH(FECHA), COALESCE(ID_SOCIEDAD, ''), COALESCE(ID_CLIENTE, ''), ID_PROYECTO, ID_EMPLEADO;
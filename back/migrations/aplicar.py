@@ -0,0 +1,102 @@
+"""
+Aplica las migraciones SQL pendientes de la carpeta migrations.
+
+Cada fichero NNN_descripcion.sql se ejecuta una sola vez, en orden, y queda
+registrado en la tabla SCHEMA_MIGRACIONES.
+
+MySQL no admite CREATE INDEX IF NOT EXISTS: las sentencias CREATE INDEX se
+omiten si el índice ya existe (information_schema.statistics), de modo que
+un fichero que falló a medias se puede volver a aplicar.
+
+Uso (desde la carpeta back, con el .env de producción):
+
+    python -m migrations.aplicar            # aplica las pendientes
+    python -m migrations.aplicar --listar   # muestra aplicadas y pendientes
+"""
+
+import argparse
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from sqlalchemy import text
+
+from app.database import engine
+
+
+CARPETA = Path(__file__).resolve().parent
+
+_CREAR_INDICE = re.compile(r"^CREATE\s+(?:UNIQUE\s+)?INDEX\s+`?(\w+)`?\s+ON\s+`?(\w+)`?", re.IGNORECASE)
+
+
+def _sentencias(sql: str) -> List[str]:
+    # Se quitan los comentarios de línea y se separa por ';' al final de línea
+    lineas = [linea for linea in sql.splitlines() if not linea.strip().startswith("--")]
+    return [s.strip() for s in "\n".join(lineas).split(";\n") if s.strip().rstrip(";")]
+
+
+def _indice_existente(conn, sentencia: str) -> bool:
+    """
+    True si la sentencia es un CREATE INDEX de un índice que ya existe.
+    """
+    crear = _CREAR_INDICE.match(sentencia)
+    if crear is None:
+        return False
+    indice, tabla = crear.groups()
+    return bool(conn.execute(
+        text(
+            "SELECT COUNT(*) FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = :tabla AND index_name = :indice"
+        ),
+        {"tabla": tabla, "indice": indice},
+    ).scalar())
+
+
+def _asegurar_tabla(conn) -> None:
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS SCHEMA_MIGRACIONES (
+            VERSION VARCHAR(100) NOT NULL PRIMARY KEY,
+            FEC_APLICACION DATETIME NOT NULL
+        )
+        """
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listar", action="store_true", help="Solo muestra el estado")
+    args = parser.parse_args()
+
+    ficheros = sorted(CARPETA.glob("[0-9][0-9][0-9]_*.sql"))
+
+    with engine.begin() as conn:
+        _asegurar_tabla(conn)
+        aplicadas = {fila[0] for fila in conn.execute(text("SELECT VERSION FROM SCHEMA_MIGRACIONES"))}
+
+    for fichero in ficheros:
+        version = fichero.stem
+        if version in aplicadas:
+            print(f"[aplicada]  {version}")
+            continue
+        if args.listar:
+            print(f"[pendiente] {version}")
+            continue
+
+        # MySQL no es transaccional con DDL: cada fichero debe ser idempotente
+        with engine.begin() as conn:
+            for sentencia in _sentencias(fichero.read_text(encoding="utf-8")):
+                if _indice_existente(conn, sentencia):
+                    print(f"            índice ya existente, se omite: {sentencia.splitlines()[0][:80]}")
+                    continue
+                conn.execute(text(sentencia))
+            conn.execute(
+                text("INSERT INTO SCHEMA_MIGRACIONES (VERSION, FEC_APLICACION) VALUES (:v, :f)"),
+                {"v": version, "f": datetime.utcnow()},
+            )
+        print(f"[aplicando] {version} ... ok")
+
+
+if __name__ == "__main__":
+    main()
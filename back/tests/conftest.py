@@ -0,0 +1,116 @@
+"""
+Configuración común de las pruebas.
+
+Se ejecutan desde la carpeta back:
+
+    python -m pytest
+
+Usan SQLite con el esquema de los modelos ORM, de forma que no necesitan
+acceso al MySQL real. Los marcadores de caché, el almacén de PDF y el de
+previsualizaciones van a una carpeta temporal propia, para no afectar a una
+API que se esté ejecutando en la misma máquina.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+# app.database exige las variables de conexión al importarse; en las
+# pruebas no se conecta nunca a MySQL, basta con que existan.
+for _clave, _valor in {
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "3306",
+    "DB_NAME": "test",
+    "SECRET_KEY": "test",
+}.items():
+    os.environ.setdefault(_clave, _valor)
+
+_TEMPORAL = tempfile.mkdtemp(prefix="pruebas_back_")
+os.environ.update({
+    "TARIFAS_CACHE_MARKER": os.path.join(_TEMPORAL, "tarifas.version"),
+    "LISTADOS_CACHE_MARKER_DIR": _TEMPORAL,
+    "FACTURAS_PDF_DIR": os.path.join(_TEMPORAL, "pdf"),
+    "FACTURAS_PDF_PRERENDER": "false",
+    "PREVIEW_STORE": "memory",
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.database import Base, SesionEnHilo, get_async_db, get_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import (  # noqa: E402,F401
+    banco, cliente, empleado, factura, hist_proyecto, horas_trab, import_job, proyecto, resumen_horas_mes,
+    secuencia_factura,
+)
+from app.services import cache_listados, tarifas_timeline  # noqa: E402
+
+
+pytest_plugins = ["app.pytest_plugin", "pytester"]
+
+
+def _invalidar_caches():
+    tarifas_timeline.invalidar()
+    for recurso in cache_listados.RECURSOS:
+        cache_listados.invalidar(recurso)
+
+
+@pytest.fixture(autouse=True)
+def _caches_limpias():
+    # Las cachés son del proceso: cada prueba tiene su propia base
+    _invalidar_caches()
+    yield
+    _invalidar_caches()
+
+
+@pytest.fixture
+def sesion():
+    """
+    Sesión sobre una base SQLite en memoria con todas las tablas.
+    """
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def cliente_http(sesion):
+    """
+    TestClient de la API con get_db y get_async_db sobre la sesión de pruebas.
+    """
+    app.dependency_overrides[get_db] = lambda: sesion
+    app.dependency_overrides[get_async_db] = lambda: SesionEnHilo(sesion)
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_async_db, None)
+
+
+@pytest.fixture
+def consultas_bind(sesion):
+    """
+    contador_consultas cuenta sobre la base de pruebas.
+    """
+    return sesion
+
+
+@pytest.fixture
+def fabrica_sesiones(tmp_path):
+    """
+    Fábrica de sesiones sobre un fichero SQLite: cada sesión usa su propia
+    conexión, para las pruebas con varios hilos.
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pruebas.db'}",
+        connect_args={"timeout": 60, "check_same_thread": False},
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
@@ -0,0 +1,112 @@
+"""
+Paginación por clave de GET /api/horas y GET /api/horas/count
+(app/services/consulta_horas.py).
+"""
+
+import base64
+from datetime import date
+
+import pytest
+
+from app.models.horas_trab import HorasTrab
+from app.services.consulta_horas import codificar_cursor
+
+
+DIAS = (date(2025, 3, 3), date(2025, 3, 4), date(2025, 4, 1))
+EMPLEADOS = ("E0001", "E0002", "E0003", "E0010")
+PROYECTOS = ("P001", "P002")
+
+
+@pytest.fixture
+def horas(sesion):
+    # Varias filas por fecha: el orden dentro del día lo deciden empleado y proyecto
+    for dia in DIAS:
+        for i, id_empleado in enumerate(EMPLEADOS):
+            for id_proyecto in PROYECTOS:
+                sesion.add(HorasTrab(id_empleado=id_empleado, fecha=dia, id_proyecto=id_proyecto, id_sociedad="01",
+                                     id_cliente="CLI001", horas_dia=i + 0.5, estado="PENDIENTE", origen="EXCEL"))
+    sesion.commit()
+    return sesion
+
+
+def _esperadas(sesion, orden: str, **filtros) -> list:
+    consulta = sesion.query(HorasTrab.fecha, HorasTrab.id_empleado, HorasTrab.id_proyecto).filter_by(**filtros)
+    claves = [(f.isoformat(), e, p) for f, e, p in consulta]
+    return sorted(claves, reverse=orden == "desc")
+
+
+def _recorrer(cliente_http, parametros: dict) -> list:
+    """
+    Pide páginas siguiendo next_cursor hasta la última.
+    """
+    claves = []
+    cursor = None
+    for _ in range(100):
+        respuesta = cliente_http.get("/api/horas", params={**parametros, **({"cursor": cursor} if cursor else {})})
+        assert respuesta.status_code == 200
+        cuerpo = respuesta.json()
+        assert len(cuerpo["items"]) <= parametros["limit"]
+        claves += [(i["fecha"], i["id_empleado"], i["id_proyecto"]) for i in cuerpo["items"]]
+        cursor = cuerpo["next_cursor"]
+        if cursor is None:
+            return claves
+        # Solo la última página puede venir incompleta
+        assert len(cuerpo["items"]) == parametros["limit"]
+    pytest.fail("La paginación no termina")
+
+
+@pytest.mark.parametrize("orden", ["asc", "desc"])
+@pytest.mark.parametrize("limite", [1, 5, 8, 24, 100])
+def test_recorrido_completo_sin_huecos_ni_duplicados(horas, cliente_http, orden, limite):
+    claves = _recorrer(cliente_http, {"orden": orden, "limit": limite})
+
+    assert claves == _esperadas(horas, orden)
+
+
+@pytest.mark.parametrize("orden", ["asc", "desc"])
+def test_recorrido_con_filtros(horas, cliente_http, orden):
+    parametros = {"orden": orden, "limit": 3, "id_proyecto": "P002", "anio": 2025, "mes": 3}
+
+    claves = _recorrer(cliente_http, parametros)
+
+    assert claves == [c for c in _esperadas(horas, orden, id_proyecto="P002") if c[0].startswith("2025-03")]
+    conteo = cliente_http.get("/api/horas/count", params={"id_proyecto": "P002", "anio": 2025, "mes": 3}).json()
+    assert conteo == {"total": len(claves), "total_horas": 2 * sum(i + 0.5 for i in range(len(EMPLEADOS)))}
+
+
+def test_ultima_pagina_sin_cursor(horas, cliente_http):
+    total = len(DIAS) * len(EMPLEADOS) * len(PROYECTOS)
+
+    completa = cliente_http.get("/api/horas", params={"limit": total}).json()
+    assert len(completa["items"]) == total
+    assert completa["next_cursor"] is None
+
+    # El cursor de la última fila no devuelve nada más
+    ultima = completa["items"][-1]
+    cursor = codificar_cursor(date.fromisoformat(ultima["fecha"]), ultima["id_empleado"], ultima["id_proyecto"])
+    vacia = cliente_http.get("/api/horas", params={"cursor": cursor}).json()
+    assert (vacia["items"], vacia["next_cursor"]) == ([], None)
+
+
+def test_contar_todo(horas, cliente_http):
+    conteo = cliente_http.get("/api/horas/count").json()
+
+    assert conteo["total"] == len(DIAS) * len(EMPLEADOS) * len(PROYECTOS)
+    assert conteo["total_horas"] == len(DIAS) * len(PROYECTOS) * sum(i + 0.5 for i in range(len(EMPLEADOS)))
+
+
+@pytest.mark.parametrize("cursor", [
+    "no es base64",
+    base64.urlsafe_b64encode(b"no es json").decode(),
+    base64.urlsafe_b64encode(b'["2025-03-03","E0001"]').decode(),
+    base64.urlsafe_b64encode(b'["03/03/2025","E0001","P001"]').decode(),
+])
+def test_cursor_mal_formado(horas, cliente_http, cursor):
+    respuesta = cliente_http.get("/api/horas", params={"cursor": cursor})
+
+    assert respuesta.status_code == 400
+    assert respuesta.json()["detail"] == "Cursor inválido"
+
+
+def test_orden_invalido(horas, cliente_http):
+    assert cliente_http.get("/api/horas", params={"orden": "aleatorio"}).status_code == 400
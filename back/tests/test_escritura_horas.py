@@ -0,0 +1,124 @@
+"""
+Escritura masiva de fichajes (POST/PUT/DELETE /api/horas/bulk,
+app/services/escritura_horas.py).
+"""
+
+from datetime import date
+
+import pytest
+
+from app.models.horas_trab import HorasTrab
+from app.services import escritura_horas
+from app.services.resumen_horas import reconstruir, verificar
+
+
+def _fichaje(id_empleado: str, dia: int, horas: float = 8, **campos) -> dict:
+    return {
+        "id_sociedad": "01", "fecha": f"2025-03-{dia:02d}", "id_empleado": id_empleado,
+        "id_cliente": "CLI001", "id_proyecto": "P001", "horas_dia": horas, **campos,
+    }
+
+
+def _clave(id_empleado: str, dia: int) -> dict:
+    return {"id_empleado": id_empleado, "fecha": f"2025-03-{dia:02d}", "id_proyecto": "P001"}
+
+
+@pytest.fixture
+def horas(sesion):
+    for id_empleado in ("E0001", "E0002"):
+        sesion.add(HorasTrab(id_empleado=id_empleado, fecha=date(2025, 3, 3), id_proyecto="P001", id_sociedad="01",
+                             id_cliente="CLI001", horas_dia=4, estado="PENDIENTE", origen="EXCEL"))
+    sesion.commit()
+    reconstruir(sesion)
+    return sesion
+
+
+def _guardadas(sesion) -> dict:
+    sesion.expire_all()
+    return {(f.id_empleado, f.fecha.day): f.horas_dia for f in sesion.query(HorasTrab)}
+
+
+def _estados(respuesta) -> list:
+    return [(r["indice"], r["estado"], r["detalle"]) for r in respuesta.json()["resultados"]]
+
+
+def test_crear_informa_cada_elemento(horas, cliente_http):
+    respuesta = cliente_http.post("/api/horas/bulk", json=[
+        _fichaje("E0001", 4),
+        _fichaje("E0001", 3),                       # ya existe
+        {"id_empleado": "E0003"},                   # inválido
+        _fichaje("e0001 ", 4),                      # repetido (misma clave para MySQL)
+        _fichaje("E0002", 4, 6),
+    ])
+
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert (cuerpo["total"], cuerpo["aplicados"], cuerpo["errores"]) == (5, 2, 3)
+    estados = _estados(respuesta)
+    assert [(indice, estado) for indice, estado, _ in estados] == [
+        (0, "CREADO"), (1, "ERROR"), (2, "ERROR"), (3, "ERROR"), (4, "CREADO"),
+    ]
+    assert estados[1][2] == "Ya existe un fichaje para ese empleado, fecha y proyecto"
+    assert "fecha" in estados[2][2] and "id_proyecto" in estados[2][2]
+    assert estados[3][2] == "Fichaje repetido en la petición"
+    assert _guardadas(horas) == {("E0001", 3): 4, ("E0002", 3): 4, ("E0001", 4): 8, ("E0002", 4): 6}
+    assert verificar(horas)["diferencias"] == []
+
+
+def test_editar_y_eliminar_informan_no_encontrados(horas, cliente_http):
+    respuesta = cliente_http.put("/api/horas/bulk", json=[
+        {**_clave("E0001", 3), "horas_dia": 2},
+        {**_clave("E0009", 3), "horas_dia": 2},
+    ])
+    assert _estados(respuesta) == [(0, "ACTUALIZADO", None), (1, "ERROR", "Fichaje no encontrado")]
+
+    respuesta = cliente_http.request("DELETE", "/api/horas/bulk", json=[_clave("E0009", 3), _clave("E0002", 3)])
+    assert _estados(respuesta) == [(0, "ERROR", "Fichaje no encontrado"), (1, "ELIMINADO", None)]
+
+    assert _guardadas(horas) == {("E0001", 3): 2}
+    assert verificar(horas)["diferencias"] == []
+
+
+@pytest.mark.parametrize("metodo, elementos", [
+    ("POST", [_fichaje("E0001", 4), _fichaje("E0001", 3)]),
+    ("PUT", [{**_clave("E0001", 3), "horas_dia": 1}, {**_clave("E0009", 3), "horas_dia": 1}]),
+    ("DELETE", [_clave("E0001", 3), _clave("E0009", 3)]),
+])
+def test_todo_o_nada_no_escribe_nada(horas, cliente_http, metodo, elementos):
+    antes = _guardadas(horas)
+
+    respuesta = cliente_http.request(metodo, "/api/horas/bulk?todo_o_nada=true", json=elementos)
+
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert (cuerpo["aplicados"], cuerpo["errores"]) == (0, 2)
+    assert _estados(respuesta)[0] == (0, "ERROR", "No aplicado: hay elementos con error")
+    assert _guardadas(horas) == antes
+    assert verificar(horas)["diferencias"] == []
+
+
+@pytest.mark.parametrize("metodo", ["POST", "PUT", "DELETE"])
+def test_limite_de_elementos(horas, cliente_http, monkeypatch, metodo):
+    monkeypatch.setattr(escritura_horas, "LIMITE_ELEMENTOS", 2)
+
+    respuesta = cliente_http.request(metodo, "/api/horas/bulk", json=[_clave("E0001", d) for d in (3, 4, 5)])
+
+    assert respuesta.status_code == 400
+    assert respuesta.json()["detail"] == "Máximo 2 elementos por petición"
+
+
+def test_clave_guardada_a_la_vez_es_409(horas, cliente_http, monkeypatch):
+    # Otra petición guarda la clave después de la consulta de existencia: el
+    # INSERT falla por clave duplicada y no se guarda ningún elemento
+    monkeypatch.setattr(escritura_horas, "_claves", lambda validos: [])
+    antes = _guardadas(horas)
+
+    respuesta = cliente_http.post("/api/horas/bulk", json=[_fichaje("E0001", 4), _fichaje("E0001", 3)])
+
+    assert respuesta.status_code == 409
+    assert _guardadas(horas) == antes
+
+    # La sesión queda utilizable después del rollback
+    monkeypatch.undo()
+    respuesta = cliente_http.post("/api/horas/bulk", json=[_fichaje("E0001", 4)])
+    assert respuesta.json()["aplicados"] == 1
@@ -0,0 +1,113 @@
+"""
+Generación de facturas por lote (POST /api/factura/generar-lote).
+
+Cada cliente se procesa en su propio SAVEPOINT: si uno falla a mitad del
+lote, el resto se confirma y la numeración queda sin huecos ni duplicados.
+"""
+
+from datetime import date
+
+import pytest
+
+from app.models.cliente import Cliente
+from app.models.empleado import Empleado
+from app.models.factura import Factura
+from app.models.hist_proyecto import HistProyecto
+from app.models.horas_trab import HorasTrab
+from app.models.proyecto import Proyecto
+from app.models.secuencia_factura import SecuenciaFactura
+from app.routes import factura as rutas_factura
+from app.services.numeracion_facturas import formatear_numero, prefijo_mes
+from app.services.resumen_horas import reconstruir, verificar
+
+
+# Mes en curso: las facturas se emiten con la fecha de hoy, y es esa fecha la
+# que detecta las ya generadas
+HOY = date.today()
+ANIO = HOY.year
+MES = HOY.month
+CLIENTES = ("CLI001", "CLI002", "CLI003")
+FALLIDO = "CLI002"
+DIAS = (date(ANIO, MES, 1), date(ANIO, MES, 2))
+
+
+@pytest.fixture
+def horas(sesion):
+    sesion.add(Empleado(id_empleado="E0001", id_empleado_tracker="E0001", nombre="N", apellidos="A"))
+    for id_cliente in CLIENTES:
+        id_proyecto = f"P-{id_cliente}"
+        sesion.add(Cliente(id_sociedad="01", id_cliente=id_cliente, n_cliente=id_cliente, cif="B00000000"))
+        sesion.add(Proyecto(id_sociedad="01", id_proyecto=id_proyecto, id_cliente=id_cliente,
+                            nombre_proyecto=id_proyecto))
+        sesion.add(HistProyecto(id_sociedad="01", id_empleado="E0001", id_cliente=id_cliente,
+                                id_proyecto=id_proyecto, fec_inicio=date(2000, 1, 1), tarifa=40))
+        for dia in DIAS:
+            sesion.add(HorasTrab(id_empleado="E0001", fecha=dia, id_proyecto=id_proyecto, id_sociedad="01",
+                                 id_cliente=id_cliente, horas_dia=8, estado="PENDIENTE", origen="EXCEL"))
+    sesion.commit()
+    reconstruir(sesion)
+    return sesion
+
+
+@pytest.fixture
+def fallo_a_mitad(monkeypatch):
+    """
+    El cliente FALLIDO falla después de crear su factura y bloquear sus horas,
+    de modo que el SAVEPOINT tiene que deshacer las dos escrituras.
+    """
+    original = rutas_factura._bloquear_horas
+
+    def _bloquear_horas(db, id_cliente, *args):
+        bloqueadas = original(db, id_cliente, *args)
+        if id_cliente == FALLIDO:
+            raise RuntimeError("fallo simulado")
+        return bloqueadas
+
+    monkeypatch.setattr(rutas_factura, "_bloquear_horas", _bloquear_horas)
+    return monkeypatch
+
+
+def _generar_lote(cliente_http):
+    respuesta = cliente_http.post("/api/factura/generar-lote", json={
+        "id_sociedad": "01", "anio": ANIO, "mes": MES, "concepto": "Servicios del mes",
+    })
+    assert respuesta.status_code == 200
+    return {r["id_cliente"]: r for r in respuesta.json()["resultados"]}
+
+
+def test_un_cliente_falla_a_mitad_del_lote(horas, cliente_http, fallo_a_mitad):
+    prefijo = prefijo_mes(HOY)
+
+    resultados = _generar_lote(cliente_http)
+
+    assert {c: r["estado"] for c, r in resultados.items()} == {
+        "CLI001": "GENERADA", "CLI002": "ERROR", "CLI003": "GENERADA",
+    }
+    # El número del cliente fallido pasa al siguiente
+    assert resultados["CLI001"]["num_factura"] == formatear_numero(prefijo, 1)
+    assert resultados["CLI003"]["num_factura"] == formatear_numero(prefijo, 2)
+    assert resultados[FALLIDO]["num_factura"] is None
+
+    # Se relee de la base lo confirmado
+    horas.expire_all()
+    facturas = {f.id_cliente: f.num_factura for f in horas.query(Factura)}
+    assert facturas == {"CLI001": formatear_numero(prefijo, 1), "CLI003": formatear_numero(prefijo, 2)}
+    for id_cliente in CLIENTES:
+        filas = horas.query(HorasTrab).filter(HorasTrab.id_cliente == id_cliente).all()
+        if id_cliente == FALLIDO:
+            assert {(f.estado, f.id_factura) for f in filas} == {("PENDIENTE", None)}
+        else:
+            assert {(f.estado, f.id_factura) for f in filas} == {("FACTURADA", facturas[id_cliente])}
+    assert horas.query(SecuenciaFactura.ultimo_numero).filter(SecuenciaFactura.prefijo == prefijo).scalar() == 2
+    assert verificar(horas)["diferencias"] == []
+
+    # Al reintentar, el cliente fallido recibe el siguiente número
+    fallo_a_mitad.undo()
+    resultados = _generar_lote(cliente_http)
+
+    assert resultados[FALLIDO]["estado"] == "GENERADA"
+    assert resultados[FALLIDO]["num_factura"] == formatear_numero(prefijo, 3)
+    assert {r["estado"] for c, r in resultados.items() if c != FALLIDO} == {"OMITIDA"}
+    horas.expire_all()
+    assert sorted(f.num_factura for f in horas.query(Factura)) == [formatear_numero(prefijo, s) for s in (1, 2, 3)]
+    assert horas.query(HorasTrab).filter(HorasTrab.estado == "PENDIENTE").count() == 0
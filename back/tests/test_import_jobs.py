@@ -0,0 +1,42 @@
+"""
+Lanzamiento de trabajos de importación (app/services/import_jobs.py).
+"""
+
+import io
+import tempfile
+
+import pytest
+
+from app.services import import_jobs
+
+
+@pytest.fixture
+def temporal(tmp_path, monkeypatch):
+    # NamedTemporaryFile crea la copia en tempfile.gettempdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
+def _fallar(*args, **kwargs):
+    raise RuntimeError("fallo")
+
+
+@pytest.mark.parametrize("funcion", ["estimar_filas", "_crear_job"])
+def test_la_copia_se_borra_si_no_se_encola(sesion, temporal, monkeypatch, funcion):
+    monkeypatch.setattr(import_jobs, funcion, _fallar)
+
+    with pytest.raises(RuntimeError):
+        import_jobs.lanzar_previsualizacion(sesion, io.BytesIO(b"ID_EMPLEADO;FECHA\n"), "horas.csv")
+
+    assert list(temporal.iterdir()) == []
+
+
+def test_la_copia_se_borra_si_falla_la_subida(sesion, temporal):
+    class Subida(io.BytesIO):
+        def read(self, *args):
+            raise OSError("conexión cortada")
+
+    with pytest.raises(OSError):
+        import_jobs.lanzar_previsualizacion(sesion, Subida(), "horas.csv")
+
+    assert list(temporal.iterdir()) == []
@@ -0,0 +1,54 @@
+"""
+Inserción masiva de horas (app/services/insercion_horas.py).
+"""
+
+from datetime import date
+
+from app.models.horas_trab import HorasTrab
+from app.services import insercion_horas
+from app.services.insercion_horas import insertar_horas
+
+
+def _fila(id_empleado: str, dia: int, horas: float = 8) -> dict:
+    return {
+        "ID_SOCIEDAD": "01", "ID_EMPLEADO": id_empleado, "FECHA": f"2025-03-{dia:02d}", "ID_CLIENTE": "CLI001",
+        "ID_PROYECTO": "P001", "HORAS_DIA": horas, "DESC_TAREA": "Importada", "ESTADO": "PENDIENTE", "ORIGEN": "EXCEL",
+    }
+
+
+def _existente(sesion, id_empleado: str, dia: int) -> None:
+    sesion.add(HorasTrab(id_empleado=id_empleado, fecha=date(2025, 3, dia), id_proyecto="P001", id_sociedad="01",
+                         id_cliente="CLI001", horas_dia=4, estado="FACTURADA", origen="MANUAL"))
+    sesion.commit()
+
+
+def _horas(sesion, id_empleado: str, dia: int) -> tuple:
+    fila = sesion.query(HorasTrab).filter_by(id_empleado=id_empleado, fecha=date(2025, 3, dia)).one()
+    return fila.horas_dia, fila.estado
+
+
+def test_omite_las_existentes(sesion):
+    _existente(sesion, "E0001", 3)
+
+    resultado = insertar_horas(sesion, [_fila("E0001", 3), _fila("E0001", 4), _fila("E0002", 3)], tamano_lote=2)
+
+    assert resultado == {"insertadas": 2, "omitidas": 1, "lotes": 2}
+    assert _horas(sesion, "E0001", 3) == (4, "FACTURADA")
+    assert sesion.query(HorasTrab).count() == 3
+
+    # Reintentar la misma importación no inserta nada
+    resultado = insertar_horas(sesion, [_fila("E0001", 3), _fila("E0001", 4), _fila("E0002", 3)])
+    assert (resultado["insertadas"], resultado["omitidas"]) == (0, 3)
+
+
+def test_clave_guardada_a_la_vez(sesion, monkeypatch):
+    # Una importación simultánea guarda la clave después de la consulta de
+    # existencia: la omite ON CONFLICT DO NOTHING y no cuenta como insertada
+    _existente(sesion, "E0001", 3)
+    monkeypatch.setattr(insercion_horas, "_claves_existentes", lambda db, lote: set())
+
+    resultado = insertar_horas(sesion, [_fila("E0001", 3), _fila("E0001", 4)])
+
+    assert (resultado["insertadas"], resultado["omitidas"]) == (1, 1)
+    assert _horas(sesion, "E0001", 3) == (4, "FACTURADA")
+    assert _horas(sesion, "E0001", 4) == (8, "PENDIENTE")
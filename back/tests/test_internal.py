@@ -0,0 +1,65 @@
+"""
+Endpoints de métricas internas y GET /metrics (app/routes/internal.py).
+"""
+
+import pytest
+
+from app.routes import internal
+from app.services import cache_listados
+
+
+TOKEN = "token-de-pruebas"
+
+
+@pytest.fixture(autouse=True)
+def _token(monkeypatch):
+    monkeypatch.setattr(internal, "INTERNAL_METRICS_TOKEN", TOKEN)
+
+
+@pytest.mark.parametrize("ruta", ["/internal/metrics/pool", "/internal/metrics/cache"])
+def test_sin_token_configurado_no_existen(cliente_http, monkeypatch, ruta):
+    monkeypatch.setattr(internal, "INTERNAL_METRICS_TOKEN", "")
+
+    assert cliente_http.get(ruta).status_code == 404
+    assert cliente_http.get(ruta, headers={"X-Internal-Token": ""}).status_code == 404
+    assert cliente_http.post(f"{ruta}/reiniciar").status_code == 404
+
+
+@pytest.mark.parametrize("ruta", ["/internal/metrics/pool", "/internal/metrics/cache"])
+def test_exigen_el_token(cliente_http, ruta):
+    assert cliente_http.get(ruta).status_code == 403
+    assert cliente_http.get(ruta, headers={"X-Internal-Token": "otro"}).status_code == 403
+    assert cliente_http.post(f"{ruta}/reiniciar").status_code == 403
+    assert cliente_http.get(ruta, headers={"X-Internal-Token": TOKEN}).status_code == 200
+
+
+def test_reiniciar_cache_solo_con_post(cliente_http):
+    cabeceras = {"X-Internal-Token": TOKEN}
+    cliente_http.get("/api/bancos/")
+    cliente_http.get("/api/bancos/")
+
+    # El antiguo ?reiniciar=true de GET ya no pone a cero los contadores
+    cliente_http.get("/internal/metrics/cache?reiniciar=true", headers=cabeceras)
+    assert cache_listados.estado_cache()["recursos"]["bancos"]["aciertos"] >= 1
+
+    respuesta = cliente_http.post("/internal/metrics/cache/reiniciar", headers=cabeceras)
+    assert respuesta.status_code == 200
+    assert respuesta.json()["recursos"]["bancos"]["aciertos"] >= 1
+    assert cache_listados.estado_cache()["recursos"]["bancos"]["aciertos"] == 0
+
+
+def test_reiniciar_pool(cliente_http):
+    respuesta = cliente_http.post("/internal/metrics/pool/reiniciar", headers={"X-Internal-Token": TOKEN})
+
+    assert respuesta.status_code == 200
+    assert "async" in respuesta.json()
+
+
+def test_metricas_prometheus_exigen_token(cliente_http, monkeypatch):
+    assert cliente_http.get("/metrics").status_code == 403
+    respuesta = cliente_http.get("/metrics", headers={"X-Internal-Token": TOKEN})
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"].startswith("text/plain")
+
+    monkeypatch.setattr(internal, "INTERNAL_METRICS_TOKEN", "")
+    assert cliente_http.get("/metrics", headers={"X-Internal-Token": TOKEN}).status_code == 404
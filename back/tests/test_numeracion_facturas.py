@@ -0,0 +1,100 @@
+"""
+Pruebas de la numeración de facturas (app/services/numeracion_facturas.py).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from app.models.factura import Factura
+from app.models.secuencia_factura import SecuenciaFactura
+from app.services.numeracion_facturas import formatear_numero, prefijo_mes, reservar_numeros
+
+
+PREFIJO = prefijo_mes(date(2025, 3, 1))
+
+
+def _factura(id_sociedad: str, num_factura: str) -> Factura:
+    return Factura(
+        id_sociedad=id_sociedad, id_cliente="C1", num_factura=num_factura, fec_factura=date(2025, 3, 31),
+        concepto="Prueba", base_imponible=1, total=1,
+    )
+
+
+def _contador(db) -> int:
+    return db.query(SecuenciaFactura.ultimo_numero).filter(SecuenciaFactura.prefijo == PREFIJO).scalar()
+
+
+def test_dos_sociedades_comparten_la_serie(sesion):
+    # NUM_FACTURA es la clave de FACTURAS: la segunda sociedad no puede
+    # recibir un número que ya tiene la primera
+    for id_sociedad in ("01", "02", "01"):
+        reserva = reservar_numeros(sesion, PREFIJO)
+        sesion.add(_factura(id_sociedad, reserva.tomar()))
+        sesion.commit()
+
+    numeros = sorted(f.num_factura for f in sesion.query(Factura.num_factura))
+    assert numeros == [formatear_numero(PREFIJO, s) for s in (1, 2, 3)]
+    assert _contador(sesion) == 3
+
+
+def test_primera_reserva_parte_de_las_facturas_existentes(sesion):
+    sesion.add(_factura("02", formatear_numero(PREFIJO, 7)))
+    sesion.commit()
+
+    reserva = reservar_numeros(sesion, PREFIJO, 2)
+
+    assert (reserva.primero, reserva.ultimo) == (8, 9)
+
+
+def test_numeros_del_historico_con_otro_formato(sesion):
+    # "QS2503ABC" es el mayor como texto (y no es un número) y "QS250310000"
+    # el mayor como número
+    for num_factura in ("QS2503-R01", "QS25030042", "QS2503ABC", "QS2503", "QS25030009B", "QS250310000"):
+        sesion.add(_factura("01", num_factura))
+    sesion.commit()
+
+    reserva = reservar_numeros(sesion, PREFIJO)
+
+    assert reserva.tomar() == formatear_numero(PREFIJO, 10001)
+
+
+def test_historico_sin_numeros_validos(sesion):
+    sesion.add(_factura("01", "QS2503-R01"))
+    sesion.commit()
+
+    assert reservar_numeros(sesion, PREFIJO).tomar() == formatear_numero(PREFIJO, 1)
+
+
+def test_cerrar_devuelve_los_numeros_no_usados(sesion):
+    reserva = reservar_numeros(sesion, PREFIJO, 5)
+    primero = reserva.tomar()
+    segundo = reserva.tomar()
+    reserva.devolver(segundo)
+
+    assert reserva.cerrar() == 4
+    sesion.commit()
+    assert primero == formatear_numero(PREFIJO, 1)
+    assert _contador(sesion) == 1
+
+
+def test_reservas_concurrentes_sin_duplicados_ni_huecos(fabrica_sesiones):
+    sociedades = ["01", "02", "03"]
+
+    def generar(indice: int) -> None:
+        db = fabrica_sesiones()
+        try:
+            reserva = reservar_numeros(db, PREFIJO, 2)
+            for _ in range(2):
+                db.add(_factura(sociedades[indice % len(sociedades)], reserva.tomar()))
+            db.commit()
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(generar, range(30)))
+
+    db = fabrica_sesiones()
+    numeros = sorted(f.num_factura for f in db.query(Factura.num_factura))
+    assert numeros == [formatear_numero(PREFIJO, s) for s in range(1, 61)]
+    assert _contador(db) == 60
+    db.close()
@@ -0,0 +1,86 @@
+"""
+Filtros por periodo (app/services/periodos.py) y su uso de índices.
+
+Las consultas son las de benchmarks/explain_periodos.py, que hace la misma
+comprobación con EXPLAIN sobre un MySQL real; aquí se comprueban con
+EXPLAIN QUERY PLAN de SQLite sobre el esquema de los modelos.
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app.services.periodos import rango_fechas, rango_mes, rango_periodo
+from benchmarks.explain_periodos import TABLAS_POR_MES, consultas
+
+
+# Índice que debe usar cada consulta
+INDICES = {
+    "preview: horas del cliente": "sqlite_autoindex_RESUMEN_HORAS_MES_1",
+    "generar: factura duplicada": "ix_FACTURAS_CLIENTE_FECHA",
+    "generar: bloquear horas": "ix_HORAS_TRAB_CLIENTE_FECHA",
+    "horas: página siguiente (cursor)": "ix_HORAS_TRAB_FECHA_EMP_PROY",
+    "horas por proyecto y mes": "ix_HORAS_TRAB_PROYECTO_FECHA",
+}
+
+CONSULTAS = {nombre: (consulta, anterior, tablas) for nombre, consulta, anterior, tablas in consultas()}
+
+
+def _plan(conn, consulta):
+    sql = str(consulta.compile(conn, compile_kwargs={"literal_binds": True}))
+    return [fila[-1] for fila in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def _pasos_acotados(plan, tabla):
+    # La tabla debe leerse con "SEARCH ... USING INDEX" acotando la fecha
+    # (p. ej. "FECHA>? AND FECHA<?") o el mes ("ANIO=? AND MES=?"),
+    # nunca con "SCAN <tabla>"
+    acotado = "MES=?" if tabla in TABLAS_POR_MES else "<?"
+    pasos = [paso for paso in plan if paso.split(" ")[1:2] == [tabla]]
+    return [paso for paso in pasos if paso.startswith("SEARCH") and "INDEX" in paso and acotado in paso]
+
+
+def test_todas_las_consultas_tienen_indice_esperado():
+    assert set(INDICES) == set(CONSULTAS)
+
+
+@pytest.mark.parametrize("nombre", sorted(INDICES))
+def test_consulta_usa_indice_acotado(sesion, nombre):
+    consulta, _, tablas = CONSULTAS[nombre]
+    plan = _plan(sesion.connection(), consulta)
+
+    for tabla in tablas:
+        pasos = _pasos_acotados(plan, tabla)
+        assert pasos, f"{tabla} sin índice acotado: {plan}"
+        assert f"USING INDEX {INDICES[nombre]} " in pasos[0], plan
+        assert not any(paso.startswith(f"SCAN {tabla}") for paso in plan), plan
+
+
+@pytest.mark.parametrize("nombre", sorted(n for n, (_, anterior, _) in CONSULTAS.items() if anterior is not None))
+def test_extract_no_acota_por_fecha(sesion, nombre):
+    # La versión anterior con extract(year/month) no pasa la comprobación:
+    # si una consulta vuelve a ella, el test anterior falla
+    _, anterior, tablas = CONSULTAS[nombre]
+    plan = _plan(sesion.connection(), anterior)
+
+    assert not all(_pasos_acotados(plan, tabla) for tabla in tablas), plan
+
+
+def test_rangos_semiabiertos():
+    assert rango_mes(2024, 2) == (date(2024, 2, 1), date(2024, 3, 1))
+    assert rango_mes(2025, 12) == (date(2025, 12, 1), date(2026, 1, 1))
+    assert rango_fechas(date(2025, 3, 1), date(2025, 3, 31)) == (date(2025, 3, 1), date(2025, 4, 1))
+    assert rango_fechas(hasta=date(2025, 3, 31)) == (None, date(2025, 4, 1))
+    assert rango_periodo(anio=2025) == (date(2025, 1, 1), date(2026, 1, 1))
+    assert rango_periodo() is None
+
+
+@pytest.mark.parametrize("argumentos", [
+    {"mes": 3},
+    {"anio": 2025, "desde": date(2025, 1, 1)},
+    {"desde": date(2025, 3, 2), "hasta": date(2025, 3, 1)},
+])
+def test_periodo_invalido(argumentos):
+    with pytest.raises(ValueError):
+        rango_periodo(**argumentos)
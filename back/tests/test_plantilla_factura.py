@@ -0,0 +1,68 @@
+"""
+Pruebas de la plantilla del PDF de factura (app/services/plantilla_factura.py).
+
+_Logo usa partes internas de ReportLab: estas pruebas comprueban, con la
+versión instalada, que el logo llega al PDF igual que con la API pública.
+"""
+
+import re
+from datetime import date
+
+import pytest
+from PIL import Image as ImagenPIL
+from reportlab import rl_config
+from reportlab.platypus import Image
+
+from app.services.pdf_factura import renderizar
+from app.services.plantilla_factura import Plantilla
+
+
+DATOS = {
+    "num_factura": "QS25030001",
+    "fec_factura": date(2025, 3, 31),
+    "concepto": "Servicios de consultoría",
+    "base_imponible": 1000.0,
+    "cliente": {"n_cliente": "Cliente", "direccion": "Calle Mayor 1", "cif": "B00000000", "telefono": "910000000"},
+    "banco": {"n_banco_cobro": "Banco", "num_cuenta": "0000", "codigo_iban": "ES00"},
+}
+
+
+class _PlantillaApiPublica(Plantilla):
+    """Plantilla con el logo dibujado por el flowable Image de ReportLab."""
+
+    def __init__(self, logo):
+        super().__init__(logo)
+        self._ruta_logo = logo
+
+    def logo(self):
+        return Image(str(self._ruta_logo), width=140, height=55, kind="proportional")
+
+
+@pytest.fixture
+def logo(tmp_path, monkeypatch):
+    # Sin fecha ni ID aleatorio en el PDF, para poder compararlos
+    monkeypatch.setattr(rl_config, "invariant", 1)
+    ruta = tmp_path / "logo.png"
+    # Con transparencia, para que lleve también la máscara (SMask)
+    ImagenPIL.new("RGBA", (40, 16), (200, 30, 30, 128)).save(ruta)
+    return ruta
+
+
+def test_el_pdf_incluye_el_logo(logo):
+    pdf = renderizar(DATOS, Plantilla(logo))
+
+    imagenes = re.findall(rb"/Subtype /Image /Type /XObject /Width 40\b", pdf)
+    assert len(imagenes) == 2  # la imagen y su máscara
+    assert b"/SMask" in pdf
+    # Nombre que le da Canvas.drawImage, en los recursos de la página
+    assert re.search(rb"/FormXob\.[0-9a-f]{32}", pdf)
+
+
+def test_el_logo_sale_igual_que_con_la_api_publica(logo):
+    plantilla = Plantilla(logo)
+
+    primero = renderizar(DATOS, plantilla)
+    # La plantilla se reutiliza: cada documento recibe su copia del logo
+    segundo = renderizar(DATOS, plantilla)
+
+    assert primero == segundo == renderizar(DATOS, _PlantillaApiPublica(logo))
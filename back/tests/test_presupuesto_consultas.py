@@ -0,0 +1,91 @@
+"""
+Presupuestos de consultas (app/query_counter.py y app/pytest_plugin.py).
+"""
+
+from calendar import monthrange
+from datetime import date
+
+import pytest
+
+from app.models.cliente import Cliente
+from app.models.empleado import Empleado
+from app.models.hist_proyecto import HistProyecto
+from app.models.horas_trab import HorasTrab
+from app.models.proyecto import Proyecto
+from app.query_counter import PRESUPUESTOS
+from app.services.resumen_horas import reconstruir
+
+
+ANIO = 2025
+MES = 3
+ID_CLIENTE = "CLI001"
+PROYECTOS = ("P001", "P002")
+
+
+def _sembrar(db, empleados: int) -> None:
+    db.add(Cliente(id_sociedad="01", id_cliente=ID_CLIENTE, n_cliente="Cliente", cif="B00000000"))
+    for id_proyecto in PROYECTOS:
+        db.add(Proyecto(id_sociedad="01", id_proyecto=id_proyecto, id_cliente=ID_CLIENTE, nombre_proyecto=id_proyecto))
+
+    dias = [date(ANIO, MES, d) for d in range(1, monthrange(ANIO, MES)[1] + 1) if date(ANIO, MES, d).weekday() < 5]
+    for e in range(empleados):
+        id_empleado = f"E{e:04d}"
+        db.add(Empleado(id_empleado=id_empleado, id_empleado_tracker=id_empleado, nombre=f"N{e}", apellidos=f"A{e}"))
+        for id_proyecto in PROYECTOS:
+            db.add(HistProyecto(id_sociedad="01", id_empleado=id_empleado, id_cliente=ID_CLIENTE,
+                                id_proyecto=id_proyecto, fec_inicio=date(ANIO, 1, 1), tarifa=40))
+            for dia in dias:
+                db.add(HorasTrab(id_empleado=id_empleado, fecha=dia, id_proyecto=id_proyecto, id_sociedad="01",
+                                 id_cliente=ID_CLIENTE, horas_dia=4, estado="PENDIENTE", origen="EXCEL"))
+    db.commit()
+    reconstruir(db)
+
+
+@pytest.mark.parametrize("empleados", [1, 10, 100])
+def test_preview_factura_dentro_de_presupuesto(sesion, cliente_http, contador_consultas, empleados):
+    _sembrar(sesion, empleados)
+
+    with contador_consultas(maximo=PRESUPUESTOS["POST /api/factura/preview"], umbral_n1=3) as consultas:
+        respuesta = cliente_http.post(
+            "/api/factura/preview", json={"anio": ANIO, "mes": MES, "id_cliente": ID_CLIENTE}
+        )
+
+    assert respuesta.status_code == 200
+    assert len(respuesta.json()["lineas"]) == empleados * len(PROYECTOS)
+    assert respuesta.json()["alertas"] == []
+    assert consultas.total <= PRESUPUESTOS["POST /api/factura/preview"]
+
+
+def test_presupuesto_superado_falla_el_test(pytester):
+    pytester.makeconftest('pytest_plugins = ["app.pytest_plugin"]')
+    pytester.makepyfile(
+        """
+        import pytest
+        from sqlalchemy import create_engine, text
+
+        engine = create_engine("sqlite://")
+
+        @pytest.fixture
+        def consultas_bind():
+            return engine
+
+        @pytest.mark.presupuesto_consultas(2)
+        def test_demasiadas(contador_consultas):
+            with engine.connect() as conn:
+                for _ in range(3):
+                    conn.execute(text("SELECT 1"))
+
+        @pytest.mark.presupuesto_consultas(2)
+        def test_dentro(contador_consultas):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        """
+    )
+
+    resultado = pytester.runpytest_inprocess("-p", "no:cacheprovider")
+
+    resultado.assert_outcomes(passed=1, failed=1)
+    # El fallo es del test (fase call), no un error de teardown
+    fallos = [informe for informe in resultado.reprec.getreports("pytest_runtest_logreport") if informe.failed]
+    assert [(informe.when, informe.head_line) for informe in fallos] == [("call", "test_demasiadas")]
+    resultado.stdout.fnmatch_lines(["*ConsultasExcedidas*3 sentencias, presupuesto 2*"])
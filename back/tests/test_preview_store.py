@@ -0,0 +1,48 @@
+"""
+Almacén de previsualizaciones (app/services/preview_store.py).
+"""
+
+import sqlite3
+
+import pytest
+
+from app.services import preview_store
+from app.services.preview_store import MemoryPreviewStore, SQLitePreviewStore, serializar_filas
+
+
+FILAS = [{"ID_EMPLEADO": f"E{i}", "HORAS_DIA": i % 8, "ESTADO": "PENDIENTE"} for i in range(25)]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryPreviewStore(ttl=60, max_entradas=10, max_bytes=10_000_000)
+    return SQLitePreviewStore(str(tmp_path / "previews.sqlite3"), ttl=60, max_entradas=10, max_bytes=10_000_000)
+
+
+def test_contar_filas_no_descomprime(store, monkeypatch):
+    token = store.guardar_bloques([serializar_filas(FILAS[:10]), serializar_filas(FILAS[10:])], len(FILAS))
+
+    def _descomprimir(*args):
+        raise AssertionError("contar_filas no debe descomprimir los bloques")
+
+    monkeypatch.setattr(preview_store.zlib, "decompress", _descomprimir)
+    assert store.contar_filas(token) == len(FILAS)
+    assert store.contar_filas("no-existe") is None
+
+
+def test_fichero_sin_columna_filas(tmp_path):
+    # Almacén creado por una versión anterior, con una previsualización ya guardada
+    ruta = str(tmp_path / "previews.sqlite3")
+    with sqlite3.connect(ruta) as conn:
+        conn.execute(
+            "CREATE TABLE PREVIEWS (TOKEN TEXT PRIMARY KEY, DATOS BLOB NOT NULL, TAMANO INTEGER NOT NULL, "
+            "EXPIRA REAL NOT NULL, ULTIMO_ACCESO REAL NOT NULL)"
+        )
+        blob = preview_store.empaquetar_bloques([serializar_filas(FILAS)])
+        conn.execute("INSERT INTO PREVIEWS VALUES ('antiguo', ?, ?, 9e18, 0)", (blob, len(blob)))
+
+    store = SQLitePreviewStore(ruta, ttl=60, max_entradas=10, max_bytes=10_000_000)
+
+    assert store.contar_filas("antiguo") == len(FILAS)
+    assert store.obtener(store.guardar(FILAS[:3])) == FILAS[:3]
@@ -0,0 +1,149 @@
+"""
+Mantenimiento de RESUMEN_HORAS_MES desde las escrituras en HORAS_TRAB
+(app/services/resumen_horas.py).
+
+Cada prueba ejecuta una ruta que escribe en HORAS_TRAB y comprueba con
+verificar() que el resumen sigue coincidiendo con las filas diarias.
+"""
+
+from datetime import date
+
+import pytest
+
+from app.models.cliente import Cliente
+from app.models.empleado import Empleado
+from app.models.hist_proyecto import HistProyecto
+from app.models.horas_trab import HorasTrab
+from app.models.proyecto import Proyecto
+from app.services.preview_store import get_preview_store
+from app.services.resumen_horas import reconstruir, verificar
+
+
+ANIO = 2025
+MES = 3
+ID_CLIENTE = "CLI001"
+EMPLEADOS = ("E0001", "E0002")
+PROYECTOS = ("P001", "P002")
+DIAS = (date(2025, 2, 28), date(2025, 3, 3), date(2025, 3, 4), date(2025, 3, 5))
+
+
+def _fichaje(id_empleado: str, fecha: date, id_proyecto: str, horas: float = 8, **campos) -> dict:
+    return {
+        "id_sociedad": "01", "fecha": fecha.isoformat(), "id_empleado": id_empleado,
+        "id_cliente": ID_CLIENTE, "id_proyecto": id_proyecto, "horas_dia": horas, **campos,
+    }
+
+
+@pytest.fixture
+def horas(sesion):
+    sesion.add(Cliente(id_sociedad="01", id_cliente=ID_CLIENTE, n_cliente="Cliente", cif="B00000000"))
+    for id_proyecto in PROYECTOS:
+        sesion.add(Proyecto(id_sociedad="01", id_proyecto=id_proyecto, id_cliente=ID_CLIENTE,
+                            nombre_proyecto=id_proyecto))
+    for id_empleado in EMPLEADOS:
+        sesion.add(Empleado(id_empleado=id_empleado, id_empleado_tracker=id_empleado, nombre="N", apellidos="A"))
+        for id_proyecto in PROYECTOS:
+            sesion.add(HistProyecto(id_sociedad="01", id_empleado=id_empleado, id_cliente=ID_CLIENTE,
+                                    id_proyecto=id_proyecto, fec_inicio=date(2025, 1, 1), tarifa=40))
+            for dia in DIAS:
+                sesion.add(HorasTrab(id_empleado=id_empleado, fecha=dia, id_proyecto=id_proyecto, id_sociedad="01",
+                                     id_cliente=ID_CLIENTE, horas_dia=4, estado="PENDIENTE", origen="EXCEL"))
+    sesion.commit()
+    reconstruir(sesion)
+    assert verificar(sesion)["diferencias"] == []
+    return sesion
+
+
+def _comprobar(sesion) -> None:
+    sesion.expire_all()
+    informe = verificar(sesion)
+    assert informe["claves"] > 0
+    assert informe["diferencias"] == []
+
+
+def test_fichar_manual(horas, cliente_http):
+    respuesta = cliente_http.post("/api/horas", json=_fichaje("E0001", date(2025, 3, 6), "P001", 6))
+    assert respuesta.status_code == 200
+    # Clave nueva (mes sin horas de ese empleado y proyecto)
+    respuesta = cliente_http.post("/api/horas", json=_fichaje("E0002", date(2025, 4, 1), "P002", 2))
+    assert respuesta.status_code == 200
+    _comprobar(horas)
+
+
+def test_editar_fichaje(horas, cliente_http):
+    respuesta = cliente_http.put("/api/horas/E0001/2025-03-04/P001", json={"horas_dia": 7.5})
+    assert respuesta.status_code == 200
+    respuesta = cliente_http.put("/api/horas/E0002/2025-03-03/P002", json={"estado": "FACTURADA"})
+    assert respuesta.status_code == 200
+    _comprobar(horas)
+
+
+def test_eliminar_fichaje(horas, cliente_http):
+    # Febrero solo tiene un día: la clave desaparece del resumen
+    respuesta = cliente_http.delete("/api/horas/E0001/2025-02-28/P001")
+    assert respuesta.status_code == 200
+    respuesta = cliente_http.delete("/api/horas/E0002/2025-03-03/P001")
+    assert respuesta.status_code == 200
+    _comprobar(horas)
+
+
+def test_confirmar_importacion(horas, cliente_http):
+    filas = [
+        {"ID_SOCIEDAD": "01", "ID_EMPLEADO": "E0001", "FECHA": "2025-03-10", "ID_CLIENTE": ID_CLIENTE,
+         "ID_PROYECTO": "P001", "HORAS_DIA": 5, "DESC_TAREA": "Importada", "ESTADO": "PENDIENTE", "ORIGEN": "EXCEL"},
+        {"ID_SOCIEDAD": "01", "ID_EMPLEADO": "E0002", "FECHA": "2025-05-02", "ID_CLIENTE": ID_CLIENTE,
+         "ID_PROYECTO": "P002", "HORAS_DIA": 3, "DESC_TAREA": "Importada", "ESTADO": "PENDIENTE", "ORIGEN": "EXCEL"},
+        # Ya existe: se omite
+        {"ID_SOCIEDAD": "01", "ID_EMPLEADO": "E0001", "FECHA": "2025-03-03", "ID_CLIENTE": ID_CLIENTE,
+         "ID_PROYECTO": "P001", "HORAS_DIA": 1, "DESC_TAREA": "Importada", "ESTADO": "PENDIENTE", "ORIGEN": "EXCEL"},
+    ]
+    token = get_preview_store().guardar(filas)
+
+    respuesta = cliente_http.post("/confirm-horas", json={"import_token": token, "tamano_lote": 2})
+
+    assert respuesta.status_code == 200
+    assert (respuesta.json()["insertadas"], respuesta.json()["omitidas"]) == (2, 1)
+    _comprobar(horas)
+
+
+def test_escritura_masiva(horas, cliente_http):
+    respuesta = cliente_http.post("/api/horas/bulk", json=[
+        _fichaje("E0001", date(2025, 3, 7), "P001"),
+        _fichaje("E0002", date(2025, 1, 15), "P001", 2),
+        _fichaje("E0001", date(2025, 3, 3), "P001"),  # ya existe: ERROR
+    ])
+    assert respuesta.json()["aplicados"] == 2
+    _comprobar(horas)
+
+    respuesta = cliente_http.put("/api/horas/bulk", json=[
+        {"id_empleado": "E0001", "fecha": "2025-03-04", "id_proyecto": "P002", "horas_dia": 1},
+        {"id_empleado": "E0002", "fecha": "2025-03-05", "id_proyecto": "P001", "estado": "FACTURADA"},
+    ])
+    assert respuesta.json()["aplicados"] == 2
+    _comprobar(horas)
+
+    respuesta = cliente_http.request("DELETE", "/api/horas/bulk", json=[
+        {"id_empleado": "E0002", "fecha": "2025-01-15", "id_proyecto": "P001"},
+        {"id_empleado": "E0001", "fecha": "2025-03-05", "id_proyecto": "P002"},
+    ])
+    assert respuesta.json()["aplicados"] == 2
+    _comprobar(horas)
+
+
+def test_generar_factura(horas, cliente_http):
+    respuesta = cliente_http.post("/api/factura/generar", json={
+        "id_sociedad": "01", "anio": ANIO, "mes": MES, "id_cliente": ID_CLIENTE, "concepto": "Marzo",
+    })
+
+    assert respuesta.status_code == 200
+    assert horas.query(HorasTrab).filter(HorasTrab.estado == "FACTURADA").count() == 12
+    _comprobar(horas)
+
+
+def test_generar_lote(horas, cliente_http):
+    respuesta = cliente_http.post("/api/factura/generar-lote", json={
+        "id_sociedad": "01", "anio": ANIO, "mes": MES, "concepto": "Marzo",
+    })
+
+    assert respuesta.json()["generadas"] == 1
+    _comprobar(horas)
@@ -4,6 +4,8 @@ import { useEffect, useMemo, useState } from "react";
 import { Search, Plus, Edit, Trash2, X, Clock } from "lucide-react";
 import { apiUrl } from "@/lib/api";
 
+const PAGE_SIZE = 200;
+
 type TimeEntry = {
   id: string;
   fecha: string;
@@ -23,10 +25,13 @@ export default function HoursClient() {
   const [desde, setDesde] = useState("");
   const [hasta, setHasta] = useState("");
 
-  const [rows, setRows] = useState<TimeEntry[]>([]);
+  const [horas, setHoras] = useState<any[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [totalFichajes, setTotalFichajes] = useState(0);
   const [empleados, setEmpleados] = useState<any[]>([]);
   const [proyectos, setProyectos] = useState<any[]>([]);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
 
     // Empleados ordenados alfabéticamente
   const empleadosOrdenados = [...empleados].sort((a, b) =>
@@ -51,51 +56,50 @@ export default function HoursClient() {
   const [mFecha, setMFecha] = useState("");
   const [mHoras, setMHoras] = useState<number>(0);
 
-  async function fetchData() {
-    setLoading(true);
+  // Filtros de empleado, proyecto y fechas: se aplican en el servidor
+  function buildQuery(cursor?: string | null) {
+    const params = new URLSearchParams();
+    if (empleadoId) params.set("id_empleado", empleadoId);
+    if (proyectoId) params.set("id_proyecto", proyectoId);
+    if (desde) params.set("desde", desde);
+    if (hasta) params.set("hasta", hasta);
+    if (cursor) params.set("cursor", cursor);
+    return params;
+  }
 
+  async function fetchCatalogos() {
     try {
-      const [resHoras, resEmp, resPro] = await Promise.all([
-        fetch(apiUrl("/api/horas")),
+      const [resEmp, resPro] = await Promise.all([
         fetch(apiUrl("/api/empleados")),
         fetch(apiUrl("/api/proyectos"))
       ]);
 
+      setEmpleados(await resEmp.json());
+      setProyectos(await resPro.json());
+    } catch (error) {
+      console.error("Error cargando datos:", error);
+    }
+  }
+
+  // Primera página (y total) con los filtros actuales
+  async function fetchData() {
+    setLoading(true);
+
+    try {
+      const query = buildQuery();
+      query.set("limit", String(PAGE_SIZE));
+
+      const [resHoras, resCount] = await Promise.all([
+        fetch(apiUrl(`/api/horas?${query}`)),
+        fetch(apiUrl(`/api/horas/count?${buildQuery()}`))
+      ]);
+
       const horasData = await resHoras.json();
-      const empleadosData = await resEmp.json();
-      const proyectosData = await resPro.json();
-
-      setEmpleados(empleadosData);
-      setProyectos(proyectosData);
-
-      const mapped: TimeEntry[] = horasData.map((item: any) => {
-        const emp = empleadosData.find(
-          (e: any) => e.id_empleado === item.id_empleado
-        );
-
-        const pro = proyectosData.find(
-          (p: any) => p.id_proyecto === item.id_proyecto
-        );
-
-        return {
-          id: `${item.id_empleado}_${item.fecha}_${item.id_proyecto}`,
-          fecha: item.fecha,
-          empleado: {
-            id: item.id_empleado,
-            nombre: emp ? `${emp.nombre} ${emp.apellidos}` : item.id_empleado,
-          },
-          proyecto: {
-            id: item.id_proyecto,
-            nombre: pro ? pro.id_proyecto : item.id_proyecto,
-          },
-          horas: Number(item.horas_dia),
-          desc_tarea: item.desc_tarea ?? "",
-          origen: item.origen ?? "MANUAL",
-          facturada: item.estado === "FACTURADA",
-        };
-      });
+      const countData = await resCount.json();
 
-      setRows(mapped);
+      setHoras(horasData.items);
+      setNextCursor(horasData.next_cursor);
+      setTotalFichajes(countData.total);
     } catch (error) {
       console.error("Error cargando datos:", error);
     } finally {
@@ -103,23 +107,71 @@ export default function HoursClient() {
     }
   }
 
+  // Página siguiente a partir del cursor de la anterior
+  async function fetchMore() {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+
+    try {
+      const query = buildQuery(nextCursor);
+      query.set("limit", String(PAGE_SIZE));
+
+      const res = await fetch(apiUrl(`/api/horas?${query}`));
+      const data = await res.json();
+
+      setHoras((prev) => [...prev, ...data.items]);
+      setNextCursor(data.next_cursor);
+    } catch (error) {
+      console.error("Error cargando datos:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
   useEffect(() => {
-    fetchData();
+    fetchCatalogos();
   }, []);
 
+  useEffect(() => {
+    fetchData();
+  }, [empleadoId, proyectoId, desde, hasta]);
+
+  const rows = useMemo<TimeEntry[]>(() => {
+    const empleadosPorId = new Map(empleados.map((e: any) => [e.id_empleado, e]));
+    const proyectosPorId = new Map(proyectos.map((p: any) => [p.id_proyecto, p]));
+
+    return horas.map((item: any) => {
+      const emp = empleadosPorId.get(item.id_empleado);
+      const pro = proyectosPorId.get(item.id_proyecto);
+
+      return {
+        id: `${item.id_empleado}_${item.fecha}_${item.id_proyecto}`,
+        fecha: item.fecha,
+        empleado: {
+          id: item.id_empleado,
+          nombre: emp ? `${emp.nombre} ${emp.apellidos}` : item.id_empleado,
+        },
+        proyecto: {
+          id: item.id_proyecto,
+          nombre: pro ? pro.id_proyecto : item.id_proyecto,
+        },
+        horas: Number(item.horas_dia),
+        desc_tarea: item.desc_tarea ?? "",
+        origen: item.origen ?? "MANUAL",
+        facturada: item.estado === "FACTURADA",
+      };
+    });
+  }, [horas, empleados, proyectos]);
+
+  // La búsqueda por texto se aplica sobre las páginas ya cargadas
   const filteredRows = useMemo(() => {
+    if (!searchTerm) return rows;
+
     return rows.filter((r) => {
       const text = `${r.empleado.nombre} ${r.proyecto.nombre} ${r.desc_tarea}`.toLowerCase();
-
-      if (searchTerm && !text.includes(searchTerm.toLowerCase())) return false;
-      if (empleadoId && r.empleado.id !== empleadoId) return false;
-      if (proyectoId && r.proyecto.id !== proyectoId) return false;
-      if (desde && r.fecha < desde) return false;
-      if (hasta && r.fecha > hasta) return false;
-
-      return true;
+      return text.includes(searchTerm.toLowerCase());
     });
-  }, [rows, searchTerm, empleadoId, proyectoId, desde, hasta]);
+  }, [rows, searchTerm]);
 
   const totalHoras = useMemo(
     () => filteredRows.reduce((acc, r) => acc + r.horas, 0),
@@ -248,7 +300,7 @@ export default function HoursClient() {
             <span className="font-semibold text-quality-dark">
               {totalHoras.toFixed(2)}
             </span>{" "}
-            horas
+            horas ({rows.length} de {totalFichajes} fichajes cargados)
           </p>
         </div>
 
@@ -373,6 +425,18 @@ export default function HoursClient() {
             )}
           </tbody>
         </table>
+
+        {nextCursor && !loading && (
+          <div className="flex justify-center border-t border-[#E5E7EB] p-4">
+            <button
+              onClick={fetchMore}
+              disabled={loadingMore}
+              className="px-4 py-2 text-sm text-gray-700 border border-gray-200 rounded-lg hover:bg-gray-50 disabled:opacity-50"
+            >
+              {loadingMore ? "Cargando..." : "Cargar más"}
+            </button>
+          </div>
+        )}
       </div>
 
       {isAddOpen && (